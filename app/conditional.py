@@ -0,0 +1,104 @@
+"""
+Validators and conditional GET handling.
+
+Dashboards poll the status and solution endpoints and mostly get back what they
+already have. Responses carry an ETag (and, for files, a Last-Modified date)
+built from cheap metadata: file mtime and size, the job registry version and
+log offsets. A request whose If-None-Match or If-Modified-Since header still
+matches is answered with an empty 304 Not Modified, without reading files or
+serializing JSON.
+"""
+
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """
+    Build a quoted entity tag from a few values.
+
+    Args:
+        *parts: Values the representation depends on (None gives an empty part)
+        weak: Mark the tag as weak (W/), for bodies that are equivalent but not byte-identical
+
+    Returns:
+        The entity tag, e.g. "1a2b-3c"
+    """
+    value = "-".join("" if part is None else format(part, "x") if isinstance(part, int) else str(part)
+                     for part in parts)
+    return f'W/"{value}"' if weak else f'"{value}"'
+
+
+def stat_etag(stat_result: os.stat_result, variant: Optional[str] = None) -> str:
+    """Entity tag of a file from its mtime and size; variant tells representations of the same file apart."""
+    if variant is None:
+        return make_etag(stat_result.st_mtime_ns, stat_result.st_size)
+    return make_etag(stat_result.st_mtime_ns, stat_result.st_size, variant)
+
+
+def http_date(timestamp: float) -> str:
+    """Format a timestamp for the Last-Modified header."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def _opaque_tag(etag: str) -> str:
+    # Weak comparison: W/"x" and "x" match
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match (or If-Range) header matches an entity tag."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tag = _opaque_tag(etag)
+    return any(_opaque_tag(candidate.strip()) == tag for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, etag: Optional[str], last_modified: Optional[float] = None) -> bool:
+    """
+    Whether a GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence; If-Modified-Since is only used without it.
+
+    Args:
+        request: The incoming request
+        etag: Current entity tag of the representation
+        last_modified: Current modification time (seconds since the epoch)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return False
+        # HTTP dates have a resolution of one second
+        return int(last_modified) <= since
+    return False
+
+
+def validator_headers(etag: Optional[str], last_modified: Optional[float] = None) -> Dict[str, str]:
+    """ETag and Last-Modified headers for a representation."""
+    headers = {}
+    if etag is not None:
+        headers["etag"] = etag
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: Optional[str], last_modified: Optional[float] = None,
+                          headers: Optional[Dict[str, str]] = None) -> Response:
+    """An empty 304 response carrying the current validators."""
+    response_headers = dict(headers or {})
+    response_headers.update(validator_headers(etag, last_modified))
+    return Response(status_code=304, headers=response_headers)
@@ -0,0 +1,240 @@
+"""
+Decomposition of a problem into independent subproblems.
+
+Many submissions are several disconnected problems in one file, e.g.
+departments that share no rooms, instructors or group constraints. Classes are
+linked when they can use the same room (rooms without a room constraint do not
+count), have the same instructor, belong to the same offering or parent class,
+appear in the same group constraint or are taken by the same student; the
+connected components of that graph can be solved separately without changing
+the problem. Components are packed into at most DECOMPOSE_MAX_PARTS parts of
+similar size, each written as a problem XML of its own, and the solutions of
+the parts are merged back into one solution.xml.
+"""
+
+import os
+import logging
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+from .portfolio import read_solution_info
+from .progress import summarize_info
+
+# Decomposition defaults, configurable through the environment
+DECOMPOSE_PROBLEMS = os.environ.get("SOLVER_DECOMPOSE", "false").lower() in ("1", "true", "yes")
+DECOMPOSE_MAX_PARTS = int(os.environ.get("DECOMPOSE_MAX_PARTS", str(os.cpu_count() or 1)))
+
+# Sections whose children are split between the parts; any other section is copied into every part
+_SPLIT_SECTIONS = ("rooms", "classes", "groupConstraints", "students")
+
+logger = logging.getLogger("decomposition")
+
+
+class _DisjointSet:
+    """Union-find over hashable nodes."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, node):
+        parent = self.parent
+        root = parent.setdefault(node, node)
+        while root != parent[root]:
+            root = parent[root]
+        while node != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def union(self, a, b) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def find_components(root: ET.Element) -> List[List[str]]:
+    """
+    Split the classes of a problem into groups that share no resources or constraints.
+
+    Args:
+        root: Root element of a problem XML
+
+    Returns:
+        Lists of class IDs, one per connected component, in document order
+    """
+    unconstrained_rooms = {
+        room.get("id") for room in root.iterfind("rooms/room") if room.get("constraint") == "false"
+    }
+    links = _DisjointSet()
+    class_ids = []
+    for class_elem in root.iterfind("classes/class"):
+        node = ("class", class_elem.get("id"))
+        class_ids.append(node[1])
+        links.find(node)
+        if class_elem.get("offering"):
+            links.union(node, ("offering", class_elem.get("offering")))
+        if class_elem.get("parent"):
+            links.union(node, ("class", class_elem.get("parent")))
+        for child in class_elem:
+            if child.tag == "room" and child.get("id") not in unconstrained_rooms:
+                links.union(node, ("room", child.get("id")))
+            elif child.tag == "instructor":
+                links.union(node, ("instructor", child.get("id")))
+    for constraint in root.iterfind("groupConstraints/constraint"):
+        members = [("class", c.get("id")) for c in constraint.iterfind("class")]
+        for member in members[1:]:
+            links.union(members[0], member)
+    for student in root.iterfind("students/student"):
+        members = [(child.tag, child.get("id")) for child in student if child.tag in ("class", "offering")]
+        for member in members[1:]:
+            links.union(members[0], member)
+
+    components: Dict[object, List[str]] = {}
+    for class_id in class_ids:
+        components.setdefault(links.find(("class", class_id)), []).append(class_id)
+    return list(components.values())
+
+
+def pack_components(components: List[List[str]], max_parts: int = DECOMPOSE_MAX_PARTS) -> List[List[str]]:
+    """
+    Pack components into at most max_parts parts of similar size (largest component first).
+
+    A problem with hundreds of isolated classes would otherwise start hundreds of solvers.
+    """
+    parts = [[] for _ in range(max(1, min(max_parts, len(components))))]
+    for component in sorted(components, key=len, reverse=True):
+        min(parts, key=len).extend(component)
+    return [part for part in parts if part]
+
+
+def write_parts(root: ET.Element, parts: List[List[str]], paths: List[str]) -> List[ET.Element]:
+    """
+    Write one problem XML per part.
+
+    Each part gets its classes, the rooms they can use, and the group constraints
+    and students that refer to them; any other section is copied into every part.
+
+    Args:
+        root: Root element of the whole problem
+        parts: Class IDs of each part (see pack_components)
+        paths: Output file of each part
+
+    Returns:
+        Root element of each part (sharing its child elements with root)
+    """
+    part_of = {class_id: i for i, part in enumerate(parts) for class_id in part}
+    offering_part = {}
+    room_parts: Dict[str, set] = {}
+    for class_elem in root.iterfind("classes/class"):
+        i = part_of[class_elem.get("id")]
+        offering_part.setdefault(class_elem.get("offering"), i)
+        for room in class_elem.iterfind("room"):
+            room_parts.setdefault(room.get("id"), set()).add(i)
+
+    roots = [ET.Element(root.tag, root.attrib) for _ in parts]
+    for part_root in roots:
+        part_root.text = root.text
+    for section in root:
+        copies = []
+        for part_root in roots:
+            copy = ET.SubElement(part_root, section.tag, section.attrib)
+            copy.text, copy.tail = section.text, section.tail
+            copies.append(copy)
+        if section.tag not in _SPLIT_SECTIONS:
+            for copy in copies:
+                copy.extend(list(section))
+            continue
+        for child in section:
+            if section.tag == "rooms":
+                targets = room_parts.get(child.get("id"), ())
+            elif section.tag == "classes":
+                targets = (part_of[child.get("id")],)
+            else:
+                member = child.find("class")
+                if member is not None:
+                    targets = (part_of.get(member.get("id")),)
+                else:
+                    member = child.find("offering")
+                    targets = (offering_part.get(member.get("id")) if member is not None else None,)
+            for i in targets:
+                if i is not None:
+                    copies[i].append(child)
+
+    for part_root, path in zip(roots, paths):
+        ET.ElementTree(part_root).write(path, encoding="utf-8", xml_declaration=True)
+    return roots
+
+
+def _merged_info(solution_paths: List[str]) -> str:
+    """Solution Info comment of a merged solution: the totals of its parts."""
+    assigned = total = 0
+    value = time_min = 0.0
+    for path in solution_paths:
+        summary = summarize_info(read_solution_info(path) or {})
+        assigned += summary.get("assigned_variables", 0)
+        total += summary.get("total_variables", 0)
+        value += summary.get("overall_solution_value") or 0.0
+        time_min = max(time_min, summary.get("time_min") or 0.0)
+    percent = 100.0 * assigned / total if total else 0.0
+    return (
+        "<!--Solution Info:\n"
+        f"    Assigned variables: {percent:.2f}% ({assigned}/{total})\n"
+        f"    Overall solution value: {value:.2f}\n"
+        f"    Time: {time_min:.2f} min\n"
+        f"    Components: {len(solution_paths)}\n"
+        "-->\n"
+    )
+
+
+def merge_solutions(solution_paths: List[str], output_path: str) -> None:
+    """
+    Merge the solutions of the parts of a problem into one solution.xml.
+
+    Rooms used by several parts (rooms without a room constraint) are written once;
+    sections that every part received a copy of are taken from the first part.
+
+    Args:
+        solution_paths: solution.xml of each part, in part order
+        output_path: Where to write the merged solution
+    """
+    merged: Optional[ET.Element] = None
+    sections: Dict[str, ET.Element] = {}
+    room_ids = set()
+    for path in solution_paths:
+        root = ET.parse(path).getroot()
+        if merged is None:
+            merged = ET.Element(root.tag, root.attrib)
+            merged.text = root.text
+        for section in root:
+            target = sections.get(section.tag)
+            if target is None:
+                target = ET.SubElement(merged, section.tag, section.attrib)
+                target.text, target.tail = section.text, section.tail
+                sections[section.tag] = target
+            elif section.tag not in _SPLIT_SECTIONS:
+                continue
+            for child in section:
+                if section.tag == "rooms":
+                    if child.get("id") in room_ids:
+                        continue
+                    room_ids.add(child.get("id"))
+                target.append(child)
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(_merged_info(solution_paths))
+        ET.ElementTree(merged).write(f, encoding="unicode")
+    os.replace(tmp_path, output_path)
+
+
+def merge_logs(log_paths: List[str], output_path: str) -> None:
+    """Concatenate the debug.log files of the parts, each under a header line."""
+    with open(output_path, 'wb') as out:
+        for i, path in enumerate(log_paths, 1):
+            out.write(f"==== Component {i} ====\n".encode())
+            try:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        out.write(chunk)
+            except OSError:
+                continue
@@ -0,0 +1,340 @@
+"""
+Problem size metrics and solve time / memory predictions.
+
+cpsolver reports the size of a problem (number of classes, average domain size,
+...) in info.csv, but only once the solve has finished. The same figures are
+read here from the problem XML before it is queued. Every completed solve adds
+its metrics, wall-clock run time, iterations and speed (from stat.csv) and
+memory usage to a history file, and a new problem is predicted from the
+ESTIMATOR_NEIGHBOURS past solves closest to it in model size (values, i.e. time
+and room combinations, plus constraint pairs and student enrollments):
+
+- iterations are scaled with the number of classes and speed (it/s) inversely
+  with the model size; a solve ends at the time limit at the latest, and one
+  that does not stop when complete always runs until it
+- memory above a fixed baseline is scaled with the model size
+
+Without comparable history the time limit and default memory coefficients are
+used. The predicted solve time orders the solver queue (see job_scheduler). Once
+past solves of similar size have reported their memory, the predicted memory
+sets the heap (-Xmx) of the solver JVM, between SOLVER_MIN_HEAP (by default
+SOLVER_MAX_HEAP, so sizing never gives a solve less than the fixed heap) and
+SOLVER_HEAP_LIMIT; until then the solver keeps SOLVER_MAX_HEAP.
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+import statistics
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .solver_engine import read_config_properties, SOLVER_MAX_HEAP
+
+# History and heap sizing settings, configurable through the environment
+SOLVE_HISTORY_FILE = os.environ.get("SOLVE_HISTORY_FILE")  # defaults to <cpsolver>/solve_history.jsonl
+SOLVE_HISTORY_SIZE = int(os.environ.get("SOLVE_HISTORY_SIZE", "500"))
+ESTIMATOR_NEIGHBOURS = int(os.environ.get("ESTIMATOR_NEIGHBOURS", "5"))
+SOLVER_HEAP_SIZING = os.environ.get("SOLVER_HEAP_SIZING", "true").lower() in ("1", "true", "yes")
+SOLVER_MIN_HEAP = os.environ.get("SOLVER_MIN_HEAP", SOLVER_MAX_HEAP)
+SOLVER_HEAP_LIMIT = os.environ.get("SOLVER_HEAP_LIMIT", "4g")
+SOLVER_HEAP_HEADROOM = float(os.environ.get("SOLVER_HEAP_HEADROOM", "2.0"))
+
+# Used until there is history: JVM and cpsolver baseline, memory per unit of model size,
+# and seconds spent outside the search (JVM start, loading and saving)
+_BASE_MEMORY_MB = 64.0
+_DEFAULT_MB_PER_UNIT = 0.0005
+_DEFAULT_OVERHEAD_SECONDS = 5.0
+
+# The heap is rounded up to a multiple of this many MB
+_HEAP_STEP_MB = 64
+
+# stat.csv keeps one line per progress report; only the header and the last line are read
+_STAT_TAIL_BYTES = 4096
+
+_HEAP_UNITS_MB = {"k": 1 / 1024, "m": 1, "g": 1024, "t": 1024 * 1024}
+
+logger = logging.getLogger("estimator")
+
+
+def heap_mb(value: str) -> float:
+    """Size of a JVM heap setting such as "512m" or "4g", in MB."""
+    value = value.strip().lower()
+    if value and value[-1] in _HEAP_UNITS_MB:
+        return float(value[:-1]) * _HEAP_UNITS_MB[value[-1]]
+    return float(value) / (1024 * 1024)
+
+
+def problem_metrics(root: ET.Element) -> Dict:
+    """
+    Measure the size of a problem, with the figures cpsolver writes to info.csv after a solve.
+
+    Times and rooms with a prohibited preference ("P") are not counted.
+
+    Args:
+        root: Root element of a problem XML
+
+    Returns:
+        Dictionary with classes (<class> elements, i.e. meetings of a JSON problem), offerings,
+        rooms, instructors, students, student_enrollments, group_constraints, constraint_pairs,
+        avg_times, avg_rooms, avg_domain_size (time and room combinations per class),
+        classes_with_single_value, max_instructor_load, avg_instructor_load and model_size
+    """
+    classes = times = rooms = values = single_value = 0
+    offerings = set()
+    instructor_load: Dict[str, int] = {}
+    for class_elem in root.iterfind("classes/class"):
+        classes += 1
+        offerings.add(class_elem.get("offering"))
+        class_times = class_rooms = 0
+        for child in class_elem:
+            if child.get("pref") == "P":
+                continue
+            if child.tag == "time":
+                class_times += 1
+            elif child.tag == "room":
+                class_rooms += 1
+            elif child.tag == "instructor":
+                instructor_load[child.get("id")] = instructor_load.get(child.get("id"), 0) + 1
+        # As in TimetableXMLLoader: one room unless the class lists none
+        default_rooms = "1" if class_elem.find("room") is not None else "0"
+        needs_room = int(class_elem.get("nrRooms", default_rooms) or default_rooms) > 0
+        class_values = class_times * (class_rooms if needs_room else 1)
+        times += class_times
+        rooms += class_rooms
+        values += class_values
+        single_value += class_values == 1
+
+    group_constraints = constraint_pairs = 0
+    for constraint in root.iterfind("groupConstraints/constraint"):
+        members = sum(1 for _ in constraint.iterfind("class"))
+        group_constraints += 1
+        constraint_pairs += members * (members - 1) // 2
+
+    students = enrollments = 0
+    for student in root.iterfind("students/student"):
+        students += 1
+        enrollments += sum(1 for child in student if child.tag in ("class", "offering"))
+
+    return {
+        "classes": classes,
+        "offerings": len(offerings),
+        "rooms": sum(1 for _ in root.iterfind("rooms/room")),
+        "instructors": len(instructor_load),
+        "students": students,
+        "student_enrollments": enrollments,
+        "group_constraints": group_constraints,
+        "constraint_pairs": constraint_pairs,
+        "avg_times": round(times / classes, 2) if classes else 0.0,
+        "avg_rooms": round(rooms / classes, 2) if classes else 0.0,
+        "avg_domain_size": round(values / classes, 2) if classes else 0.0,
+        "classes_with_single_value": single_value,
+        "max_instructor_load": max(instructor_load.values(), default=0),
+        "avg_instructor_load": round(sum(instructor_load.values()) / len(instructor_load), 2) if instructor_load else 0.0,
+        "model_size": values + constraint_pairs + enrollments
+    }
+
+
+def solve_termination(config_path: str, overrides: Optional[Dict[str, str]] = None) -> Tuple[float, bool]:
+    """
+    Time limit (seconds) and stop-when-complete setting of a solve: its overrides, else config.cfg.
+    """
+    properties = read_config_properties(config_path)
+    properties.update(overrides or {})
+    try:
+        time_limit = float(properties.get("Termination.TimeOut", "1800"))
+    except ValueError:
+        time_limit = 1800.0
+    return time_limit, properties.get("Termination.StopWhenComplete", "false").lower() == "true"
+
+
+def read_solver_stats(stat_path: str) -> Dict:
+    """
+    Read the last line of a solve's stat.csv.
+
+    Returns:
+        Dictionary with iterations, speed (it/s) and time_min, each present only
+        when the file reports it
+    """
+    try:
+        with open(stat_path, 'rb') as f:
+            header = f.readline().decode("utf-8", errors="replace").strip().split(";")
+            header_end = f.tell()
+            f.seek(0, os.SEEK_END)
+            f.seek(max(header_end, f.tell() - _STAT_TAIL_BYTES))
+            lines = [line for line in f.read().decode("utf-8", errors="replace").splitlines() if line.strip()]
+    except OSError:
+        return {}
+    if not lines:
+        return {}
+    row = dict(zip(header, lines[-1].strip().split(";")))
+    stats = {}
+    for column, key, convert in (("Iter", "iterations", int), ("Speed[it/s]", "speed", float),
+                                 ("Time[min]", "time_min", float)):
+        try:
+            stats[key] = convert(row[column])
+        except (KeyError, ValueError):
+            continue
+    return stats
+
+
+class SolveHistory:
+    """Metrics and outcomes of completed solves, kept in a JSON-lines file."""
+
+    def __init__(self, path: str, max_entries: int = SOLVE_HISTORY_SIZE):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._entries = deque(maxlen=self.max_entries)
+        self._lines = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._lines += 1
+                    try:
+                        self._entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            return
+        logger.info(f"Loaded {len(self._entries)} past solve(s) from {self.path}")
+
+    def record(self, metrics: Dict, runtime_seconds: float, stats: Dict, memory_mb: Optional[float],
+               time_limit: float, stop_when_complete: bool) -> None:
+        """
+        Add a completed solve to the history.
+
+        Args:
+            metrics: Result of problem_metrics for the problem
+            runtime_seconds: Wall-clock time the solver ran
+            stats: Result of read_solver_stats for the solve
+            memory_mb: Memory usage reported in the solution info, if any
+            time_limit: Time limit of the solve, in seconds
+            stop_when_complete: Whether the solve could stop before the time limit
+        """
+        entry = {
+            "metrics": metrics,
+            "runtime_seconds": round(runtime_seconds, 2),
+            "iterations": stats.get("iterations"),
+            "speed": stats.get("speed"),
+            "memory_mb": memory_mb,
+            "time_limit": time_limit,
+            "stop_when_complete": stop_when_complete,
+            # A solve stopped by its time limit only gives a lower bound on the iterations needed
+            "hit_time_limit": stats.get("time_min", 0.0) * 60 >= 0.99 * time_limit,
+            "completed_at": datetime.now().isoformat()
+        }
+        with self._lock:
+            self._entries.append(entry)
+            try:
+                if self._lines >= 2 * self.max_entries:
+                    # Rewrite the file with the entries still kept, so it does not grow without bound
+                    tmp_path = f"{self.path}.tmp"
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        for kept in self._entries:
+                            f.write(json.dumps(kept) + "\n")
+                    os.replace(tmp_path, self.path)
+                    self._lines = len(self._entries)
+                else:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(entry) + "\n")
+                    self._lines += 1
+            except OSError as e:
+                logger.warning(f"Could not write solve history: {e}")
+
+    def _nearest(self, size: float, usable) -> List[Dict]:
+        with self._lock:
+            candidates = [entry for entry in self._entries if usable(entry)]
+        log_size = math.log(max(size, 1))
+        candidates.sort(key=lambda entry: abs(math.log(max(entry["metrics"].get("model_size", 1), 1)) - log_size))
+        return candidates[:max(1, ESTIMATOR_NEIGHBOURS)]
+
+    def predict(self, metrics: Dict, time_limit: float, stop_when_complete: bool) -> Dict:
+        """
+        Predict the solve time and memory of a problem.
+
+        Args:
+            metrics: Result of problem_metrics for the problem
+            time_limit: Time limit of the solve, in seconds
+            stop_when_complete: Whether the solve stops as soon as every class is assigned
+
+        Returns:
+            Dictionary with the metrics, predicted_seconds, predicted_memory_mb, heap (the -Xmx
+            setting, or None when SOLVER_HEAP_SIZING is off or no similar solve has reported
+            its memory yet), time_limit, stop_when_complete and basis (what the prediction
+            was made from)
+        """
+        size = max(metrics["model_size"], 1)
+
+        timed = self._nearest(size, lambda e: e.get("iterations") and e.get("speed")
+                              and e["metrics"].get("classes") and e["metrics"].get("model_size"))
+        overheads = [max(0.0, e["runtime_seconds"] - e["iterations"] / e["speed"]) for e in timed]
+        overhead = statistics.median(overheads) if overheads else _DEFAULT_OVERHEAD_SECONDS
+        complete = [e for e in timed if not e["hit_time_limit"]]
+        if stop_when_complete and complete:
+            iterations = statistics.median(e["iterations"] / e["metrics"]["classes"] for e in complete) * metrics["classes"]
+            speed = statistics.median(e["speed"] * e["metrics"]["model_size"] / size for e in complete)
+            search_seconds = min(iterations / speed, time_limit)
+            basis = f"{len(complete)} similar past solve(s)"
+        else:
+            search_seconds = time_limit
+            basis = "time limit" if not stop_when_complete else "time limit (no similar past solves yet)"
+
+        measured = self._nearest(size, lambda e: e.get("memory_mb") and e["metrics"].get("model_size"))
+        if measured:
+            mb_per_unit = statistics.median(max(0.0, e["memory_mb"] - _BASE_MEMORY_MB) / e["metrics"]["model_size"]
+                                            for e in measured)
+        else:
+            mb_per_unit = _DEFAULT_MB_PER_UNIT
+        memory_mb = _BASE_MEMORY_MB + mb_per_unit * size
+
+        return {
+            "metrics": metrics,
+            "predicted_seconds": round(overhead + search_seconds, 1),
+            "predicted_memory_mb": round(memory_mb, 1),
+            "heap": heap_setting(memory_mb) if SOLVER_HEAP_SIZING and measured else None,
+            "time_limit": time_limit,
+            "stop_when_complete": stop_when_complete,
+            "basis": basis
+        }
+
+
+def heap_setting(memory_mb: float) -> str:
+    """
+    -Xmx setting for a solve expected to use memory_mb.
+
+    SOLVER_HEAP_HEADROOM times the prediction, rounded up to a multiple of 64 MB and
+    kept between SOLVER_MIN_HEAP and SOLVER_HEAP_LIMIT.
+    """
+    wanted = math.ceil(memory_mb * SOLVER_HEAP_HEADROOM / _HEAP_STEP_MB) * _HEAP_STEP_MB
+    return f"{int(max(heap_mb(SOLVER_MIN_HEAP), min(wanted, heap_mb(SOLVER_HEAP_LIMIT))))}m"
+
+
+_histories: Dict[str, SolveHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_solve_history(cpsolver_path: str) -> SolveHistory:
+    """
+    Get the process-wide solve history of a cpsolver directory.
+
+    Args:
+        cpsolver_path: Absolute path to the cpsolver directory
+
+    Returns:
+        The SolveHistory, stored in SOLVE_HISTORY_FILE or <cpsolver_path>/solve_history.jsonl
+    """
+    path = os.path.abspath(SOLVE_HISTORY_FILE or os.path.join(cpsolver_path, "solve_history.jsonl"))
+    with _histories_lock:
+        history = _histories.get(path)
+        if history is None:
+            history = SolveHistory(path)
+            _histories[path] = history
+        return history
@@ -0,0 +1,315 @@
+"""
+Pre-solve feasibility check of a problem XML.
+
+Some problems cannot be solved at all, and cpsolver only gives up on them when
+its time limit runs out: a class too large for every room (the JSON converter
+only offers rooms with capacity >= classLimit), a class whose instructor is
+never available (no <time> elements), or a set of classes that must not overlap
+but do not fit into the times open to them. This module finds those cases in
+one pass over the parsed XML, in milliseconds, before a solver slot is used.
+
+Classes that must not overlap are checked by counting time: the (day, slot)
+cells a class occupies are disjoint from those of the other classes of the set,
+so the set needs at least the sum of each class's shortest placement, and all
+of it must lie within the cells covered by their time preferences. The sets
+checked are the classes of an instructor, the classes whose only room is the
+same room, required DIFF_TIME constraints, and cliques of pairwise required
+DIFF_TIME constraints (how mutually exclusive classes are usually written).
+Sets whose classes run on different weeks (date patterns) are skipped, as their
+meetings may share a slot. Every check is a necessary condition only: a problem
+that passes can still turn out to have no complete solution.
+"""
+
+import os
+import time
+import logging
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+# Feasibility check settings, configurable through the environment
+FEASIBILITY_CHECK = os.environ.get("FEASIBILITY_CHECK", "true").lower() in ("1", "true", "yes")
+FEASIBILITY_MAX_ISSUES = int(os.environ.get("FEASIBILITY_MAX_ISSUES", "50"))
+
+# Classes listed by name in a message, before "and N more"
+_MAX_LISTED = 5
+
+logger = logging.getLogger("feasibility")
+
+
+class _Class:
+    """Domain of a class, as read from its <class> element."""
+
+    __slots__ = ("id", "limit", "nr_rooms", "rooms", "instructors", "cells", "min_cells", "dates", "times")
+
+    def __init__(self, elem: ET.Element, slots_per_day: int, cell_masks: Dict):
+        self.id = elem.get("id")
+        self.limit = elem.get("classLimit")
+        # As in TimetableXMLLoader: one room unless the class lists none
+        default_rooms = "1" if elem.find("room") is not None else "0"
+        self.nr_rooms = int(elem.get("nrRooms", default_rooms) or default_rooms)
+        self.rooms = []
+        self.instructors = []
+        self.cells = 0
+        self.min_cells = None
+        self.times = 0
+        # A <time> runs on the <date> of the class its date attribute names, or on the class's dates
+        date_ids = {child.get("id"): child.get("pattern") for child in elem.iterfind("date")}
+        class_dates = elem.get("dates") or elem.get("datePattern")
+        date_patterns = set()
+        for child in elem:
+            if child.get("pref") == "P":
+                continue
+            if child.tag == "room":
+                self.rooms.append(child.get("id"))
+            elif child.tag == "instructor":
+                self.instructors.append(child.get("id"))
+            elif child.tag == "time":
+                self.times += 1
+                key = (child.get("days", ""), child.get("start", "0"), child.get("length", "0"))
+                placement = cell_masks.get(key)
+                if placement is None:
+                    placement = cell_masks[key] = _placement_cells(key, slots_per_day)
+                self.cells |= placement[0]
+                if self.min_cells is None or placement[1] < self.min_cells:
+                    self.min_cells = placement[1]
+                date_id = child.get("date")
+                date_patterns.add(date_ids.get(date_id) if date_id is not None else class_dates)
+        if not self.times:
+            date_patterns.add(class_dates)
+        # Only classes on a single known date pattern are known to clash whenever their times overlap
+        self.dates = date_patterns.pop() if len(date_patterns) == 1 else None
+
+
+def _placement_cells(key, slots_per_day: int):
+    """(bit mask of the (day, slot) cells, number of cells) of a time placement."""
+    days, start, length = key
+    try:
+        start, length = int(start), int(length)
+    except ValueError:
+        return 0, 0
+    run = ((1 << length) - 1) << start
+    mask = 0
+    count = 0
+    for day, flag in enumerate(days):
+        if flag == "1":
+            mask |= run << (day * slots_per_day)
+            count += length
+    return mask, count
+
+
+def _greedy_cliques(edges: Dict[str, set]) -> List[List[str]]:
+    """
+    Maximal cliques of three or more classes in a graph of pairwise constraints.
+
+    Each class starts a clique that grows with its neighbours in order of degree,
+    which finds the cliques that mutually exclusive groups written as pairs form;
+    it is a heuristic, not an exhaustive search.
+    """
+    cliques = []
+    seen = set()
+    for class_id in sorted(edges, key=lambda c: -len(edges[c])):
+        clique = [class_id]
+        candidates = set(edges[class_id])
+        for neighbour in sorted(edges[class_id], key=lambda c: -len(edges[c])):
+            if neighbour in candidates:
+                clique.append(neighbour)
+                candidates &= edges[neighbour]
+        key = frozenset(clique)
+        if len(clique) >= 3 and key not in seen:
+            seen.add(key)
+            cliques.append(clique)
+    return cliques
+
+
+class _Report:
+    """Issues found so far, with the names used in messages."""
+
+    def __init__(self, labels: Optional[Dict[str, Dict[str, str]]], minutes_per_slot: float):
+        self.labels = labels or {}
+        self.minutes_per_slot = minutes_per_slot
+        self.issues = []
+        # Classes of each set reported so far; subsets of a reported set add nothing
+        self.reported_sets = []
+
+    def label(self, kind: str, item_id: str) -> str:
+        name = self.labels.get(kind, {}).get(item_id)
+        return name if name is not None else f"{kind} {item_id}"
+
+    def name(self, kind: str, item_id: str) -> str:
+        """Name of an item, or its bare ID; for messages that already say what kind it is."""
+        return self.labels.get(kind, {}).get(item_id, item_id)
+
+    def class_list(self, class_ids: List[str]) -> str:
+        listed = ", ".join(self.label("class", c) for c in class_ids[:_MAX_LISTED])
+        more = len(class_ids) - _MAX_LISTED
+        return f"{listed} and {more} more" if more > 0 else listed
+
+    def minutes(self, cells: int) -> int:
+        return round(cells * self.minutes_per_slot)
+
+    def add(self, issue_type: str, class_ids: List[str], message: str, **figures) -> None:
+        issue = {"type": issue_type, "classes": class_ids, "message": message}
+        issue.update(figures)
+        self.issues.append(issue)
+
+
+def _check_set(report: _Report, classes: Dict[str, _Class], class_ids: List[str], issue_type: str,
+               describe) -> None:
+    """Check that classes that must not overlap fit into the times open to them."""
+    members = [classes[c] for c in class_ids if c in classes]
+    if len(members) < 2 or any(m.dates is None or m.dates != members[0].dates for m in members):
+        return
+    member_ids = {m.id for m in members}
+    if any(member_ids <= reported for reported in report.reported_sets):
+        return
+    needed = covered = 0
+    for member in members:
+        needed += member.min_cells or 0
+        covered |= member.cells
+    available = covered.bit_count()
+    if needed > available:
+        needed_min, available_min = report.minutes(needed), report.minutes(available)
+        report.add(issue_type, [m.id for m in members], describe(needed_min, available_min),
+                   required_minutes=needed_min, available_minutes=available_min)
+        report.reported_sets.append(member_ids)
+
+
+def invalid_xml_report(error: ET.ParseError, elapsed_ms: float = 0.0) -> Dict:
+    """Feasibility report of a problem XML that cannot be parsed."""
+    return {
+        "feasible": False,
+        "message": f"Problem is infeasible: the XML is not well-formed ({error})",
+        "issues": [{"type": "invalid_xml", "classes": [], "message": f"The XML is not well-formed ({error})"}],
+        "issue_count": 1,
+        "classes": 0,
+        "elapsed_ms": elapsed_ms
+    }
+
+
+def check_feasibility(source, labels: Optional[Dict[str, Dict[str, str]]] = None) -> Dict:
+    """
+    Check a problem XML for classes and sets of classes that cannot be placed.
+
+    Args:
+        source: Path or file object of the problem XML, or its parsed root element
+        labels: Optional names for the messages, as {"class"|"instructor"|"room": {ID: name}}
+            (see converter_labels); IDs are used where no name is given
+
+    Returns:
+        Dictionary with feasible, message, issues (at most FEASIBILITY_MAX_ISSUES, each with
+        type, classes, message and, for sets of classes, required_minutes and
+        available_minutes), issue_count, classes and elapsed_ms
+    """
+    started = time.perf_counter()
+    room_capacity = {}
+    room_constraint = {}
+    classes: Dict[str, _Class] = {}
+    diff_time_sets = []
+    pair_edges: Dict[str, set] = {}
+    shared_rooms = set()
+    cell_masks = {}
+
+    if isinstance(source, ET.Element):
+        root = source
+    else:
+        try:
+            root = ET.parse(source).getroot()
+        except ET.ParseError as e:
+            return invalid_xml_report(e, round((time.perf_counter() - started) * 1000, 1))
+    slots_per_day = int(root.get("slotsPerDay", "288") or 288)
+    for room in root.iterfind("rooms/room"):
+        room_capacity[room.get("id")] = int(room.get("capacity") or 0)
+        room_constraint[room.get("id")] = room.get("constraint", "true") != "false"
+    for class_elem in root.iterfind("classes/class"):
+        record = _Class(class_elem, slots_per_day, cell_masks)
+        classes[record.id] = record
+    for constraint in root.iterfind("groupConstraints/constraint"):
+        members = [c.get("id") for c in constraint.iterfind("class")]
+        if constraint.get("type") == "DIFF_TIME" and constraint.get("pref") == "R":
+            if len(members) == 2:
+                a, b = members
+                pair_edges.setdefault(a, set()).add(b)
+                pair_edges.setdefault(b, set()).add(a)
+            diff_time_sets.append(members)
+        elif constraint.get("type") == "CAN_SHARE_ROOM":
+            shared_rooms.update(members)
+
+    report = _Report(labels, 24 * 60 / slots_per_day)
+    largest_room = max(room_capacity.values(), default=0)
+    by_instructor: Dict[str, List[str]] = {}
+    by_only_room: Dict[str, List[str]] = {}
+    for record in classes.values():
+        name = report.label("class", record.id)
+        if record.nr_rooms > 0 and not record.rooms:
+            if room_capacity and record.limit and record.limit.isdigit() and int(record.limit) > largest_room:
+                message = (f"{name} needs a room for {record.limit} students, "
+                           f"but the largest room holds {largest_room}")
+            else:
+                message = f"{name} has no room it can use"
+            report.add("no_rooms", [record.id], message)
+        if not record.times:
+            if record.instructors:
+                instructors = ", ".join(report.label("instructor", i) for i in record.instructors)
+                message = f"{name} has no available time (taught by {instructors})"
+            else:
+                message = f"{name} has no available time"
+            report.add("no_times", [record.id], message)
+        for instructor_id in record.instructors:
+            by_instructor.setdefault(instructor_id, []).append(record.id)
+        if record.nr_rooms == 1 and len(record.rooms) == 1 and record.id not in shared_rooms \
+                and room_constraint.get(record.rooms[0], True):
+            by_only_room.setdefault(record.rooms[0], []).append(record.id)
+
+    for instructor_id, class_ids in by_instructor.items():
+        instructor = report.name("instructor", instructor_id)
+        _check_set(report, classes, class_ids, "instructor_overloaded",
+                   lambda needed, available: (f"Instructor {instructor} teaches {len(class_ids)} classes "
+                                              f"needing {needed} minutes, but is available for only "
+                                              f"{available} minutes"))
+    for room_id, class_ids in by_only_room.items():
+        room = report.name("room", room_id)
+        _check_set(report, classes, class_ids, "room_overloaded",
+                   lambda needed, available: (f"Room {room} is the only room of {len(class_ids)} classes "
+                                              f"needing {needed} minutes, but their times cover only "
+                                              f"{available} minutes"))
+    for class_ids in diff_time_sets + _greedy_cliques(pair_edges):
+        listed = report.class_list(class_ids)
+        _check_set(report, classes, class_ids, "diff_time_overloaded",
+                   lambda needed, available: (f"{len(class_ids)} classes that must be at different times "
+                                              f"({listed}) need {needed} minutes, but their times cover "
+                                              f"only {available} minutes"))
+
+    issue_count = len(report.issues)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if issue_count:
+        message = f"Problem is infeasible: {report.issues[0]['message']}"
+        if issue_count > 1:
+            message += f" (and {issue_count - 1} more issue{'s' if issue_count > 2 else ''})"
+    else:
+        message = f"No feasibility issues found in {len(classes)} classes"
+    logger.info(f"Checked {len(classes)} classes in {elapsed_ms} ms: {issue_count} issue(s)")
+    return {
+        "feasible": issue_count == 0,
+        "message": message,
+        "issues": report.issues[:FEASIBILITY_MAX_ISSUES],
+        "issue_count": issue_count,
+        "classes": len(classes),
+        "elapsed_ms": elapsed_ms
+    }
+
+
+def converter_labels(converter) -> Dict[str, Dict[str, str]]:
+    """
+    Names of the classes, instructors and rooms of a converted JSON problem, for check_feasibility.
+
+    Args:
+        converter: JSONtoXMLConverter that has written the problem
+    """
+    classes = {}
+    for class_id, (class_name, meeting) in converter.meeting_keys().items():
+        classes[str(class_id)] = class_name if meeting == 0 else f"{class_name} (meeting {meeting + 1})"
+    return {
+        "class": classes,
+        "instructor": {str(i): name for name, i in converter.instructor_name_to_id.items()},
+        "room": {str(i): name for i, name in converter.room_names().items()}
+    }
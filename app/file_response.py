@@ -0,0 +1,201 @@
+"""
+File responses with byte range and precompressed variant support.
+
+Starlette's FileResponse streams a file from disk in chunks (the file is never
+loaded into memory, and reads run in worker threads) and sets Content-Length,
+but it does not answer Range requests. file_response() adds single byte ranges
+(206 Partial Content / 416 Range Not Satisfiable) and serves a precompressed
+.gz variant when the client accepts gzip. Conditional requests (If-None-Match,
+If-Modified-Since, If-Range) are answered from the file's mtime and size.
+"""
+
+import os
+import gzip
+import shutil
+import logging
+import threading
+from typing import Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+from .conditional import stat_etag, etag_matches, is_not_modified, not_modified_response
+
+logger = logging.getLogger("file_response")
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header lies entirely outside the file."""
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header for a single byte range.
+
+    Args:
+        range_header: Value of the Range header, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-512"
+        size: Size of the file in bytes
+
+    Returns:
+        Tuple of (first byte, last byte), inclusive, or None when the whole file
+        should be sent (no header, a malformed header or several ranges)
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the end of the file
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable(range_header)
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse that sends only the bytes start..end (inclusive) with status 206."""
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                # The file shrank while it was being sent
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether the client accepts a gzip Content-Encoding."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*") and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+
+def precompressed_path(path: str, create: bool = False) -> Optional[str]:
+    """
+    Get the .gz variant of a file if it is up to date.
+
+    The variant carries the mtime of the file it was compressed from, so a
+    rewritten file is never answered with a stale variant.
+
+    Args:
+        path: Path of the original file
+        create: Compress the file when there is no up-to-date variant (blocking)
+
+    Returns:
+        Path of the .gz file, or None
+    """
+    gz_path = f"{path}.gz"
+    try:
+        st = os.stat(path)
+        if os.stat(gz_path).st_mtime_ns == st.st_mtime_ns:
+            return gz_path
+    except OSError:
+        pass
+    if not create:
+        return None
+    tmp_path = f"{gz_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_path, gz_path)
+        return gz_path
+    except OSError as e:
+        logger.warning(f"Could not precompress {path}: {e}")
+        return None
+
+
+def file_response(request: Request, path: str, media_type: str, gz_path: Optional[str] = None) -> Response:
+    """
+    Build a response that streams a file from disk.
+    
+    The ETag is derived from the mtime and size of the file that is sent, so
+    the gzip variant has its own tag. A matching If-None-Match or
+    If-Modified-Since gives 304, and a Range whose If-Range no longer matches
+    gets the whole file.
+
+    Args:
+        request: The incoming request (Range and Accept-Encoding headers are used)
+        path: Path of the file
+        media_type: Content type of the file
+        gz_path: Optional gzip-compressed variant, sent when the client accepts gzip
+            and did not ask for a byte range
+
+    Returns:
+        A 200 FileResponse, a 206 RangeFileResponse, a 304 or a 416 Response
+    """
+    headers = {"accept-ranges": "bytes", "vary": "Accept-Encoding"}
+    range_header = request.headers.get("range")
+
+    if gz_path and not range_header and accepts_gzip(request):
+        stat_result = os.stat(gz_path)
+        etag = stat_etag(stat_result, "gz")
+        if is_not_modified(request, etag, stat_result.st_mtime):
+            return not_modified_response(etag, stat_result.st_mtime, headers)
+        headers["content-encoding"] = "gzip"
+        headers["etag"] = etag
+        return FileResponse(gz_path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+    stat_result = os.stat(path)
+    etag = stat_etag(stat_result)
+    if is_not_modified(request, etag, stat_result.st_mtime):
+        return not_modified_response(etag, stat_result.st_mtime, headers)
+    headers["etag"] = etag
+
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and not etag_matches(if_range, etag):
+        # The client's partial copy is out of date: send the whole file
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, stat_result.st_size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={"content-range": f"bytes */{stat_result.st_size}"})
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+    return RangeFileResponse(path, byte_range[0], byte_range[1], stat_result,
+                             media_type=media_type, headers=headers)
@@ -0,0 +1,314 @@
+"""
+Process-wide registry of solver jobs.
+
+The solver and solution services, the engine monitors and the scheduler all
+need to see the same jobs across the submit, status and cancel calls. This
+module keeps one JobRecord per problem in a single, thread-safe registry that
+they share, giving O(1) lookups by problem_id.
+
+Finished jobs are evicted after SOLVER_JOB_TTL seconds, or earlier once more
+than SOLVER_JOB_HISTORY of them are kept. An evicted record is saved as
+job.json in its problem folder, from which load_record() rebuilds it.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Job states that will not change any more
+TERMINAL_STATES = {"completed", "error", "stopped", "killed"}
+
+# Seconds a finished job is kept in memory
+JOB_TTL = float(os.environ.get("SOLVER_JOB_TTL", "3600"))
+
+# Most finished jobs kept in memory; the oldest ones are evicted first
+JOB_HISTORY = int(os.environ.get("SOLVER_JOB_HISTORY", "1000"))
+
+# File in the problem folder holding the record of an evicted job
+JOB_FILE = "job.json"
+
+# Fields saved with an evicted record; engine handles and coalescing links are not
+_SAVED_FIELDS = (
+    "problem_id", "state", "name", "message", "created_at", "started_at", "finished_at",
+    "pid", "exit_code", "error", "problem_dir", "input_path", "solution_path",
+    "debug_log_path", "stdout_path", "stderr_path", "output_tail", "solution_available",
+    "solve_key", "overrides", "portfolio_size", "estimate", "components", "parent_id", "version",
+)
+_DATETIME_FIELDS = ("created_at", "started_at", "finished_at")
+
+logger = logging.getLogger("job_registry")
+
+
+@dataclass
+class JobRecord:
+    """State of a single solver job."""
+    problem_id: str
+    state: str = "started"
+    name: Optional[str] = None
+    message: str = ""
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    pid: Optional[int] = None
+    exit_code: Optional[int] = None
+    error: Optional[str] = None
+    problem_dir: Optional[str] = None
+    input_path: Optional[str] = None
+    solution_path: Optional[str] = None
+    debug_log_path: Optional[str] = None
+    stdout_path: Optional[str] = None
+    stderr_path: Optional[str] = None
+    # Last few KB of the solver's console output, kept once the solver has exited
+    output_tail: Optional[str] = None
+    solution_available: bool = False
+    # Solve cache key of the problem (see solve_cache); None when the cache is disabled
+    solve_key: Optional[str] = None
+    # Solver properties set on top of config.cfg for this job
+    overrides: Dict[str, str] = field(default_factory=dict)
+    # Number of solver runs with different seeds; the best solution is kept (see portfolio)
+    portfolio_size: int = 1
+    # Problem whose solve this job shares, and the jobs sharing this job's solve
+    leader_id: Optional[str] = None
+    followers: List[str] = field(default_factory=list)
+    # Predicted solve time and memory with the problem's size metrics (see estimator)
+    estimate: Optional[Dict[str, Any]] = None
+    # Jobs solving the independent parts of this problem, and the problem a part belongs to
+    components: List[str] = field(default_factory=list)
+    parent_id: Optional[str] = None
+    # Bumped on every change through the registry; used as a cheap status validator
+    version: int = 0
+    # Engine handle of the running solve; never exposed through the API
+    process: Any = field(default=None, repr=False, compare=False)
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the job may still change state."""
+        return self.state not in TERMINAL_STATES
+
+    @property
+    def output_offset(self) -> Optional[int]:
+        """Number of bytes written to stdout_path so far; clients can read the file from here on."""
+        if not self.stdout_path:
+            return None
+        try:
+            return os.path.getsize(self.stdout_path)
+        except OSError:
+            return None
+
+    @property
+    def elapsed_seconds(self) -> Optional[float]:
+        """Seconds spent solving so far (or in total, once finished)."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.now()
+        return (end - self.started_at).total_seconds()
+
+
+class JobRegistry:
+    """Thread-safe map of problem_id to JobRecord."""
+
+    def __init__(self):
+        self._jobs: Dict[str, JobRecord] = {}
+        self._lock = threading.RLock()
+        self._version = 0
+        # solve_key -> problem_id of the job solving it
+        self._leaders: Dict[str, str] = {}
+
+    def _touch(self, record: JobRecord) -> None:
+        # Versions come from one counter, so a re-registered job never reuses an old one
+        self._version += 1
+        record.version = self._version
+
+    def register(self, record: JobRecord) -> JobRecord:
+        """Add (or replace) the record for record.problem_id."""
+        with self._lock:
+            self._touch(record)
+            self._jobs[record.problem_id] = record
+            evicted = self._evict()
+        for old in evicted:
+            save_record(old)
+        return record
+
+    def _evictable(self, record: JobRecord) -> bool:
+        if record.is_active or record.finished_at is None or record.followers:
+            return False
+        # The parent of a decomposed problem still reads its parts
+        parent = self._jobs.get(record.parent_id) if record.parent_id else None
+        return parent is None or not parent.is_active
+
+    def _evict(self) -> List[JobRecord]:
+        """Drop finished jobs past the TTL or above the size cap; call with the lock held."""
+        finished = sorted(
+            (record for record in self._jobs.values() if self._evictable(record)),
+            key=lambda record: record.finished_at,
+        )
+        cutoff = datetime.now() - timedelta(seconds=JOB_TTL)
+        excess = len(finished) - JOB_HISTORY
+        evicted = []
+        for index, record in enumerate(finished):
+            if index >= excess and record.finished_at > cutoff:
+                break
+            del self._jobs[record.problem_id]
+            evicted.append(record)
+        return evicted
+
+    def get(self, problem_id: str) -> Optional[JobRecord]:
+        """
+        Get a snapshot of a job record.
+
+        The returned copy can be read without holding the registry lock;
+        use update() to change a job.
+        """
+        with self._lock:
+            record = self._jobs.get(problem_id)
+            return replace(record) if record is not None else None
+
+    def update(self, problem_id: str, **changes) -> Optional[JobRecord]:
+        """
+        Update fields of a job record.
+
+        Args:
+            problem_id: ID of the job to update
+            **changes: JobRecord fields to set
+
+        Returns:
+            A snapshot of the updated record, or None if the job is unknown
+        """
+        with self._lock:
+            record = self._jobs.get(problem_id)
+            if record is None:
+                return None
+            for key, value in changes.items():
+                setattr(record, key, value)
+            self._touch(record)
+            return replace(record)
+
+    def update_if(self, problem_id: str, states, **changes) -> Optional[JobRecord]:
+        """
+        Update fields of a job record only while it is in one of the given states.
+
+        Returns:
+            A snapshot of the updated record, or None if the job is unknown or
+            has moved to another state (e.g. it was cancelled)
+        """
+        with self._lock:
+            record = self._jobs.get(problem_id)
+            if record is None or record.state not in states:
+                return None
+            for key, value in changes.items():
+                setattr(record, key, value)
+            self._touch(record)
+            return replace(record)
+
+    def claim_leader(self, solve_key: str, problem_id: str) -> bool:
+        """
+        Make a job the one that solves solve_key for identical submissions.
+
+        Returns:
+            False if another active job already solves the same key
+        """
+        with self._lock:
+            leader = self._jobs.get(self._leaders.get(solve_key))
+            if leader is not None and leader.is_active and leader.problem_id != problem_id:
+                return False
+            self._leaders[solve_key] = problem_id
+            return True
+
+    def follow(self, solve_key: str, record: JobRecord) -> Optional[JobRecord]:
+        """
+        Register a job as a follower of the active job solving the same key.
+
+        Returns:
+            A snapshot of the leader, or None (and nothing registered) if no
+            active job solves the key
+        """
+        with self._lock:
+            leader = self._jobs.get(self._leaders.get(solve_key))
+            if leader is None or not leader.is_active:
+                return None
+            record.leader_id = leader.problem_id
+            self._touch(record)
+            self._jobs[record.problem_id] = record
+            # Replace rather than append, so earlier snapshots keep their list
+            leader.followers = leader.followers + [record.problem_id]
+            self._touch(leader)
+            return replace(leader)
+
+    def release_leader(self, solve_key: str, problem_id: str) -> List[str]:
+        """
+        Stop a job from leading solve_key.
+
+        Returns:
+            IDs of the jobs that followed it
+        """
+        with self._lock:
+            if self._leaders.get(solve_key) == problem_id:
+                del self._leaders[solve_key]
+            record = self._jobs.get(problem_id)
+            if record is None or not record.followers:
+                return []
+            followers, record.followers = record.followers, []
+            self._touch(record)
+            return followers
+
+    def remove(self, problem_id: str) -> Optional[JobRecord]:
+        """Remove a job from the registry."""
+        with self._lock:
+            return self._jobs.pop(problem_id, None)
+
+    def list(self) -> List[JobRecord]:
+        """Snapshots of all known jobs."""
+        with self._lock:
+            return [replace(record) for record in self._jobs.values()]
+
+    def __contains__(self, problem_id: str) -> bool:
+        with self._lock:
+            return problem_id in self._jobs
+
+
+def save_record(record: JobRecord) -> None:
+    """Save a finished job as job.json in its problem folder, for load_record()."""
+    if not record.problem_dir or not os.path.isdir(record.problem_dir):
+        return
+    data = {}
+    for name in _SAVED_FIELDS:
+        value = getattr(record, name)
+        data[name] = value.isoformat() if isinstance(value, datetime) else value
+    try:
+        with open(os.path.join(record.problem_dir, JOB_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    except (OSError, TypeError) as e:
+        logger.warning(f"Could not save the record of job {record.problem_id}: {str(e)}")
+
+
+def load_record(problem_dir: str) -> Optional[JobRecord]:
+    """
+    Rebuild the record of an evicted job from its problem folder.
+
+    Returns:
+        The saved record, or None if the folder has no (readable) job.json
+    """
+    try:
+        with open(os.path.join(problem_dir, JOB_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        for name in _DATETIME_FIELDS:
+            if data.get(name):
+                data[name] = datetime.fromisoformat(data[name])
+        return JobRecord(**{name: data[name] for name in _SAVED_FIELDS if name in data})
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Could not read {JOB_FILE} in {problem_dir}: {str(e)}")
+        return None
+
+
+_registry = JobRegistry()
+
+
+def get_job_registry() -> JobRegistry:
+    """Get the process-wide job registry."""
+    return _registry
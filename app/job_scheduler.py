@@ -0,0 +1,186 @@
+"""
+Bounded scheduler for solver jobs.
+
+Submitted problems wait in a bounded queue and are solved by a fixed number
+of solver slots, so a burst of submissions cannot start more JVMs than the
+machine can run at once. When the queue is full, submissions are rejected with
+QueueFullError and the API answers 429 with a Retry-After header.
+
+Jobs are taken in order of submission time plus SOLVER_PRIORITY_WEIGHT times
+their predicted solve time (see estimator), so a short solve overtakes long ones
+queued at about the same time. A long solve is only overtaken by jobs submitted
+within its own predicted duration after it, so it cannot be starved. Jobs
+without a prediction, or a weight of 0, keep the order of submission.
+
+A job that starts several JVMs (a portfolio of K runs) takes K slots. Jobs are
+admitted strictly in queue order, so a job waiting for several slots to free up
+is not overtaken by single-slot jobs queued behind it.
+"""
+
+import os
+import time
+import queue
+import logging
+import itertools
+import threading
+from typing import Callable, List, Optional, Tuple
+
+# Concurrency limits, configurable through the environment
+SOLVER_MAX_CONCURRENT = int(os.environ.get("SOLVER_MAX_CONCURRENT", str(os.cpu_count() or 1)))
+SOLVER_QUEUE_SIZE = int(os.environ.get("SOLVER_QUEUE_SIZE", "100"))
+SOLVER_RETRY_AFTER = int(os.environ.get("SOLVER_RETRY_AFTER", "30"))
+SOLVER_PRIORITY_WEIGHT = float(os.environ.get("SOLVER_PRIORITY_WEIGHT", "1.0"))
+
+logger = logging.getLogger("job_scheduler")
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the solver queue is full."""
+
+    def __init__(self, message: str, retry_after: int = SOLVER_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SolverScheduler:
+    """Runs submitted jobs on a fixed number of solver slots."""
+
+    def __init__(self, max_concurrent: int = SOLVER_MAX_CONCURRENT, queue_size: int = SOLVER_QUEUE_SIZE,
+                 priority_weight: float = SOLVER_PRIORITY_WEIGHT):
+        self.max_concurrent = max(1, max_concurrent)
+        self.queue_size = max(1, queue_size)
+        self.priority_weight = max(0.0, priority_weight)
+        # Entries are (sort key, submission number, problem ID, job, slots); the number breaks ties in FIFO order
+        self._queue = queue.PriorityQueue(maxsize=self.queue_size)
+        self._sequence = itertools.count()
+        # Held while adding to the queue, so a group of jobs is queued all at once or not at all
+        self._submit_lock = threading.Lock()
+        self._running = 0
+        self._busy = 0
+        self._lock = threading.Lock()
+        # Signalled when slots are released; held by the slot thread admitting the next job
+        self._released = threading.Condition(self._lock)
+        self._admission = threading.Lock()
+        self._slots = []
+
+    def _ensure_slots(self) -> None:
+        """Start the slot threads on first use."""
+        with self._lock:
+            while len(self._slots) < self.max_concurrent:
+                slot = threading.Thread(
+                    target=self._run_slot,
+                    name=f"solver-slot-{len(self._slots)}",
+                    daemon=True
+                )
+                slot.start()
+                self._slots.append(slot)
+
+    def submit(self, problem_id: str, job: Callable[[], None], predicted_seconds: Optional[float] = None,
+               slots: int = 1) -> int:
+        """
+        Queue a job for the next free solver slot.
+
+        Args:
+            problem_id: ID of the problem the job solves
+            job: Callable that runs the solve and returns when it has finished
+            predicted_seconds: Predicted solve time, which moves short jobs ahead of long ones
+            slots: Number of solver slots (JVMs) the job uses, capped at max_concurrent
+
+        Returns:
+            Number of jobs waiting ahead of this one
+
+        Raises:
+            QueueFullError: If the queue already holds queue_size jobs
+        """
+        self._ensure_slots()
+        key = time.monotonic() + self.priority_weight * (predicted_seconds or 0.0)
+        with self._submit_lock:
+            try:
+                self._queue.put_nowait((key, next(self._sequence), problem_id, job, self._slot_count(slots)))
+            except queue.Full:
+                raise self._full_error()
+        with self._queue.mutex:
+            ahead = sum(1 for entry in self._queue.queue if entry[0] < key)
+        logger.info(f"Queued problem {problem_id} ({ahead} job(s) ahead)")
+        return ahead
+
+    def submit_all(self, jobs: List[Tuple[str, Callable[[], None], Optional[float]]], slots: int = 1) -> None:
+        """
+        Queue a group of jobs, either all of them or none.
+
+        Args:
+            jobs: (problem ID, job, predicted seconds) of each job, as for submit()
+            slots: Number of solver slots each job uses
+
+        Raises:
+            QueueFullError: If the queue has no room for all of the jobs; none is queued then
+        """
+        self._ensure_slots()
+        now = time.monotonic()
+        with self._submit_lock:
+            # Only submitters add to the queue, so the room cannot shrink while the lock is held
+            if self.queue_size - self._queue.qsize() < len(jobs):
+                raise self._full_error()
+            for problem_id, job, predicted_seconds in jobs:
+                key = now + self.priority_weight * (predicted_seconds or 0.0)
+                self._queue.put_nowait((key, next(self._sequence), problem_id, job, self._slot_count(slots)))
+        logger.info(f"Queued {len(jobs)} jobs: {', '.join(problem_id for problem_id, _, _ in jobs)}")
+
+    def _full_error(self) -> QueueFullError:
+        return QueueFullError(f"Solver queue is full ({self.queue_size} jobs waiting), try again later")
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting for a slot."""
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> int:
+        """Number of jobs currently solving."""
+        with self._lock:
+            return self._running
+
+    @property
+    def busy_slots(self) -> int:
+        """Number of slots taken by the running jobs."""
+        with self._lock:
+            return self._busy
+
+    def _slot_count(self, slots: int) -> int:
+        return max(1, min(slots, self.max_concurrent))
+
+    def _run_slot(self) -> None:
+        while True:
+            _, _, problem_id, job, slots = self._queue.get()
+            # Admit jobs one at a time, in the order they were taken from the queue
+            with self._admission, self._lock:
+                while self.max_concurrent - self._busy < slots:
+                    self._released.wait()
+                self._busy += slots
+                self._running += 1
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Solver job for problem {problem_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self._busy -= slots
+                    self._running -= 1
+                    self._released.notify_all()
+                self._queue.task_done()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_solver_scheduler() -> SolverScheduler:
+    """Get the process-wide solver scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SolverScheduler()
+            logger.info(
+                f"Solver scheduler: {_scheduler.max_concurrent} slot(s), queue size {_scheduler.queue_size}"
+            )
+        return _scheduler
@@ -1,10 +1,18 @@
+import io
 import json
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import datetime
 import re
+from bisect import bisect_left
 from collections import defaultdict # Needed for grouping classes
 
+
+class _Fragment(tuple):
+    """
+    A run of (tag, attributes) child elements shared by several parent elements.
+
+    The writer formats a fragment once and reuses the text for every parent.
+    """
+
 class JSONtoXMLConverter:
     """
     Converts JSON to UniTime XML, strictly following the user-provided
@@ -15,13 +23,26 @@ class JSONtoXMLConverter:
     SLOTS_PER_DAY = (24 * 60) // MINUTES_PER_SLOT # 288
     NR_DAYS = 7 # Use standard 7-day week
     DAY_MAP_STD = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, "Friday": 4, "Saturday": 5, "Sunday": 6}
+    # Day names in DAY_MAP_STD order (Mon-Sun)
+    DAY_NAMES = sorted(DAY_MAP_STD, key=DAY_MAP_STD.get)
     # Assume term length for 'dates' attribute (e.g., 16 weeks)
     TERM_LENGTH_DAYS = 16 * 7 # 112 days
 
-    def __init__(self, json_data):
+    def __init__(self, json_data, compact_constraints=False, initial_assignment=None):
         """
         Initializes the converter with JSON data.
+
+        Args:
+            json_data: The problem as a dictionary or JSON string
+            compact_constraints: Emit one multi-class SAME_DAYS/DIFF_TIME constraint per
+                offering, instructor or clique instead of one constraint per pair of
+                meetings, wherever that is equivalent (see _iter_group_constraints)
+            initial_assignment: Optional previous placements to start the solver from, as
+                {(class name, meeting index): {"time": (days, start, length), "rooms": [room names]}};
+                the matching <time> and <room> elements are marked solution="true" initial="true"
         """
+        self.compact_constraints = compact_constraints
+        self.initial_assignment = initial_assignment or {}
         if isinstance(json_data, str):
             self.data = json.loads(json_data)
         elif isinstance(json_data, dict):
@@ -42,6 +63,8 @@ class JSONtoXMLConverter:
         # Use standard day map
         self.day_map = self.DAY_MAP_STD
         self.nr_days = self.NR_DAYS
+        # One-day codes, "1000000" for Monday to "0000001" for Sunday
+        self.day_codes = [self._create_day_code([day_name]) for day_name in self.DAY_NAMES]
 
         self._setup_time_slot_mapping()
         self._setup_id_generators()
@@ -123,47 +146,57 @@ class JSONtoXMLConverter:
         if level_name == "notAvailable": return '4'
         return pref_code_map.get(num_val, str(num_val))
 
-    def convert(self):
-        """
-        Performs the conversion following the research report specification.
-
-        Returns:
-            str: A pretty-printed XML string representing the timetabling problem.
-        """
-        # --- Root Element Configuration (Report Spec) ---
+    def _timetable_attributes(self):
+        """Attributes of the <timetable> root element (Report Spec)."""
         academic_session = self.general.get("academic_session", "YYYYXXX")
         year_str = str(self.general.get("year", "")) # Get year
-        root = ET.Element("timetable", version="2.4",
-                          initiative="custom", # Default from report
-                          term=academic_session,
-                          year=year_str, # Added year attribute
-                          nrDays=str(self.NR_DAYS),
-                          slotsPerDay=str(self.SLOTS_PER_DAY),
-                          created=self.creation_timestamp) # Use specific timestamp
-
-        # --- Rooms Section (Report Spec) ---
-        rooms_element = ET.SubElement(root, "rooms")
-        room_id_map = {} # Local map for this conversion: json_name -> numeric_id
+        return {
+            "version": "2.4",
+            "initiative": "custom", # Default from report
+            "term": academic_session,
+            "year": year_str, # Added year attribute
+            "nrDays": str(self.NR_DAYS),
+            "slotsPerDay": str(self.SLOTS_PER_DAY),
+            "created": self.creation_timestamp # Use specific timestamp
+        }
+
+    def _iter_rooms(self):
+        """Yields the <room> elements as (tag, attributes, children) tuples."""
+        self.room_id_map = {} # Local map for this conversion: json_name -> numeric_id
         for room_name in self.rooms_data:
              if room_name != "description":
                  # Use dedicated function to get sequential ID
-                 room_id_map[room_name] = self._get_mapped_id(room_name, self.room_name_to_id, 'next_room_id_counter')
+                 self.room_id_map[room_name] = self._get_mapped_id(room_name, self.room_name_to_id, 'next_room_id_counter')
+
+        # Rooms sorted by capacity, so the rooms big enough for a class are found with bisect
+        self.rooms_by_capacity = sorted(
+            (capacity, position, self.room_id_map[room_name])
+            for position, (room_name, capacity) in enumerate(self.rooms_data.items())
+            if room_name != "description")
+        self.room_capacities = [capacity for capacity, _, _ in self.rooms_by_capacity]
+        self.room_domains = {} # class limit -> shared <room> fragment
 
         for room_name, capacity in self.rooms_data.items():
             if room_name == "description": continue
-            numeric_room_id = room_id_map[room_name]
-            ET.SubElement(rooms_element, "room",
-                          id=str(numeric_room_id),
-                          capacity=str(capacity),
-                          constraint="true", # Default from report
-                          location="0,0") # Default from report
-
-        # --- Classes Section (Report Spec) ---
-        classes_element = ET.SubElement(root, "classes")
+            numeric_room_id = self.room_id_map[room_name]
+            yield ("room", {"id": str(numeric_room_id),
+                            "capacity": str(capacity),
+                            "constraint": "true", # Default from report
+                            "location": "0,0"}, []) # Default from report
+
+    def _iter_classes(self):
+        """
+        Yields the <class> elements as (tag, attributes, children) tuples.
+
+        Also records which meetings belong to each offering and instructor, for
+        _iter_group_constraints.
+        """
         # Store mappings for constraint generation
-        offering_to_meetings = defaultdict(list)
-        instructor_to_meetings = defaultdict(list)
-        all_meeting_details = {} # numeric_meeting_id -> {instructor_id: num, offering_id: num}
+        self.offering_to_meetings = defaultdict(list)
+        self.instructor_to_meetings = defaultdict(list)
+        self.offering_to_instructor = {}
+        self.instructor_availability = {} # instructor name -> days x slots preference matrix
+        self.instructor_time_domains = {} # instructor name -> shared <time> fragment
 
         for class_name, details in self.classes_data.items():
             if class_name == "description": continue
@@ -179,6 +212,7 @@ class JSONtoXMLConverter:
             numeric_instructor_id = None
             if instructor_name:
                 numeric_instructor_id = self._get_mapped_id(instructor_name, self.instructor_name_to_id, 'next_instructor_id_counter')
+            self.offering_to_instructor[offering_id] = numeric_instructor_id
 
             # Create class meetings
             for i in range(num_slots):
@@ -186,129 +220,209 @@ class JSONtoXMLConverter:
                 self.next_class_meeting_id_counter += 1
                 self.class_meeting_ids.append(numeric_meeting_id) # Store globally if needed elsewhere
 
-                offering_to_meetings[offering_id].append(numeric_meeting_id)
+                self.offering_to_meetings[offering_id].append(numeric_meeting_id)
                 if numeric_instructor_id is not None:
-                    instructor_to_meetings[numeric_instructor_id].append(numeric_meeting_id)
-                all_meeting_details[numeric_meeting_id] = {'instructor_id': numeric_instructor_id, 'offering_id': offering_id}
-
+                    self.instructor_to_meetings[numeric_instructor_id].append(numeric_meeting_id)
 
                 # Create <class> element
-                class_elem = ET.SubElement(classes_element, "class",
-                                          id=str(numeric_meeting_id),
-                                          offering=str(offering_id),
-                                          config=str(config_id),
-                                          subpart=str(subpart_id),
-                                          scheduler="-1", # Keep null-like ref
-                                          department=str(offering_id), # Use offering ID
-                                          committed="false", # Default from report
-                                          classLimit=str(class_limit),
-                                          nrRooms="1", # Default from report
-                                          dates="1"*self.TERM_LENGTH_DAYS # Default from report
-                                          )
+                class_attributes = {"id": str(numeric_meeting_id),
+                                    "offering": str(offering_id),
+                                    "config": str(config_id),
+                                    "subpart": str(subpart_id),
+                                    "scheduler": "-1", # Keep null-like ref
+                                    "department": str(offering_id), # Use offering ID
+                                    "committed": "false", # Default from report
+                                    "classLimit": str(class_limit),
+                                    "nrRooms": "1", # Default from report
+                                    "dates": "1"*self.TERM_LENGTH_DAYS} # Default from report
+                children = []
 
                 if numeric_instructor_id is not None:
-                    ET.SubElement(class_elem, "instructor", id=str(numeric_instructor_id))
+                    children.append(("instructor", {"id": str(numeric_instructor_id)}))
 
-                # Add Time Preferences (Report Spec: iterate all 7 days)
+                # Add Time Preferences (Report Spec: iterate all 7 days), shared by all of the instructor's meetings
                 if instructor_name and instructor_name in self.instructors_data:
-                     instructor_day_prefs = self.instructors_data[instructor_name]
-                     # Iterate Mon-Sun (0-6)
-                     for day_index_std in range(self.NR_DAYS):
-                         # Find corresponding day name for JSON lookup
-                         day_name_json = None
-                         for name, index in self.DAY_MAP_STD.items():
-                              if index == day_index_std:
-                                   day_name_json = name
-                                   break
-
-                         day_code = ['0'] * self.NR_DAYS; day_code[day_index_std] = '1'; day_code_str = "".join(day_code)
-
-                         # Get prefs for this day from JSON, default to unavailable if day missing
-                         logical_day_prefs = instructor_day_prefs.get(day_name_json) if day_name_json else None
-
-                         # Iterate through LOGICAL slots (0-5) defined by the JSON structure
-                         for logical_slot_index in range(len(self.logical_slot_map)):
-                             pref_value = 4 # Default to notAvailable
-                             if logical_day_prefs and isinstance(logical_day_prefs, list) and logical_slot_index < len(logical_day_prefs):
-                                 pref_value = logical_day_prefs[logical_slot_index]
-                             else:
-                                 # Handle cases where day is missing or prefs list is wrong length - default pref=4
-                                 pref_value = self.preferences.get("notAvailable", 4)
-
-
-                             # Use numeric preference value directly (report says treat as string, but numeric seems common)
-                             # Only add if *not* unavailable, otherwise implicitly unavailable
-                             if pref_value != self.preferences.get("notAvailable", 4):
-                                 slot_info = self.logical_slot_map.get(logical_slot_index)
-                                 if slot_info:
-                                      ET.SubElement(class_elem, "time",
-                                                   days=day_code_str,
-                                                   start=str(slot_info['start']),
-                                                   length=str(slot_info['length']),
-                                                   pref=str(pref_value), # Use numeric pref
-                                                   breakTime="0") # Default from report
-
-                # Add Room Preferences (Filtered by Capacity - Report Spec)
-                ignore_cap = self.constraints_data.get('ignoreClassCapacity', {}).get('value', False)
-                room_constraint_flag = "false" if ignore_cap else "true" # For the class attr later? No, room pref
-
-                for room_name, capacity in self.rooms_data.items():
-                     if room_name == "description": continue
-                     numeric_room_id = room_id_map[room_name]
-                     # Only add room if capacity is sufficient (respect ignoreClassCapacity=false)
-                     if ignore_cap or capacity >= class_limit:
-                         ET.SubElement(class_elem, "room", id=str(numeric_room_id),
-                                      pref=str(self.preferences.get("neutral", 0)), # Neutral pref
-                                      constraint=room_constraint_flag) # Still needed? Sample room has constraint attr
+                     children.append(self._instructor_time_domain(instructor_name))
 
+                # Add Room Preferences (Filtered by Capacity - Report Spec), shared by all meetings
+                children.append(self._room_domain(class_limit))
 
-        # --- Add EMPTY students section ---
-        ET.SubElement(root, "students")
+                initial = self.initial_assignment.get((class_name, i))
+                if initial:
+                    children = self._mark_initial(children, initial)
+
+                yield ("class", class_attributes, children)
+
+    def _mark_initial(self, children, initial):
+        """
+        Marks the previous placement of a meeting among its <time> and <room> elements.
+
+        Returns a new child list; shared fragments are copied, not modified.
+        """
+        rooms = {str(self.room_id_map[name]) for name in initial.get("rooms", []) if name in self.room_id_map}
+        time = initial.get("time")
+        marked = []
+        for child in children:
+            for tag, attributes in (child if isinstance(child, _Fragment) else (child,)):
+                if (tag == "time" and time is not None
+                        and (attributes["days"], attributes["start"], attributes["length"]) == tuple(time)) \
+                        or (tag == "room" and attributes["id"] in rooms):
+                    attributes = dict(attributes, solution="true", initial="true")
+                marked.append((tag, attributes))
+        return marked
+
+    def meeting_keys(self):
+        """
+        Maps the class IDs this converter assigns to (class name, meeting index).
+
+        Meetings are numbered from 1 in the order of the classes, as in _iter_classes.
+        """
+        keys = {}
+        meeting_id = 1
+        for class_name, details in self.classes_data.items():
+            if class_name == "description": continue
+            for i in range(details.get('slots', 1)):
+                keys[meeting_id] = (class_name, i)
+                meeting_id += 1
+        return keys
+
+    def room_names(self):
+        """Maps the room IDs this converter assigns to room names (numbered from 1, as in _iter_rooms)."""
+        return {room_id: room_name for room_id, room_name in
+                enumerate((name for name in self.rooms_data if name != "description"), start=1)}
+
+    def _instructor_availability(self, instructor_name):
+        """
+        Gets the availability of an instructor as a days x logical slots matrix.
+
+        Rows follow DAY_MAP_STD (Mon-Sun); each entry is the preference value for that
+        day and slot, or None where the instructor is not available. Computed once per
+        instructor.
+        """
+        matrix = self.instructor_availability.get(instructor_name)
+        if matrix is None:
+            not_available = self.preferences.get("notAvailable", 4)
+            instructor_day_prefs = self.instructors_data[instructor_name]
+            nr_slots = len(self.logical_slot_map)
+            rows = []
+            for day_name_json in self.DAY_NAMES:
+                # Get prefs for this day from JSON, default to unavailable if day missing
+                logical_day_prefs = instructor_day_prefs.get(day_name_json)
+                if not (logical_day_prefs and isinstance(logical_day_prefs, list)):
+                    logical_day_prefs = []
+                # Missing slots (prefs list too short) default to notAvailable
+                row = [logical_day_prefs[i] if i < len(logical_day_prefs) else not_available for i in range(nr_slots)]
+                rows.append(tuple(None if pref_value == not_available else pref_value for pref_value in row))
+            matrix = tuple(rows)
+            self.instructor_availability[instructor_name] = matrix
+        return matrix
+
+    def _instructor_time_domain(self, instructor_name):
+        """
+        Gets the <time> preferences of an instructor's meetings: one per available
+        day and logical slot, with the numeric preference value. Built once per
+        instructor and shared by all of their meetings.
+        """
+        domain = self.instructor_time_domains.get(instructor_name)
+        if domain is None:
+            times = []
+            for day_index_std, row in enumerate(self._instructor_availability(instructor_name)):
+                for logical_slot_index, pref_value in enumerate(row):
+                    # Only add if *not* unavailable, otherwise implicitly unavailable
+                    slot_info = self.logical_slot_map.get(logical_slot_index)
+                    if pref_value is not None and slot_info:
+                        times.append(("time", {"days": self.day_codes[day_index_std],
+                                               "start": str(slot_info['start']),
+                                               "length": str(slot_info['length']),
+                                               "pref": str(pref_value), # Use numeric pref
+                                               "breakTime": "0"})) # Default from report
+            domain = _Fragment(times)
+            self.instructor_time_domains[instructor_name] = domain
+        return domain
+
+    def _room_domain(self, class_limit):
+        """
+        Gets the <room> preferences of a class with the given limit.
 
-        # --- Add Group Constraints (Report Spec) ---
-        constraints_elem = ET.SubElement(root, "groupConstraints")
+        Rooms whose capacity is below the limit are skipped (unless ignoreClassCapacity
+        is set), found with bisect on the capacity-sorted room list. The fragment is
+        built once per distinct limit and shared by every meeting that uses it; rooms
+        keep the order of the input.
+        """
+        ignore_cap = self.constraints_data.get('ignoreClassCapacity', {}).get('value', False)
+        key = None if ignore_cap else class_limit
+        domain = self.room_domains.get(key)
+        if domain is None:
+            room_constraint_flag = "false" if ignore_cap else "true" # For the class attr later? No, room pref
+            # Only add room if capacity is sufficient (respect ignoreClassCapacity=false)
+            first = 0 if ignore_cap else bisect_left(self.room_capacities, class_limit)
+            eligible = sorted((position, room_id) for _, position, room_id in self.rooms_by_capacity[first:])
+            domain = _Fragment(("room", {"id": str(room_id),
+                                         "pref": str(self.preferences.get("neutral", 0)), # Neutral pref
+                                         "constraint": room_constraint_flag}) # Still needed? Sample room has constraint attr
+                               for _, room_id in eligible)
+            self.room_domains[key] = domain
+        return domain
+
+    def _new_constraint(self, constraint_type, pref, meeting_ids):
+        """Builds a <constraint> element over the given class meetings."""
+        constraint_id = self._get_mapped_id(f"constraint_{self.next_constraint_id_counter}", {}, 'next_constraint_id_counter')
+        return ("constraint", {"id": str(constraint_id), "type": constraint_type, "pref": pref},
+                [("class", {"id": str(meeting_id)}) for meeting_id in meeting_ids])
+
+    def _pairwise_constraints(self, constraint_type, pref, meeting_ids):
+        """Yields one two-class constraint per pair of the given meetings."""
+        for i in range(len(meeting_ids)):
+            for j in range(i + 1, len(meeting_ids)):
+                yield self._new_constraint(constraint_type, pref, (meeting_ids[i], meeting_ids[j]))
+
+    def _iter_group_constraints(self):
+        """
+        Yields the <constraint> elements as (tag, attributes, children) tuples (Report Spec).
+
+        SAME_DAYS and DIFF_TIME are checked by cpsolver on every pair of classes of a
+        group constraint, so a single constraint over n meetings is equivalent to the
+        n*(n-1)/2 two-class constraints over all their pairs. In compact mode the
+        clique of meetings of an offering (maxOneSlotInDay) or of an instructor
+        (instructorJustOneClassAtSlot) becomes one constraint. A mutually exclusive
+        pair of offerings only relates meetings across the two offerings, so it is
+        merged into one DIFF_TIME only when the meetings within each offering must
+        already differ in time; otherwise it stays pairwise.
+        """
+        offering_to_meetings = self.offering_to_meetings
+        instructor_to_meetings = self.instructor_to_meetings
+        compact = self.compact_constraints
+        instructor_diff_time = self.constraints_data.get("instructorJustOneClassAtSlot", {}).get("value", False)
 
         # Apply constraints based on flags
         if self.constraints_data.get("sameRooms", {}).get("value", False):
             for offering_id, meeting_ids in offering_to_meetings.items():
                  if len(meeting_ids) > 1:
-                    constraint_id = self._get_mapped_id(f"constraint_{self.next_constraint_id_counter}", {}, 'next_constraint_id_counter')
-                    constraint = ET.SubElement(constraints_elem, "constraint", id=str(constraint_id), type="SAME_ROOM", pref="R")
-                    for meeting_id in meeting_ids: ET.SubElement(constraint, "class", id=str(meeting_id))
+                    yield self._new_constraint("SAME_ROOM", "R", meeting_ids)
 
         if self.constraints_data.get("sameSlots", {}).get("value", False):
             for offering_id, meeting_ids in offering_to_meetings.items():
                  if len(meeting_ids) > 1:
-                    constraint_id = self._get_mapped_id(f"constraint_{self.next_constraint_id_counter}", {}, 'next_constraint_id_counter')
-                    constraint = ET.SubElement(constraints_elem, "constraint", id=str(constraint_id), type="SAME_START", pref="R")
-                    for meeting_id in meeting_ids: ET.SubElement(constraint, "class", id=str(meeting_id))
+                    yield self._new_constraint("SAME_START", "R", meeting_ids)
 
         if self.constraints_data.get("maxOneSlotInDay", {}).get("value", False):
              for offering_id, meeting_ids in offering_to_meetings.items():
                  if len(meeting_ids) > 1:
-                    # Apply pairwise prohibited SAME_DAYS
-                    for i in range(len(meeting_ids)):
-                        for j in range(i + 1, len(meeting_ids)):
-                            m1_id = meeting_ids[i]
-                            m2_id = meeting_ids[j]
-                            constraint_id = self._get_mapped_id(f"constraint_{self.next_constraint_id_counter}", {}, 'next_constraint_id_counter')
-                            constraint = ET.SubElement(constraints_elem, "constraint", id=str(constraint_id), type="SAME_DAYS", pref="P")
-                            ET.SubElement(constraint, "class", id=str(m1_id))
-                            ET.SubElement(constraint, "class", id=str(m2_id))
-
-
-        if self.constraints_data.get("instructorJustOneClassAtSlot", {}).get("value", False):
+                    # Apply prohibited SAME_DAYS between all meetings of the offering
+                    if compact:
+                        yield self._new_constraint("SAME_DAYS", "P", meeting_ids)
+                    else:
+                        yield from self._pairwise_constraints("SAME_DAYS", "P", meeting_ids)
+
+
+        if instructor_diff_time:
              for instructor_id, meeting_ids in instructor_to_meetings.items():
                  if len(meeting_ids) > 1:
-                    # Apply pairwise required DIFF_TIME
-                    for i in range(len(meeting_ids)):
-                        for j in range(i + 1, len(meeting_ids)):
-                            m1_id = meeting_ids[i]
-                            m2_id = meeting_ids[j]
-                            constraint_id = self._get_mapped_id(f"constraint_{self.next_constraint_id_counter}", {}, 'next_constraint_id_counter')
-                            constraint = ET.SubElement(constraints_elem, "constraint", id=str(constraint_id), type="DIFF_TIME", pref="R")
-                            ET.SubElement(constraint, "class", id=str(m1_id))
-                            ET.SubElement(constraint, "class", id=str(m2_id))
+                    # Apply required DIFF_TIME between all meetings of the instructor
+                    if compact:
+                        yield self._new_constraint("DIFF_TIME", "R", meeting_ids)
+                    else:
+                        yield from self._pairwise_constraints("DIFF_TIME", "R", meeting_ids)
 
         # Mutually Exclusive Pairs
         if "pairs" in self.mutually_exclusive_data:
@@ -322,17 +436,114 @@ class JSONtoXMLConverter:
                     if offering1_id is not None and offering2_id is not None:
                         class1_meeting_ids = offering_to_meetings.get(offering1_id, [])
                         class2_meeting_ids = offering_to_meetings.get(offering2_id, [])
+                        if compact and self._meetings_differ_in_time(offering1_id) and self._meetings_differ_in_time(offering2_id):
+                            instructor_id = self.offering_to_instructor.get(offering1_id)
+                            if (instructor_diff_time and instructor_id is not None
+                                    and instructor_id == self.offering_to_instructor.get(offering2_id)):
+                                # Same instructor: already covered by the instructor's DIFF_TIME
+                                continue
+                            if class1_meeting_ids and class2_meeting_ids:
+                                yield self._new_constraint("DIFF_TIME", "R", class1_meeting_ids + class2_meeting_ids)
+                            continue
                         # Apply pairwise required DIFF_TIME between meetings of the two offerings
                         for m1_id_num in class1_meeting_ids:
                             for m2_id_num in class2_meeting_ids:
-                                 constraint_id = self._get_mapped_id(f"constraint_{self.next_constraint_id_counter}", {}, 'next_constraint_id_counter')
-                                 constraint = ET.SubElement(constraints_elem, "constraint", id=str(constraint_id), type="DIFF_TIME", pref="R") # Changed pref to R per report
-                                 ET.SubElement(constraint, "class", id=str(m1_id_num))
-                                 ET.SubElement(constraint, "class", id=str(m2_id_num))
-
-        # --- Generate XML String ---
-        rough_string = ET.tostring(root, 'utf-8')
-        reparsed = minidom.parseString(rough_string.decode('utf-8'))
-        return reparsed.toprettyxml(indent="  ")
-    
-    
\ No newline at end of file
+                                 yield self._new_constraint("DIFF_TIME", "R", (m1_id_num, m2_id_num)) # Changed pref to R per report
+
+    def _meetings_differ_in_time(self, offering_id):
+        """Whether the meetings of an offering are already required to be at different times."""
+        if len(self.offering_to_meetings.get(offering_id, [])) <= 1:
+            return True
+        return (self.constraints_data.get("instructorJustOneClassAtSlot", {}).get("value", False)
+                and self.offering_to_instructor.get(offering_id) is not None)
+
+    @staticmethod
+    def _start_tag(tag, attributes, empty):
+        """Formats an opening (or, if empty, self-closing) tag."""
+        attrs = "".join(f' {name}="{_escape_attribute(value)}"' for name, value in attributes.items())
+        return f"<{tag}{attrs}/>" if empty else f"<{tag}{attrs}>"
+
+    def _write_section(self, fp, tag, elements, indent, newl):
+        """Writes a second-level section (e.g. <rooms>) one element at a time."""
+        pad, child_pad, grandchild_pad = indent, indent * 2, indent * 3
+        # Formatted text of shared fragments, by identity; the converter keeps them alive
+        fragments = {}
+        started = False
+        for child_tag, attributes, children in elements:
+            if not started:
+                fp.write(f"{pad}<{tag}>{newl}")
+                started = True
+            if not any(children):
+                fp.write(f"{child_pad}{self._start_tag(child_tag, attributes, True)}{newl}")
+                continue
+            parts = [f"{child_pad}{self._start_tag(child_tag, attributes, False)}{newl}"]
+            for grandchild in children:
+                if isinstance(grandchild, _Fragment):
+                    text = fragments.get(id(grandchild))
+                    if text is None:
+                        text = "".join(f"{grandchild_pad}{self._start_tag(tag, attributes, True)}{newl}"
+                                       for tag, attributes in grandchild)
+                        fragments[id(grandchild)] = text
+                    parts.append(text)
+                    continue
+                grandchild_tag, grandchild_attributes = grandchild
+                parts.append(f"{grandchild_pad}{self._start_tag(grandchild_tag, grandchild_attributes, True)}{newl}")
+            parts.append(f"{child_pad}</{child_tag}>{newl}")
+            fp.write("".join(parts))
+        if started:
+            fp.write(f"{pad}</{tag}>{newl}")
+        else:
+            fp.write(f"{pad}<{tag}/>{newl}")
+
+    def write(self, fp, indent="  ", newl="\n"):
+        """
+        Writes the XML to a text file handle, one element at a time.
+
+        Only one <class> or <constraint> element is held in memory at a time,
+        so large problems convert in bounded memory. With the default arguments
+        the output is identical to convert().
+
+        Args:
+            fp: Writable text file handle
+            indent: Indentation per nesting level ("" for none)
+            newl: Line separator ("" writes everything on one line)
+        """
+        fp.write(f'<?xml version="1.0" ?>{newl}')
+        fp.write(f"{self._start_tag('timetable', self._timetable_attributes(), False)}{newl}")
+        self._write_section(fp, "rooms", self._iter_rooms(), indent, newl)
+        self._write_section(fp, "classes", self._iter_classes(), indent, newl)
+        # --- Add EMPTY students section ---
+        fp.write(f"{indent}<students/>{newl}")
+        self._write_section(fp, "groupConstraints", self._iter_group_constraints(), indent, newl)
+        fp.write(f"</timetable>{newl}")
+
+    def convert_to_file(self, path, indent="  ", newl="\n"):
+        """
+        Writes the XML straight to a file (see write).
+
+        Args:
+            path: Path of the XML file to create
+            indent: Indentation per nesting level ("" for none)
+            newl: Line separator
+        """
+        with open(path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+            self.write(f, indent, newl)
+
+    def convert(self):
+        """
+        Performs the conversion following the research report specification.
+
+        Returns:
+            str: A pretty-printed XML string representing the timetabling problem.
+        """
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+
+def _escape_attribute(value):
+    """Escapes an attribute value the way xml.dom.minidom writes it."""
+    value = str(value)
+    if not any(c in value for c in '&<>"'):
+        return value
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
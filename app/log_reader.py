@@ -0,0 +1,152 @@
+"""
+Incremental reading of solver debug.log files.
+
+Status polls used to read and scan the whole debug.log every time. This module
+keeps, per log file, how far it has been scanned for errors and the first error
+line found, so each poll only reads the bytes written since the previous one.
+Clients page through the log with byte offsets (since_offset) or ask for the
+last N lines (tail), both served with seek-based reads.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Number of log files whose scan state is kept in memory
+LOG_INDEX_CACHE_SIZE = int(os.environ.get("LOG_INDEX_CACHE_SIZE", "256"))
+
+# Block size used when reading a log backwards for tail requests
+_TAIL_BLOCK_SIZE = 8192
+
+
+def is_error_line(line: str) -> bool:
+    """Whether a debug.log line reports an error."""
+    return "ERROR" in line or "Exception" in line or "error" in line.lower()
+
+
+def _decode_lines(data: bytes) -> List[str]:
+    return data.decode('utf-8', errors='replace').splitlines()
+
+
+def _complete_end(data: bytes) -> int:
+    """Length of the part of data that ends with a complete line."""
+    return data.rfind(b"\n") + 1
+
+
+class DebugLogIndex:
+    """Scan state of a single log file: bytes scanned so far and the first error line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.scanned_offset = 0
+        self.error_line: Optional[str] = None
+        self._file_id = None
+        self._lock = threading.Lock()
+
+    def _check_file(self, st: os.stat_result) -> None:
+        """Start over when the file was replaced or truncated."""
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self.scanned_offset:
+            self._file_id = file_id
+            self.scanned_offset = 0
+            self.error_line = None
+
+    def scan(self, include_partial: bool = False) -> Optional[str]:
+        """
+        Scan the bytes appended since the last call for error lines.
+
+        Args:
+            include_partial: Also scan a trailing line without a newline
+                (use once the writer has finished)
+
+        Returns:
+            The first error line of the log, or None
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return self.error_line
+            self._check_file(st)
+            if self.error_line is not None or st.st_size == self.scanned_offset:
+                return self.error_line
+            with open(self.path, 'rb') as f:
+                f.seek(self.scanned_offset)
+                data = f.read(st.st_size - self.scanned_offset)
+            end = len(data) if include_partial else _complete_end(data)
+            for line in _decode_lines(data[:end]):
+                if is_error_line(line):
+                    self.error_line = line
+                    break
+            self.scanned_offset += end
+            return self.error_line
+
+    def read_since(self, offset: int, include_partial: bool = False) -> Tuple[List[str], int]:
+        """
+        Read the lines written from a byte offset on.
+
+        Args:
+            offset: Byte offset to start from (a log_offset returned earlier)
+            include_partial: Also return a trailing line without a newline
+
+        Returns:
+            Tuple of (lines, offset to pass on the next call)
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return [], offset
+        if offset > size:
+            # The log was replaced by a shorter one; start from the beginning
+            offset = 0
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        end = len(data) if include_partial else _complete_end(data)
+        return _decode_lines(data[:end]), offset + end
+
+    def read_tail(self, lines: int, include_partial: bool = False) -> Tuple[List[str], int]:
+        """
+        Read the last lines of the log by seeking backwards from its end.
+
+        Args:
+            lines: Number of lines to return
+            include_partial: Also return a trailing line without a newline
+
+        Returns:
+            Tuple of (lines, offset to pass as since_offset on the next call)
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return [], 0
+        with open(self.path, 'rb') as f:
+            position = size
+            data = b""
+            while position > 0 and data.count(b"\n") <= lines:
+                step = min(_TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        end = len(data) if include_partial else _complete_end(data)
+        result = _decode_lines(data[:end])
+        return (result[-lines:] if lines else []), position + end
+
+
+_indexes: "OrderedDict[str, DebugLogIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_log_index(path: str) -> DebugLogIndex:
+    """Get the cached scan state of a log file (least recently used entries are dropped)."""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = DebugLogIndex(path)
+            _indexes[path] = index
+            while len(_indexes) > LOG_INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(path)
+        return index
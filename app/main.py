@@ -1,12 +1,18 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, Body, Response, Header
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import logging
 import os
 from pathlib import Path 
+from typing import Any, Dict, Optional
 
 from .solver_service import SolverService 
 from .solution_service import SolutionService
-from .models import ProblemSubmission, ProblemResponse, StatusRequest, StatusResponse, SolverStatus, XMLProblemSubmission, SolutionResponse
+from .progress import stream_progress
+from .file_response import file_response, accepts_gzip
+from .conditional import stat_etag, is_not_modified, not_modified_response, validator_headers
+from .models import ProblemSubmission, ProblemResponse, StatusResponse, SolverStatus, SolutionResponse, ValidationResponse
 
 # Configure logging
 logging.basicConfig(
@@ -44,20 +50,53 @@ def get_cpsolver_path():
     env_path = os.environ.get("SOLVER_PATH")
     if env_path:
         path = Path(env_path)
-        logger.info(f"Using cpsolver path from environment: {path}")
+        logger.debug(f"Using cpsolver path from environment: {path}")
         return path
     return None  # Will use default paths in SolverService
 
+# One SolverService per cpsolver path, shared by all requests (status polls and event streams included)
+_solver_services: Dict[str, SolverService] = {}
+
 # Dependency to get SolverService instance
 def get_solver_service():
     cpsolver_path = get_cpsolver_path()
-    return SolverService(cpsolver_path=cpsolver_path)
+    key = str(cpsolver_path)
+    service = _solver_services.get(key)
+    if service is None:
+        service = _solver_services.setdefault(key, SolverService(cpsolver_path=cpsolver_path))
+    return service
 
 # Dependency to get SolutionService instance
 def get_solution_service():
     cpsolver_path = get_cpsolver_path()
     return SolutionService(cpsolver_path=cpsolver_path)
 
+def _raise_for_result(result: Dict[str, Any], context: str, not_found: bool = False) -> None:
+    """
+    Raise the HTTP error for a failed problem submission; do nothing if it succeeded.
+    
+    Args:
+        result: Result of a SolverService submission
+        context: Prefix of the logged error
+        not_found: Answer 404 for errors about an unknown problem (re-solves)
+    """
+    if result["status"] != "error":
+        return
+    logger.error(f"{context}: {result['message']}")
+    if "retry_after" in result:
+        # The solver queue is full: ask the client to come back later
+        raise HTTPException(
+            status_code=429,
+            detail=result["message"],
+            headers={"Retry-After": str(result["retry_after"])}
+        )
+    if "feasibility" in result:
+        # The problem cannot be solved: report why instead of queueing it
+        raise HTTPException(status_code=422, detail=result["feasibility"])
+    if not_found and "not found" in result["message"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    raise HTTPException(status_code=500, detail=result["message"])
+
 # API endpoints for solver operations
 @app.post("/solver/start", tags=["solver"])
 async def start_solver(solver_service: SolverService = Depends(get_solver_service)):
@@ -67,7 +106,7 @@ async def start_solver(solver_service: SolverService = Depends(get_solver_servic
     This endpoint executes the Java command to run the Unitime solver with 
     predefined configuration and data files.
     """
-    result = solver_service.run_test_solver()
+    result = await run_in_threadpool(solver_service.run_test_solver)
     if result["status"] == "error":
         logger.error(f"Solver start error: {result['message']}")
         raise HTTPException(status_code=500, detail=result["message"])
@@ -80,7 +119,7 @@ async def get_solver_status(solver_service: SolverService = Depends(get_solver_s
     
     Returns information about whether the solver is running, completed, or has not been started.
     """
-    return solver_service.get_solver_status()
+    return await run_in_threadpool(solver_service.get_solver_status)
 
 @app.post("/solver/stop", tags=["solver"])
 async def stop_solver(solver_service: SolverService = Depends(get_solver_service)):
@@ -89,7 +128,7 @@ async def stop_solver(solver_service: SolverService = Depends(get_solver_service
     
     This will terminate the solver process if it's currently running.
     """
-    result = solver_service.stop_solver()
+    result = await run_in_threadpool(solver_service.stop_solver)
     if result["status"] == "error":
         logger.error(f"Solver stop error: {result['message']}")
         raise HTTPException(status_code=500, detail=result["message"])
@@ -98,30 +137,82 @@ async def stop_solver(solver_service: SolverService = Depends(get_solver_service
 @app.post("/problems", response_model=ProblemResponse, tags=["problems"])
 async def submit_problem(
     problem: ProblemSubmission,
+    cache: bool = Query(True, description="Reuse the solution of an identical earlier submission; false forces a new solve"),
+    portfolio: int = Query(1, ge=1, description="Number of solver runs with different random seeds; the best solution is kept"),
+    time_limit: Optional[int] = Query(None, ge=1, description="Seconds the solver may run (default: Termination.TimeOut of config.cfg)"),
+    stop_when_complete: Optional[bool] = Query(None, description="Stop as soon as every class is assigned"),
+    decompose: Optional[bool] = Query(None, description="Solve independent parts of the problem (no shared rooms, instructors, constraints or students) in parallel"),
     solver_service: SolverService = Depends(get_solver_service)
 ):
     """
     Submit a new timetabling problem in JSON format.
     
-    The problem will be converted to XML and passed to the solver.
-    Returns a unique ID that can be used to check the status of the problem.
+    The problem will be converted to XML and queued for the solver.
+    Returns a unique ID that can be used to check the status of the problem,
+    or 429 with a Retry-After header when the solver queue is full. A problem that cannot
+    be solved (see /problems/validate) is rejected with 422 and the feasibility report.
+    
+    If an identical problem was solved before, the new problem is completed right away
+    with the cached solution (status "completed"); pass cache=false to solve it again.
+    
+    With portfolio=K, K solver runs with different random seeds are started at once, taking
+    K solver slots (K is capped at SOLVER_MAX_CONCURRENT), and the best solution (fewest unassigned classes, then lowest overall solution value) is
+    kept; all runs stop as soon as one finds a complete solution with a zero penalty.
+    
+    The response includes an estimate: size metrics of the problem (classes, average
+    domain size, constraints, instructor load, ...) and its solve time and memory,
+    predicted from similar past solves. Shorter predicted solves are taken from the
+    queue first, and once similar solves have reported their memory, the solver's
+    heap is sized from the predicted memory.
+    
+    time_limit (seconds) and stop_when_complete override the termination settings of
+    config.cfg for this solve.
+    
+    With decompose=true, a problem made of independent parts (classes that share no rooms,
+    instructors, offerings, group constraints or students) is split, the parts are solved
+    concurrently in separate solver slots, and their solutions are merged into one.
     """
     # Convert the Pydantic model to a dictionary for processing
     problem_data = problem.dict(exclude={"name"})
     
-    # Pass the problem data and optional name to the solver service
-    result = solver_service.solve_problem(problem_data, problem.name)
+    # Pass the problem data and optional name to the solver service. Conversion and
+    # file writes run in the threadpool so they do not block the event loop.
+    result = await run_in_threadpool(solver_service.solve_problem, problem_data, problem.name, cache,
+                                     portfolio=portfolio, time_limit=time_limit,
+                                     stop_when_complete=stop_when_complete, decompose=decompose)
     
-    if result["status"] == "error":
-        logger.error(f"Problem submission error: {result['message']}")
-        raise HTTPException(status_code=500, detail=result["message"])
+    _raise_for_result(result, "Problem submission error")
     
     return ProblemResponse(
         problem_id=result["problem_id"],
         status=SolverStatus(result["status"]),
-        message=result["message"]
+        message=result["message"],
+        estimate=result.get("estimate")
     )
 
+def _solve_options(request: Request) -> Dict[str, Any]:
+    """
+    Read the solve options of an XML submission from its query string.
+    
+    The JSON endpoints declare the same options (cache, portfolio, time_limit,
+    stop_when_complete, decompose) as Query parameters; the XML endpoints read the body
+    themselves, so they parse them here.
+    """
+    params = request.query_params
+    options = {"use_cache": params.get('cache', 'true').lower() not in ('0', 'false', 'no')}
+    try:
+        options["portfolio"] = int(params.get('portfolio', '1'))
+        if 'time_limit' in params:
+            options["time_limit"] = int(params['time_limit'])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="portfolio and time_limit must be whole numbers")
+    if options["portfolio"] < 1 or options.get("time_limit", 1) < 1:
+        raise HTTPException(status_code=400, detail="portfolio and time_limit must be at least 1")
+    for name in ('stop_when_complete', 'decompose'):
+        if name in params:
+            options[name] = params[name].lower() in ('1', 'true', 'yes')
+    return options
+
 @app.post("/problems/xml", response_model=ProblemResponse, tags=["problems"])
 async def submit_problem_xml(
     request: Request,
@@ -132,10 +223,16 @@ async def submit_problem_xml(
     
     The XML is passed directly to the solver without conversion.
     Put the raw XML content directly in the request body with content-type: application/xml.
-    Returns a unique ID that can be used to check the status of the problem.
+    Returns a unique ID that can be used to check the status of the problem,
+    or 429 with a Retry-After header when the solver queue is full. A problem that cannot
+    be solved (see /problems/validate) is rejected with 422 and the feasibility report.
     
     This endpoint is useful when you have already generated a valid UniTime XML format
     and want to bypass the JSON-to-XML conversion process.
+    
+    Identical XML submitted before is answered from the solve cache; pass cache=false
+    to solve it again. Pass portfolio=K to keep the best of K runs with different seeds,
+    and time_limit / stop_when_complete to override the termination settings of config.cfg.
     """
     # Read the XML content directly from the request body
     xml_content = await request.body()
@@ -147,23 +244,148 @@ async def submit_problem_xml(
     
     # Extract optional name from query params if provided
     problem_name = request.query_params.get('name')
+    options = _solve_options(request)
     
     # Pass the XML content and optional name to the solver service
-    result = solver_service.solve_problem_from_xml(xml_content_str, problem_name)
+    result = await run_in_threadpool(solver_service.solve_problem_from_xml, xml_content_str, problem_name, **options)
     
-    if result["status"] == "error":
-        logger.error(f"XML problem submission error: {result['message']}")
+    _raise_for_result(result, "XML problem submission error")
+    
+    return ProblemResponse(
+        problem_id=result["problem_id"],
+        status=SolverStatus(result["status"]),
+        message=result["message"],
+        estimate=result.get("estimate")
+    )
+
+@app.post("/problems/validate", response_model=ValidationResponse, tags=["problems"])
+async def validate_problem(
+    problem: ProblemSubmission,
+    solver_service: SolverService = Depends(get_solver_service)
+):
+    """
+    Check a timetabling problem in JSON format for reasons it cannot be solved, without solving it.
+    
+    The problem is converted to XML and checked for classes without an eligible room (no room
+    is large enough) or without an available time (the instructor is never available), and for
+    classes that must not overlap (same instructor, same only room, required different times or
+    mutually exclusive) but need more time than their available times cover. Returns the report,
+    or 422 with the same report when issues are found. /problems runs the same check before
+    queueing a problem.
+    """
+    problem_data = problem.dict(exclude={"name"})
+    
+    result = await run_in_threadpool(solver_service.validate_problem, problem_data)
+    
+    if "feasibility" not in result:
+        logger.error(f"Problem validation error: {result['message']}")
         raise HTTPException(status_code=500, detail=result["message"])
+    if result["status"] == "error":
+        raise HTTPException(status_code=422, detail=result["feasibility"])
+    
+    return ValidationResponse(**result["feasibility"])
+
+@app.post("/problems/validate/xml", response_model=ValidationResponse, tags=["problems"])
+async def validate_problem_xml(
+    request: Request,
+    solver_service: SolverService = Depends(get_solver_service)
+):
+    """
+    Check a timetabling problem in XML format for reasons it cannot be solved, without solving it.
+    
+    Takes the same body as /problems/xml and runs the checks of /problems/validate.
+    """
+    xml_content = await request.body()
+    xml_content_str = xml_content.decode('utf-8')
+    
+    if not xml_content_str:
+        logger.error("Empty XML content received")
+        raise HTTPException(status_code=400, detail="XML content cannot be empty")
+    
+    result = await run_in_threadpool(solver_service.validate_problem_xml, xml_content_str)
+    
+    if result["status"] == "error":
+        raise HTTPException(status_code=422, detail=result["feasibility"])
+    
+    return ValidationResponse(**result["feasibility"])
+
+@app.post("/problems/{problem_id}/resolve", response_model=ProblemResponse, tags=["problems"])
+async def resolve_problem(
+    problem_id: str,
+    problem: ProblemSubmission,
+    cache: bool = Query(True, description="Reuse the solution of an identical earlier submission; false forces a new solve"),
+    portfolio: int = Query(1, ge=1, description="Number of solver runs with different random seeds; the best solution is kept"),
+    time_limit: Optional[int] = Query(None, ge=1, description="Seconds the solver may run (default: Termination.TimeOut of config.cfg)"),
+    stop_when_complete: Optional[bool] = Query(None, description="Stop as soon as every class is assigned"),
+    decompose: Optional[bool] = Query(None, description="Solve independent parts of the problem (no shared rooms, instructors, constraints or students) in parallel"),
+    solver_service: SolverService = Depends(get_solver_service)
+):
+    """
+    Submit an edited version of a solved problem in JSON format, starting from its solution.
+    
+    The classes of the new problem start at the time and room they had in the solution of
+    problem_id (matched by class name and meeting index), and the solver runs in minimal
+    perturbation mode, so it only repairs the placements the edit broke instead of solving
+    from scratch. Returns a new problem ID, 404 if problem_id has no solution, or 429 with
+    a Retry-After header when the solver queue is full.
+    """
+    problem_data = problem.dict(exclude={"name"})
+    
+    result = await run_in_threadpool(solver_service.solve_problem, problem_data, problem.name, cache, problem_id,
+                                     portfolio=portfolio, time_limit=time_limit,
+                                     stop_when_complete=stop_when_complete, decompose=decompose)
+    
+    _raise_for_result(result, "Problem re-solve error", not_found=True)
+    
+    return ProblemResponse(
+        problem_id=result["problem_id"],
+        status=SolverStatus(result["status"]),
+        message=result["message"],
+        estimate=result.get("estimate")
+    )
+
+@app.post("/problems/{problem_id}/resolve/xml", response_model=ProblemResponse, tags=["problems"])
+async def resolve_problem_xml(
+    problem_id: str,
+    request: Request,
+    solver_service: SolverService = Depends(get_solver_service)
+):
+    """
+    Submit an edited version of a solved problem in XML format, starting from its solution.
+    
+    Classes, times and rooms are matched by ID against the solution of problem_id; matching
+    placements are marked as the initial assignment and the solver runs in minimal
+    perturbation mode. Takes the same body and query parameters as /problems/xml.
+    """
+    xml_content = await request.body()
+    xml_content_str = xml_content.decode('utf-8')
+    
+    if not xml_content_str:
+        logger.error("Empty XML content received")
+        raise HTTPException(status_code=400, detail="XML content cannot be empty")
+    
+    problem_name = request.query_params.get('name')
+    options = _solve_options(request)
+    
+    result = await run_in_threadpool(solver_service.solve_problem_from_xml, xml_content_str, problem_name,
+                                     warm_start_from=problem_id, **options)
+    
+    _raise_for_result(result, "XML problem re-solve error", not_found=True)
     
     return ProblemResponse(
         problem_id=result["problem_id"],
         status=SolverStatus(result["status"]),
-        message=result["message"]
+        message=result["message"],
+        estimate=result.get("estimate")
     )
 
 @app.get("/problems/{problem_id}", response_model=StatusResponse, tags=["problems"])
 async def get_problem(
     problem_id: str,
+    request: Request,
+    response: Response,
+    since_offset: Optional[int] = Query(None, ge=0, description="Only return debug.log lines from this byte offset on (the log_offset of the previous poll)"),
+    tail: Optional[int] = Query(None, ge=0, description="Only return the last N lines of debug.log"),
     solver_service: SolverService = Depends(get_solver_service)
 ):
     """
@@ -171,8 +393,18 @@ async def get_problem(
     
     Returns the current status of the problem solving process, whether a solution is available,
     and the contents of the debug.log file if it exists.
+    
+    Clients that poll should pass the returned log_offset back as since_offset, so that
+    each poll only returns the log lines written since the previous one.
+    
+    Responses carry an ETag; polls sending it back in If-None-Match get 304 Not Modified
+    while the job state, debug.log and solver output are unchanged.
     """
-    result = solver_service.get_problem_status(problem_id)
+    etag = await run_in_threadpool(solver_service.get_problem_status_etag, problem_id)
+    if etag is not None and is_not_modified(request, etag):
+        return not_modified_response(etag, headers={"cache-control": "no-cache"})
+    
+    result = await run_in_threadpool(solver_service.get_problem_status, problem_id, since_offset, tail)
     
     # Only raise HTTP exception if the problem is not found
     if result["status"] == "error" and "not found" in result["message"]:
@@ -183,17 +415,61 @@ async def get_problem(
     # Ensure debug_log preserves formatting if it exists
     debug_log = result.get("debug_log")
     
+    if etag is not None:
+        # Clients may keep the response but have to revalidate it on every poll
+        response.headers["etag"] = etag
+        response.headers["cache-control"] = "no-cache"
+    
     return StatusResponse(
         problem_id=result["problem_id"],
         status=SolverStatus(result["status"]),
         message=result["message"],
         solution_available=result["solution_available"],
-        debug_log=debug_log
+        debug_log=debug_log,
+        log_offset=result.get("log_offset"),
+        output_offset=result.get("output_offset"),
+        snapshots=result.get("snapshots")
+    )
+
+@app.get("/problems/{problem_id}/events", tags=["problems"])
+async def get_problem_events(
+    problem_id: str,
+    since_offset: int = Query(0, ge=0, description="debug.log byte offset to start from"),
+    last_event_id: Optional[str] = Header(None),
+    solver_service: SolverService = Depends(get_solver_service)
+):
+    """
+    Stream the progress of a problem as Server-Sent Events (text/event-stream).
+    
+    Events:
+    - status: the job state changed (queued, running, ...)
+    - phase: the solver started another phase
+    - progress: a cpsolver info block (iteration, assigned variables, overall solution value,
+      speed in it/s, memory usage, ...)
+    - best: a new best solution was found
+    - complete: the solver has finished; the stream ends after this event
+    
+    Event ids are debug.log offsets, so reconnecting clients resume where they left off
+    through the Last-Event-ID header.
+    """
+    result = await run_in_threadpool(solver_service.get_problem_status, problem_id, None, 0)
+    if result["status"] == "error" and "not found" in result["message"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    
+    if last_event_id and last_event_id.isdigit():
+        since_offset = int(last_event_id)
+    
+    return StreamingResponse(
+        stream_progress(solver_service, problem_id, since_offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @app.get("/problems/{problem_id}/solution", response_model=SolutionResponse, tags=["problems"])
 async def get_problem_solution(
     problem_id: str,
+    request: Request,
+    response: Response,
     solution_service: SolutionService = Depends(get_solution_service)
 ):
     """
@@ -202,17 +478,34 @@ async def get_problem_solution(
     Returns the solution data as a structured JSON object with class assignments,
     room assignments, and time assignments.
     
-    If no solution is available, a 404 error is returned.
+    The ETag and Last-Modified headers follow solution.xml, so If-None-Match or
+    If-Modified-Since requests for an unchanged solution get 304 Not Modified.
+    
+    While the solver is still running, the best solution it has found so far is
+    returned once it has saved a snapshot (see SOLVER_SNAPSHOT_INTERVAL), with
+    "snapshot": true in the solution info. Only the jpype engine saves snapshots;
+    the status of a running problem tells with "snapshots" whether to expect one.
+    
+    If no solution is available, a 404 error is returned, whose detail says
+    whether the problem is still being solved.
     """
-    json_solution = solution_service.get_solution_json(problem_id)
+    stat_result = await run_in_threadpool(solution_service.get_solution_stat, problem_id)
+    if stat_result is not None:
+        etag = stat_etag(stat_result, "json")
+        if is_not_modified(request, etag, stat_result.st_mtime):
+            return not_modified_response(etag, stat_result.st_mtime)
+        response.headers.update(validator_headers(etag, stat_result.st_mtime))
+    
+    json_solution = await run_in_threadpool(solution_service.get_solution_json, problem_id)
     if not json_solution:
-        raise HTTPException(status_code=404, detail=f"No solution found for problem {problem_id}")
+        raise HTTPException(status_code=404, detail=solution_service.get_missing_solution_message(problem_id))
     
     return json_solution
 
 @app.get("/problems/{problem_id}/solution/xml", tags=["problems"])
 async def get_problem_solution_xml(
     problem_id: str,
+    request: Request,
     solution_service: SolutionService = Depends(get_solution_service)
 ):
     """
@@ -221,16 +514,20 @@ async def get_problem_solution_xml(
     Returns the raw XML solution as generated by the solver.
     This endpoint is useful for systems that need the original XML format.
     
+    The file is streamed from disk with a Content-Length. Single byte ranges
+    (Range: bytes=...) are answered with 206, and clients sending
+    Accept-Encoding: gzip get the precompressed solution.xml.gz. Requests with
+    a matching If-None-Match or If-Modified-Since get 304 Not Modified.
+    
     If no solution is available, a 404 error is returned.
     """
-    xml_solution = solution_service.get_solution_xml(problem_id)
-    if not xml_solution:
-        raise HTTPException(status_code=404, detail=f"No solution found for problem {problem_id}")
+    wants_gzip = accepts_gzip(request) and "range" not in request.headers
+    solution_file = await run_in_threadpool(solution_service.get_solution_file, problem_id, wants_gzip)
+    if not solution_file:
+        raise HTTPException(status_code=404, detail=solution_service.get_missing_solution_message(problem_id))
     
-    return Response(
-        content=xml_solution,
-        media_type="application/xml"
-    )
+    solution_path, gz_path = solution_file
+    return file_response(request, solution_path, "application/xml", gz_path)
 
 @app.delete("/problems/{problem_id}", tags=["problems"])
 async def cancel_problem(
@@ -242,7 +539,7 @@ async def cancel_problem(
     
     This will terminate the solver process for the specified problem if it's currently running.
     """
-    result = solver_service.stop_problem_solver(problem_id)
+    result = await run_in_threadpool(solver_service.stop_problem_solver, problem_id)
     
     if result["status"] == "error":
         logger.error(f"Problem solver cancellation error: {result['message']}")
@@ -21,6 +21,7 @@ from pydantic import BaseModel, Field
 class SolverStatus(str, Enum):
     """Enum for the status of the solver process."""
     not_started = "not_started"
+    queued = "queued"
     started = "started"
     running = "running"
     completed = "completed"
@@ -49,6 +50,7 @@ class ProblemResponse(BaseModel):
     problem_id: str = Field(..., description="Unique ID for the submitted problem")
     status: SolverStatus = Field(..., description="Current status of the solver")
     message: str = Field(..., description="Additional information about the problem submission")
+    estimate: Optional[Dict[str, Any]] = Field(None, description="Size metrics of the problem with its predicted solve time (predicted_seconds), memory (predicted_memory_mb) and solver heap")
 
 class StatusRequest(BaseModel):
     """Request model for checking problem status"""
@@ -61,6 +63,9 @@ class StatusResponse(BaseModel):
     message: str = Field(..., description="Additional information about the problem status")
     solution_available: bool = Field(..., description="Whether a solution is available")
     debug_log: Optional[List[str]] = Field(None, description="Contents of the debug.log file as lines if available")
+    log_offset: Optional[int] = Field(None, description="Byte offset in debug.log after the returned lines; pass it as since_offset on the next poll")
+    output_offset: Optional[int] = Field(None, description="Bytes of solver console output (stdout.log) written so far")
+    snapshots: Optional[bool] = Field(None, description="For a running solve, whether it saves best-so-far snapshots that the solution endpoints serve (jpype engine only)")
     
     class Config:
         """Configuration for the StatusResponse model"""
@@ -108,6 +113,15 @@ class SolutionResponse(BaseModel):
         """Configuration for the SolutionResponse model"""
         arbitrary_types_allowed = True
 
+class ValidationResponse(BaseModel):
+    """Response model for the pre-solve feasibility check"""
+    feasible: bool = Field(..., description="Whether no reason was found why the problem cannot be solved")
+    message: str = Field(..., description="Summary of the check")
+    issues: List[Dict[str, Any]] = Field(default_factory=list, description="Classes or sets of classes that cannot be placed, each with type, classes and message")
+    issue_count: int = Field(0, description="Number of issues found (issues lists at most FEASIBILITY_MAX_ISSUES)")
+    classes: int = Field(0, description="Number of classes checked")
+    elapsed_ms: float = Field(0, description="Duration of the check in milliseconds")
+
 # TODO: Define solver request models
 
 # TODO: Define solver response models
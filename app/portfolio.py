@@ -0,0 +1,280 @@
+"""
+Portfolio solving: several solver runs of one problem, keeping the best result.
+
+cpsolver's search is stochastic, and a single run can get stuck in a poor local
+optimum. A portfolio starts K runs of the same problem at once, each with its
+own General.Seed, in folders <problem>/portfolio/run<N>. While they run, their
+debug.log progress is followed; as soon as one run reports a complete solution
+whose overall value is at or below PORTFOLIO_TARGET_VALUE, all runs are asked
+to stop (each still saves its best solution). Once every run has exited, the
+saved solutions are ranked by unassigned classes, then by "Overall solution
+value" from their <!--Solution Info:--> comment, and the files of the best run
+are moved up into the problem folder, where a single solve would have put them.
+
+SolverPortfolio has the Popen-like interface of the engine handles (pid, poll,
+wait, terminate, kill), so the rest of the service treats it like one solve.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .progress import ProgressParser, summarize_info
+from .log_reader import get_log_index
+from .solver_engine import find_log_dir, collect_output, SOLVER_MAIN_CLASS
+
+# Portfolio limits, configurable through the environment
+PORTFOLIO_MAX_SIZE = int(os.environ.get("PORTFOLIO_MAX_SIZE", str(os.cpu_count() or 1)))
+PORTFOLIO_TARGET_VALUE = float(os.environ.get("PORTFOLIO_TARGET_VALUE", "0"))
+PORTFOLIO_POLL_INTERVAL = float(os.environ.get("PORTFOLIO_POLL_INTERVAL", "1.0"))
+
+PORTFOLIO_DIR = "portfolio"
+PORTFOLIO_SUMMARY_FILE = "portfolio.json"
+
+# The <!--Solution Info:--> comment is written right after the XML declaration
+_HEADER_BYTES = 64 * 1024
+_SOLUTION_INFO_RE = re.compile(r'<!--Solution Info:(.*?)-->', re.DOTALL)
+
+logger = logging.getLogger("portfolio")
+
+
+def portfolio_run_dir(problem_dir: str, index: int) -> str:
+    """Output folder of run `index` (0-based) of a portfolio."""
+    return os.path.join(problem_dir, PORTFOLIO_DIR, f"run{index + 1}")
+
+
+def read_solution_info(solution_path: str) -> Optional[Dict[str, str]]:
+    """
+    Read the "Key: value" lines of the <!--Solution Info:--> comment of a solution.xml.
+
+    Returns:
+        Dictionary of the lines, or None if the file does not exist or has no solution info
+    """
+    try:
+        with open(solution_path, 'r', encoding='utf-8', errors='replace') as f:
+            header = f.read(_HEADER_BYTES)
+    except OSError:
+        return None
+    match = _SOLUTION_INFO_RE.search(header)
+    if not match:
+        return None
+    info = {}
+    for line in match.group(1).splitlines():
+        if ':' in line:
+            key, value = line.split(':', 1)
+            info[key.strip()] = value.strip()
+    return info
+
+
+def read_solution_summary(solution_path: str) -> Optional[Dict]:
+    """
+    Read the figures of the <!--Solution Info:--> comment of a solution.xml.
+
+    Returns:
+        Dictionary as returned by progress.summarize_info, or None if the file
+        does not exist or has no solution info
+    """
+    info = read_solution_info(solution_path)
+    return summarize_info(info) if info is not None else None
+
+
+def solution_rank(summary: Optional[Dict]) -> Tuple[float, float]:
+    """Sort key of a solution: unassigned classes first, then overall solution value (lower is better)."""
+    if not summary:
+        return float("inf"), float("inf")
+    unassigned = summary.get("total_variables", 0) - summary.get("assigned_variables", 0)
+    value = summary.get("overall_solution_value")
+    return unassigned, value if value is not None else float("inf")
+
+
+def reaches_target(summary: Dict, target: float = PORTFOLIO_TARGET_VALUE) -> bool:
+    """Whether a progress summary reports a complete solution that is good enough to stop the portfolio."""
+    total = summary.get("total_variables")
+    value = summary.get("overall_solution_value")
+    return bool(total) and summary.get("assigned_variables") == total and value is not None and value <= target
+
+
+class _PortfolioRun:
+    """One solver run of a portfolio and the progress read from its log so far."""
+
+    def __init__(self, index: int, seed: int, output_dir: str):
+        self.index = index
+        self.seed = seed
+        self.output_dir = output_dir
+        self.process = None
+        self.parser = ProgressParser()
+        self.log_offset = 0
+        self.summary: Optional[Dict] = None
+
+    def read_progress(self) -> Optional[Dict]:
+        """Feed the debug.log lines written since the last call to the parser; returns the latest summary."""
+        log_path = os.path.join(find_log_dir(self.output_dir), "debug.log")
+        if not os.path.exists(log_path):
+            return self.summary
+        lines, self.log_offset = get_log_index(log_path).read_since(self.log_offset)
+        for event in self.parser.feed(lines):
+            if event["event"] == "progress" and "overall_solution_value" in event:
+                self.summary = event
+        return self.summary
+
+
+class SolverPortfolio:
+    """K solver runs of one problem, started, stopped and settled as one solve."""
+
+    def __init__(self, engine, config_path: str, input_path: str, problem_dir: str, size: int,
+                 overrides: Optional[Dict[str, str]] = None, target_value: float = PORTFOLIO_TARGET_VALUE,
+                 max_heap: Optional[str] = None):
+        """
+        Args:
+            engine: Solver engine that starts the runs (see solver_engine)
+            config_path: Path to the solver configuration file
+            input_path: Path to the problem XML file, shared by all runs
+            problem_dir: Output folder of the problem; receives the files of the best run
+            size: Number of runs
+            overrides: Solver properties set on top of config.cfg for every run
+            target_value: Stop all runs once one has a complete solution with at most this value
+            max_heap: Heap limit of each run (see the engine's start)
+        """
+        self.engine = engine
+        self.config_path = config_path
+        self.input_path = input_path
+        self.problem_dir = problem_dir
+        self.overrides = dict(overrides or {})
+        self.target_value = target_value
+        self.max_heap = max_heap
+        self.runs = [_PortfolioRun(i, i + 1, portfolio_run_dir(problem_dir, i)) for i in range(max(1, size))]
+        self.returncode = None
+        self.stopped_early = False
+        self.best: Optional[_PortfolioRun] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.runs[0].process.pid if self.runs[0].process is not None else None
+
+    def start(self) -> "SolverPortfolio":
+        """Start all runs; if one cannot be started, the ones already running are stopped."""
+        try:
+            for run in self.runs:
+                overrides = dict(self.overrides)
+                overrides["General.Seed"] = str(run.seed)
+                run.process = self.engine.start(self.config_path, self.input_path, run.output_dir, overrides,
+                                                self.max_heap)
+        except Exception:
+            self.kill()
+            raise
+        logger.info(f"Started a portfolio of {len(self.runs)} runs for {self.input_path}")
+        return self
+
+    def _processes(self) -> List:
+        return [run.process for run in self.runs if run.process is not None]
+
+    def poll(self) -> Optional[int]:
+        if any(process.poll() is None for process in self._processes()):
+            return None
+        return self._settle()
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """
+        Wait for all runs to exit, stopping them early once one reaches the target value.
+
+        Raises:
+            subprocess.TimeoutExpired: If the runs are still going after timeout seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(process.poll() is None for process in self._processes()):
+            if not self.stopped_early:
+                self._check_progress()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(SOLVER_MAIN_CLASS, timeout)
+            time.sleep(PORTFOLIO_POLL_INTERVAL if deadline is None
+                       else max(0.0, min(PORTFOLIO_POLL_INTERVAL, deadline - time.monotonic())))
+        return self._settle()
+
+    def terminate(self) -> None:
+        """Ask every run to stop; each still saves the best solution it found."""
+        for process in self._processes():
+            if process.poll() is None:
+                process.terminate()
+
+    def kill(self) -> None:
+        for process in self._processes():
+            if process.poll() is None:
+                process.kill()
+
+    def _check_progress(self) -> None:
+        for run in self.runs:
+            try:
+                summary = run.read_progress()
+            except OSError:
+                continue
+            if summary is not None and reaches_target(summary, self.target_value):
+                logger.info(f"Portfolio run {run.index + 1} (seed {run.seed}) reached value "
+                            f"{summary['overall_solution_value']}; stopping the other runs")
+                self.stopped_early = True
+                self.terminate()
+                return
+
+    def _settle(self) -> int:
+        """
+        Pick the best saved solution once all runs have exited (only the first call does the work).
+
+        The files of the best run (solution.xml, debug.log, stat.csv, console output, ...)
+        are moved into the problem folder, and portfolio.json records every run's result.
+
+        Returns:
+            0 if a solution was published, otherwise the exit code of the first failed run
+        """
+        with self._lock:
+            if self.returncode is not None:
+                return self.returncode
+            results = []
+            for run in self.runs:
+                collect_output(run.output_dir)
+                summary = read_solution_summary(os.path.join(run.output_dir, "solution.xml"))
+                exit_code = run.process.poll() if run.process is not None else None
+                results.append({
+                    "run": run.index + 1,
+                    "seed": run.seed,
+                    "exit_code": exit_code,
+                    "solution_available": summary is not None,
+                    "assigned_variables": (summary or {}).get("assigned_variables"),
+                    "total_variables": (summary or {}).get("total_variables"),
+                    "overall_solution_value": (summary or {}).get("overall_solution_value")
+                })
+                if summary is None:
+                    continue
+                run.summary = summary
+                if self.best is None or solution_rank(summary) < solution_rank(self.best.summary):
+                    self.best = run
+
+            if self.best is not None:
+                for name in os.listdir(self.best.output_dir):
+                    os.replace(os.path.join(self.best.output_dir, name), os.path.join(self.problem_dir, name))
+                self.returncode = 0
+            else:
+                self.returncode = next((r["exit_code"] for r in results if r["exit_code"]), 1)
+
+            try:
+                with open(os.path.join(self.problem_dir, PORTFOLIO_SUMMARY_FILE), 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "best_run": self.best.index + 1 if self.best is not None else None,
+                        "stopped_early": self.stopped_early,
+                        "runs": results
+                    }, f, indent=2)
+            except OSError as e:
+                logger.warning(f"Could not write portfolio summary: {e}")
+            return self.returncode
+
+    def describe(self) -> str:
+        """One line about the outcome, for the job message."""
+        if self.best is None:
+            return f"none of the {len(self.runs)} portfolio runs produced a solution"
+        value = self.best.summary.get("overall_solution_value")
+        early = ", stopped early" if self.stopped_early else ""
+        return f"best of {len(self.runs)} runs: run {self.best.index + 1}, seed {self.best.seed}, value {value}{early}"
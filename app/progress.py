@@ -0,0 +1,221 @@
+"""
+Structured progress events for running solves.
+
+cpsolver reports progress in debug.log as info blocks such as
+
+    16-Mar-25 22:04:12.016 [Solver] INFO  solver.Solver> Initial solution:[
+        Assigned variables: 0.00% (0/2)
+        Iteration: 0
+        Memory usage: 5.69M
+        Overall solution value: 0.00
+      ]
+
+plus `**BEST[iteration]**` lines whenever a new best solution is saved and
+`util.Progress> [phase ...]` lines when the solver moves on to another phase.
+ProgressParser turns those lines into event dictionaries, and stream_progress
+pushes them to clients as Server-Sent Events, so frontends no longer need to
+poll GET /problems/{id} and re-download the log.
+"""
+
+import os
+import re
+import json
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+# How often the log of a running solve is checked for new lines, in seconds
+PROGRESS_POLL_INTERVAL = float(os.environ.get("PROGRESS_POLL_INTERVAL", "1.0"))
+
+# Seconds between keep-alive comments on an idle stream
+PROGRESS_KEEPALIVE_INTERVAL = float(os.environ.get("PROGRESS_KEEPALIVE_INTERVAL", "15"))
+
+# "16-Mar-25 22:04:12.016 [Solver] INFO  solver.Solver> Initial solution:["
+_LINE_RE = re.compile(r'^(?P<timestamp>\S+ \S+) \[(?P<thread>[^\]]*)\] (?P<level>\w+)\s+(?P<logger>\S+)> (?P<message>.*)$')
+_BLOCK_START_RE = re.compile(r'^(?P<title>[^:\[]+?):\s*\[$')
+_BEST_RE = re.compile(r'^\*\*BEST\[(?P<iteration>\d+)\]\*\*\s*(?P<summary>.*)$')
+_PHASE_RE = re.compile(r'^\[(?P<phase>.*?)\s*(?:\.\.\.)?\]$')
+_ASSIGNED_RE = re.compile(r'^(?P<percent>[0-9.]+)%\s*\((?P<assigned>\d+)/(?P<total>\d+)\)')
+_NUMBER_RE = re.compile(r'^-?[0-9]+(?:\.[0-9]+)?')
+_MEMORY_RE = re.compile(r'^(?P<value>[0-9.]+)\s*(?P<unit>[KMG])', re.IGNORECASE)
+
+_MEMORY_UNITS_MB = {"K": 1.0 / 1024, "M": 1.0, "G": 1024.0}
+
+
+def _number(value: str) -> Optional[float]:
+    match = _NUMBER_RE.match(value)
+    return float(match.group(0)) if match else None
+
+
+def summarize_info(info: Dict[str, str]) -> Dict:
+    """
+    Pick the commonly used figures out of a cpsolver info block.
+
+    Args:
+        info: The "Key: value" pairs of the block
+
+    Returns:
+        Dictionary with iteration, assigned_variables, total_variables,
+        assigned_percent, overall_solution_value, speed (it/s), memory_mb and
+        time_min, each present only when the block reports it
+    """
+    summary = {}
+    if "Iteration" in info and _number(info["Iteration"]) is not None:
+        summary["iteration"] = int(_number(info["Iteration"]))
+    match = _ASSIGNED_RE.match(info.get("Assigned variables", ""))
+    if match:
+        summary["assigned_variables"] = int(match.group("assigned"))
+        summary["total_variables"] = int(match.group("total"))
+        summary["assigned_percent"] = float(match.group("percent"))
+    if "Overall solution value" in info:
+        summary["overall_solution_value"] = _number(info["Overall solution value"])
+    if "Speed" in info:
+        summary["speed"] = _number(info["Speed"])
+    match = _MEMORY_RE.match(info.get("Memory usage", ""))
+    if match:
+        summary["memory_mb"] = round(float(match.group("value")) * _MEMORY_UNITS_MB[match.group("unit").upper()], 2)
+    if "Time" in info:
+        summary["time_min"] = _number(info["Time"])
+    return summary
+
+
+class ProgressParser:
+    """Turns debug.log lines into progress events; feed lines in the order they were written."""
+
+    def __init__(self):
+        self._block = None
+
+    @property
+    def in_block(self) -> bool:
+        """Whether the parser is in the middle of an info block."""
+        return self._block is not None
+
+    def feed(self, lines: List[str]) -> List[Dict]:
+        """
+        Parse more log lines.
+
+        Returns:
+            Events completed by these lines. Each event has an "event" key:
+            "progress" (an info block), "best" (a new best solution) or "phase"
+        """
+        events = []
+        for line in lines:
+            if self._block is not None:
+                stripped = line.strip()
+                if stripped == "]":
+                    events.append(self._finish_block())
+                    continue
+                if not _LINE_RE.match(line):
+                    if ":" in stripped:
+                        key, value = stripped.split(":", 1)
+                        self._block["info"][key.strip()] = value.strip().rstrip(",")
+                    continue
+                # The block was cut short; report what was read and parse this line normally
+                events.append(self._finish_block())
+
+            match = _LINE_RE.match(line)
+            if not match:
+                continue
+            message = match.group("message").strip()
+
+            block = _BLOCK_START_RE.match(message)
+            if block:
+                self._block = {"title": block.group("title").strip(), "timestamp": match.group("timestamp"), "info": {}}
+                continue
+            best = _BEST_RE.match(message)
+            if best:
+                events.append({
+                    "event": "best",
+                    "timestamp": match.group("timestamp"),
+                    "iteration": int(best.group("iteration")),
+                    "summary": best.group("summary")
+                })
+                continue
+            if match.group("logger").endswith("Progress"):
+                phase = _PHASE_RE.match(message)
+                if phase:
+                    events.append({
+                        "event": "phase",
+                        "timestamp": match.group("timestamp"),
+                        "phase": phase.group("phase")
+                    })
+        return events
+
+    def _finish_block(self) -> Dict:
+        block, self._block = self._block, None
+        event = {"event": "progress", "title": block["title"], "timestamp": block["timestamp"]}
+        event.update(summarize_info(block["info"]))
+        event["info"] = block["info"]
+        return event
+
+
+def format_sse(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream_progress(solver_service, problem_id: str, since_offset: int = 0,
+                          poll_interval: float = PROGRESS_POLL_INTERVAL) -> AsyncIterator[str]:
+    """
+    Stream the progress of a problem as Server-Sent Events.
+
+    New debug.log lines are read from the last offset on every poll interval
+    (see SolverService.get_problem_status), so each tick only costs the bytes
+    written since the previous one. Event ids are debug.log byte offsets, so a
+    reconnecting client can resume with the Last-Event-ID header. A "status"
+    event is sent whenever the job state changes, and a final "complete" event
+    once the solver has finished, after which the stream ends.
+
+    Args:
+        solver_service: SolverService used to read the job status and log
+        problem_id: ID of the problem to follow
+        since_offset: debug.log byte offset to start from
+        poll_interval: Seconds between checks for new log lines
+
+    Yields:
+        Formatted Server-Sent Events
+    """
+    parser = ProgressParser()
+    offset = since_offset
+    last_status = None
+    idle = 0.0
+
+    while True:
+        result = await run_in_threadpool(solver_service.get_problem_status, problem_id, offset)
+        status = result["status"]
+        lines = result.get("debug_log") or []
+        if result.get("log_offset") is not None:
+            offset = result["log_offset"]
+
+        sent = False
+        events = parser.feed(lines)
+        for i, event in enumerate(events):
+            # Resuming is only safe from an offset outside of an info block
+            last = i == len(events) - 1 and not parser.in_block
+            yield format_sse(event.pop("event"), event, offset if last else None)
+            sent = True
+
+        if status != last_status:
+            last_status = status
+            yield format_sse("status", {"status": status, "message": result["message"]})
+            sent = True
+
+        if status not in ("queued", "running"):
+            yield format_sse("complete", {
+                "status": status,
+                "message": result["message"],
+                "solution_available": result.get("solution_available", False)
+            }, offset)
+            return
+
+        idle = 0.0 if sent else idle + poll_interval
+        if idle >= PROGRESS_KEEPALIVE_INTERVAL:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,149 @@
+"""
+Process-wide cache of solutions converted to JSON.
+
+A finished solution.xml never changes, yet every GET /problems/{id}/solution
+used to re-read and re-parse it. The cache keeps converted solutions in memory
+(least recently used first out, bounded by entry count and total size) and can
+persist them as solution.json next to solution.xml, so they survive restarts.
+Entries are validated against the mtime and size of solution.xml, so a
+rewritten solution is converted again.
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Cache bounds and persistence, configurable through the environment
+SOLUTION_CACHE_ENTRIES = int(os.environ.get("SOLUTION_CACHE_ENTRIES", "64"))
+SOLUTION_CACHE_MAX_BYTES = int(os.environ.get("SOLUTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SOLUTION_CACHE_PERSIST = os.environ.get("SOLUTION_CACHE_PERSIST", "true").lower() in ("1", "true", "yes")
+
+# Name of the persisted JSON file, next to solution.xml
+SOLUTION_JSON_FILE = "solution.json"
+
+logger = logging.getLogger("solution_cache")
+
+
+class SolutionCache:
+    """LRU cache of converted solutions keyed by the path of their solution.xml."""
+
+    def __init__(self, max_entries: int = SOLUTION_CACHE_ENTRIES, max_bytes: int = SOLUTION_CACHE_MAX_BYTES,
+                 persist: bool = SOLUTION_CACHE_PERSIST):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.persist = persist
+        # path -> (mtime_ns, size, solution, approximate size in bytes)
+        self._entries: "OrderedDict[str, Tuple[int, int, Dict, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, solution_path: str, convert: Callable[[], Optional[Dict]],
+            persist: bool = True) -> Optional[Dict]:
+        """
+        Get the converted solution for a solution.xml file.
+
+        Args:
+            solution_path: Path of the solution.xml file
+            convert: Converts solution.xml to JSON; called only on a cache miss.
+                Results with an "error" key are returned but not cached.
+            persist: Whether solution.json may be used for this file (off for
+                snapshots, which are replaced while the solver runs)
+
+        Returns:
+            The converted solution, or None if solution.xml does not exist
+        """
+        try:
+            st = os.stat(solution_path)
+        except OSError:
+            self.invalidate(solution_path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(solution_path)
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(solution_path)
+                return entry[2]
+
+        solution = self._load_persisted(solution_path, st) if persist else None
+        if solution is None:
+            solution = convert()
+            if not solution or solution.get("error"):
+                return solution
+            if persist:
+                self._persist(solution_path, st, solution)
+
+        self._store(solution_path, st, solution)
+        return solution
+
+    def invalidate(self, solution_path: str) -> None:
+        """Drop the cached solution for a solution.xml file."""
+        with self._lock:
+            entry = self._entries.pop(solution_path, None)
+            if entry is not None:
+                self._bytes -= entry[3]
+
+    def _store(self, solution_path: str, st: os.stat_result, solution: Dict) -> None:
+        # The size of the XML is a cheap, stable estimate of the size of the parsed result
+        size = st.st_size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(solution_path, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._entries[solution_path] = (st.st_mtime_ns, st.st_size, solution, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[3]
+
+    def _json_path(self, solution_path: str) -> str:
+        return os.path.join(os.path.dirname(solution_path), SOLUTION_JSON_FILE)
+
+    def _load_persisted(self, solution_path: str, st: os.stat_result) -> Optional[Dict]:
+        """Load solution.json if it was written for the current solution.xml."""
+        if not self.persist:
+            return None
+        json_path = self._json_path(solution_path)
+        try:
+            # solution.json carries the mtime of the solution.xml it was converted from
+            if os.stat(json_path).st_mtime_ns != st.st_mtime_ns:
+                return None
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _persist(self, solution_path: str, st: os.stat_result, solution: Dict) -> None:
+        if not self.persist:
+            return
+        json_path = self._json_path(solution_path)
+        tmp_path = f"{json_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(solution, f)
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(tmp_path, json_path)
+        except OSError as e:
+            logger.warning(f"Could not write {json_path}: {e}")
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate size of the cached solutions."""
+        with self._lock:
+            return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_cache = SolutionCache()
+
+
+def get_solution_cache() -> SolutionCache:
+    """Get the process-wide solution cache."""
+    return _cache
@@ -11,19 +11,74 @@ import os
 import logging
 import xml.etree.ElementTree as ET
 import re
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 # Import configuration constants from solver_service
-from .solver_service import CPSOLVER_PATH
+from .solver_service import CPSOLVER_PATH, serves_snapshots
+from .job_registry import get_job_registry
+from .solution_cache import get_solution_cache
+from .file_response import precompressed_path
+from .solver_engine import SNAPSHOT_FILE, get_solver_engine
+
+# Create solution.xml.gz on the first request from a client that accepts gzip
+SOLUTION_PRECOMPRESS = os.environ.get("SOLUTION_PRECOMPRESS", "true").lower() in ("1", "true", "yes")
 
 class SolutionService:
     """Service for retrieving and converting solver solutions."""
     
     def __init__(self, cpsolver_path=None):
         """Initialize the solution service with the path to the cpsolver directory."""
-        self.cpsolver_path = cpsolver_path or CPSOLVER_PATH
+        # Always work with an absolute path, so results do not depend on the process cwd
+        self.cpsolver_path = os.path.abspath(cpsolver_path or CPSOLVER_PATH)
         self.logger = logging.getLogger("solution_service")
     
+    def get_problem_dir(self, problem_id: str) -> str:
+        """
+        Get the output directory of a problem.
+        
+        Jobs known to the job registry may use a different output folder than
+        their problem ID; anything else is looked up in solved_output directly.
+        """
+        record = get_job_registry().get(problem_id)
+        if record is not None and record.problem_dir:
+            return record.problem_dir
+        return os.path.join(self.cpsolver_path, "solved_output", problem_id)
+    
+    def get_solution_path(self, problem_id: str) -> str:
+        """
+        Get the path of the solution file to serve for a problem.
+        
+        This is solution.xml, or, while the solver is still running and has saved
+        one, the best-so-far snapshot.xml.
+        """
+        problem_dir = self.get_problem_dir(problem_id)
+        solution_path = os.path.join(problem_dir, "solution.xml")
+        if not os.path.exists(solution_path):
+            snapshot_path = os.path.join(problem_dir, SNAPSHOT_FILE)
+            if os.path.exists(snapshot_path):
+                return snapshot_path
+        return solution_path
+    
+    def get_missing_solution_message(self, problem_id: str) -> str:
+        """
+        Explain why a problem has no solution to serve, for the 404 of the solution endpoints.
+        
+        Args:
+            problem_id: The unique identifier of the problem
+            
+        Returns:
+            The message; for a running solve it says whether a best-so-far snapshot can be expected
+        """
+        record = get_job_registry().get(problem_id)
+        if record is None or not record.is_active:
+            return f"No solution found for problem {problem_id}"
+        if record.state == "queued":
+            return f"Problem {problem_id} is queued for solving and has no solution yet"
+        if not serves_snapshots(get_solver_engine(self.cpsolver_path), record):
+            return (f"Problem {problem_id} is still being solved without best-so-far snapshots; "
+                    f"its solution is available once the solve finishes or is stopped")
+        return f"Problem {problem_id} is still being solved and has not saved a snapshot yet"
+    
     def get_solution_xml(self, problem_id: str) -> Optional[str]:
         """
         Get the raw XML solution for a problem.
@@ -34,7 +89,7 @@ class SolutionService:
         Returns:
             The raw XML content of the solution file, or None if no solution exists
         """
-        solution_path = os.path.join(self.cpsolver_path, "solved_output", problem_id, "solution.xml")
+        solution_path = self.get_solution_path(problem_id)
         if not os.path.exists(solution_path):
             self.logger.warning(f"Solution file not found for problem {problem_id}")
             return None
@@ -46,6 +101,43 @@ class SolutionService:
             self.logger.error(f"Error reading solution file for problem {problem_id}: {e}")
             return None
     
+    def get_solution_file(self, problem_id: str, gzip_variant: bool = False) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Get the path of a problem's solution.xml, for serving it straight from disk.
+        
+        Args:
+            problem_id: The unique identifier of the problem
+            gzip_variant: Also look up (or, with SOLUTION_PRECOMPRESS, create) solution.xml.gz
+            
+        Returns:
+            Tuple of (solution.xml path, up-to-date solution.xml.gz path or None),
+            or None if no solution exists
+        """
+        solution_path = self.get_solution_path(problem_id)
+        if not os.path.isfile(solution_path):
+            self.logger.warning(f"Solution file not found for problem {problem_id}")
+            return None
+        # Snapshots are replaced too often to be worth compressing
+        is_snapshot = os.path.basename(solution_path) == SNAPSHOT_FILE
+        gz_path = precompressed_path(solution_path, create=SOLUTION_PRECOMPRESS and not is_snapshot) \
+            if gzip_variant else None
+        return solution_path, gz_path
+    
+    def get_solution_stat(self, problem_id: str) -> Optional[os.stat_result]:
+        """
+        Get the stat of a problem's solution.xml, used to validate cached copies.
+        
+        Args:
+            problem_id: The unique identifier of the problem
+            
+        Returns:
+            The stat result, or None if no solution exists
+        """
+        try:
+            return os.stat(self.get_solution_path(problem_id))
+        except OSError:
+            return None
+    
     def get_solution_json(self, problem_id: str) -> Optional[Dict]:
         """
         Get the solution in JSON format.
@@ -54,15 +146,30 @@ class SolutionService:
             problem_id: The unique identifier of the problem
             
         Returns:
-            A dictionary containing the converted solution data, or None if no solution exists
+            A dictionary containing the converted solution data, or None if no solution exists.
+            While the solver is running this is its best solution so far, with "snapshot"
+            set in the solution info.
         """
-        xml_content = self.get_solution_xml(problem_id)
-        if not xml_content:
+        # Converted solutions are cached until solution.xml changes; snapshots are not persisted
+        solution_path = self.get_solution_path(problem_id)
+        is_snapshot = os.path.basename(solution_path) == SNAPSHOT_FILE
+        return get_solution_cache().get(solution_path, lambda: self._convert_solution(problem_id, solution_path),
+                                        persist=not is_snapshot)
+    
+    def _convert_solution(self, problem_id: str, solution_path: str) -> Optional[Dict]:
+        """Convert a problem's solution file to JSON, streaming it from disk."""
+        if not os.path.exists(solution_path):
+            self.logger.warning(f"Solution file not found for problem {problem_id}")
             return None
             
         # Convert XML to JSON
         try:
-            converter = XMLtoJSONConverter(xml_content)
+            if os.path.basename(solution_path) == SNAPSHOT_FILE:
+                converter = StreamingXMLtoJSONConverter(solution_path, prefer_best=True)
+                result = converter.convert()
+                result["solution"]["info"]["snapshot"] = True
+                return result
+            converter = StreamingXMLtoJSONConverter(solution_path)
             return converter.convert()
         except Exception as e:
             self.logger.error(f"Error converting solution to JSON for problem {problem_id}: {e}")
@@ -75,14 +182,17 @@ class SolutionService:
 class XMLtoJSONConverter:
     """Converter for transforming XML solution data to JSON format."""
     
-    def __init__(self, xml_content: str):
+    def __init__(self, xml_content: str, prefer_best: bool = False):
         """
         Initialize the converter with XML content.
         
         Args:
             xml_content: The raw XML solution string
+            prefer_best: Report the best assignment (best="true") of classes that have
+                one instead of the current one (solution="true"), as in solver snapshots
         """
         self.xml_content = xml_content
+        self.prefer_best = prefer_best
         self.logger = logging.getLogger("xml_to_json_converter")
         
     def convert(self) -> Dict:
@@ -117,21 +227,46 @@ class XMLtoJSONConverter:
         Returns:
             A dictionary containing solution metadata
         """
+        info, stats = self._parse_header(self.xml_content, root.get("version", ""), root.get("created", ""))
+        
+        # Also look for explicit statistic elements
+        for stat in root.findall(".//statistic"):
+            name = stat.get("name", "")
+            value = stat.text or ""
+            stats[name] = value
+            
+        if stats:
+            info["statistics"] = stats
+            
+        return info
+    
+    def _parse_header(self, text: str, version: str, created: str):
+        """
+        Read the runtime and statistics from the <!--Solution Info:--> comment.
+        
+        Args:
+            text: The XML text (the header is enough)
+            version: Version attribute of the root element
+            created: Created attribute of the root element
+            
+        Returns:
+            Tuple of (info dictionary without statistics, statistics dictionary)
+        """
         # Extract runtime from XML comments first
         runtime = "Less than a minute"  # Default value
         
         # Try to extract runtime from comments in the original XML
-        if self.xml_content:
+        if text:
             # Use regex to find the Time: line in the comments
-            time_match = re.search(r'Time:\s*([0-9.]+)\s*min', self.xml_content)
+            time_match = re.search(r'Time:\s*([0-9.]+)\s*min', text)
             if time_match:
                 time_value = float(time_match.group(1))
                 if time_value > 0:
                     runtime = f"{time_value} minutes"
         
         info = {
-            "version": root.get("version", ""),
-            "created": root.get("created", ""),
+            "version": version,
+            "created": created,
             "runtime": runtime
         }
         
@@ -140,7 +275,7 @@ class XMLtoJSONConverter:
         
         # Try to extract statistics from XML comments
         comment_pattern = r'<!--Solution Info:(.*?)-->'
-        comment_match = re.search(comment_pattern, self.xml_content, re.DOTALL)
+        comment_match = re.search(comment_pattern, text or "", re.DOTALL)
         if comment_match:
             comment_text = comment_match.group(1)
             lines = comment_text.strip().split('\n')
@@ -155,16 +290,7 @@ class XMLtoJSONConverter:
                         if key != "Time":
                             stats[key] = value
         
-        # Also look for explicit statistic elements
-        for stat in root.findall(".//statistic"):
-            name = stat.get("name", "")
-            value = stat.text or ""
-            stats[name] = value
-            
-        if stats:
-            info["statistics"] = stats
-            
-        return info
+        return info, stats
         
     def _extract_classes(self, root) -> List[Dict]:
         """
@@ -180,69 +306,7 @@ class XMLtoJSONConverter:
         
         # Find all class elements in the solution
         for class_elem in root.findall(".//classes/class"):
-            class_id = class_elem.get("id", "")
-            
-            class_data = {
-                "id": class_id,
-                "name": class_elem.get("name", ""),
-                "offering": class_elem.get("offering", ""),
-                "assignment": {}
-            }
-            
-            # Find assigned time (the time element with solution="true")
-            assigned_time = None
-            for time_elem in class_elem.findall("time[@solution='true']"):
-                assigned_time = time_elem
-                break
-                
-            if assigned_time is not None:
-                days = assigned_time.get("days", "")
-                start_slot = int(assigned_time.get("start", "0"))
-                length = int(assigned_time.get("length", "0"))
-                
-                # Convert to human-readable format
-                start_hour = start_slot // 12
-                start_minute = (start_slot % 12) * 5
-                
-                end_slot = start_slot + length
-                end_hour = end_slot // 12
-                end_minute = (end_slot % 12) * 5
-                
-                # Format times in 12-hour format with AM/PM
-                start_time = self._format_time(start_hour, start_minute)
-                end_time = self._format_time(end_hour, end_minute)
-                
-                class_data["assignment"]["time"] = {
-                    "days": self._decode_days(days),
-                    "start": start_time,
-                    "end": end_time,
-                    "raw": {
-                        "days": days,
-                        "start_slot": start_slot,
-                        "length": length
-                    }
-                }
-            
-            # Find assigned rooms (room elements with solution="true")
-            rooms = []
-            for room_elem in class_elem.findall("room[@solution='true']"):
-                rooms.append({
-                    "id": room_elem.get("id", ""),
-                    "name": room_elem.get("name", "")
-                })
-                
-            if rooms:
-                class_data["assignment"]["rooms"] = rooms
-                
-            # Find assigned instructors (instructor elements with solution="true")
-            instructors = []
-            for instructor_elem in class_elem.findall("instructor[@solution='true']"):
-                instructors.append({
-                    "id": instructor_elem.get("id", "")
-                })
-                
-            if instructors:
-                class_data["assignment"]["instructors"] = instructors
+            class_data = self._class_to_json(class_elem)
             
             # Only add classes that have assignments
             if class_data["assignment"]:
@@ -251,6 +315,87 @@ class XMLtoJSONConverter:
         self.logger.info(f"Extracted {len(classes)} class assignments from solution XML")
         return classes
     
+    def _class_to_json(self, class_elem) -> Dict:
+        """
+        Convert one class element to its JSON representation.
+        
+        Args:
+            class_elem: A <class> element with its time, room and instructor children
+            
+        Returns:
+            A dictionary with the class data; "assignment" is empty for unassigned classes
+        """
+        class_id = class_elem.get("id", "")
+        
+        class_data = {
+            "id": class_id,
+            "name": class_elem.get("name", ""),
+            "offering": class_elem.get("offering", ""),
+            "assignment": {}
+        }
+        
+        # Snapshots mark the best assignment with best="true", next to the current one
+        marker = "solution"
+        if self.prefer_best and class_elem.find("*[@best='true']") is not None:
+            marker = "best"
+        
+        # Find assigned time (the time element with solution="true")
+        assigned_time = None
+        for time_elem in class_elem.findall(f"time[@{marker}='true']"):
+            assigned_time = time_elem
+            break
+            
+        if assigned_time is not None:
+            days = assigned_time.get("days", "")
+            start_slot = int(assigned_time.get("start", "0"))
+            length = int(assigned_time.get("length", "0"))
+            
+            # Convert to human-readable format
+            start_hour = start_slot // 12
+            start_minute = (start_slot % 12) * 5
+            
+            end_slot = start_slot + length
+            end_hour = end_slot // 12
+            end_minute = (end_slot % 12) * 5
+            
+            # Format times in 12-hour format with AM/PM
+            start_time = self._format_time(start_hour, start_minute)
+            end_time = self._format_time(end_hour, end_minute)
+            
+            class_data["assignment"]["time"] = {
+                "days": self._decode_days(days),
+                "start": start_time,
+                "end": end_time,
+                "raw": {
+                    "days": days,
+                    "start_slot": start_slot,
+                    "length": length
+                }
+            }
+        
+        # Find assigned rooms (room elements with solution="true")
+        rooms = []
+        for room_elem in class_elem.findall(f"room[@{marker}='true']"):
+            rooms.append({
+                "id": room_elem.get("id", ""),
+                "name": room_elem.get("name", "")
+            })
+            
+        if rooms:
+            class_data["assignment"]["rooms"] = rooms
+            
+        # Find assigned instructors (instructor elements with solution="true")
+        instructors = []
+        for instructor_elem in class_elem.findall(f"instructor[@{marker}='true']"):
+            instructors.append({
+                "id": instructor_elem.get("id", "")
+            })
+            
+        if instructors:
+            class_data["assignment"]["instructors"] = instructors
+        
+        return class_data
+    
     def _format_time(self, hour: int, minute: int) -> str:
         """
         Format time in 12-hour format with AM/PM.
@@ -295,4 +440,96 @@ class XMLtoJSONConverter:
             if char == "1" or char == "۱":
                 result.append(day_names[i])
                 
-        return result
\ No newline at end of file
+        return result
+
+class StreamingXMLtoJSONConverter(XMLtoJSONConverter):
+    """
+    Converter that streams a solution.xml file with iterparse instead of loading it.
+    
+    Class assignments are converted as their <class> elements are read, and every
+    processed element is removed from the tree, so memory use does not grow with
+    the size of the solution (apart from the result itself). The solution info
+    comment is read from the start of the file only.
+    """
+    
+    # The <!--Solution Info:--> comment is written right after the XML declaration
+    HEADER_BYTES = 64 * 1024
+    
+    def __init__(self, solution_path: str, prefer_best: bool = False):
+        """
+        Initialize the converter with the path of a solution file.
+        
+        Args:
+            solution_path: Path of the solution.xml file
+            prefer_best: Report best="true" assignments where present (see XMLtoJSONConverter)
+        """
+        super().__init__(None, prefer_best)
+        self.solution_path = solution_path
+        self._root_attrs = {}
+        
+    def convert(self) -> Dict:
+        """
+        Convert the solution file to JSON format.
+        
+        Returns:
+            A dictionary containing the structured solution data
+        """
+        statistics = {}
+        classes = list(self.iter_classes(statistics))
+        info, stats = self._parse_header(self._read_header(), self._root_attrs.get("version", ""),
+                                         self._root_attrs.get("created", ""))
+        stats.update(statistics)
+        if stats:
+            info["statistics"] = stats
+        
+        self.logger.info(f"Extracted {len(classes)} class assignments from solution XML")
+        return {
+            "solution": {
+                "info": info,
+                "classes": classes
+            }
+        }
+    
+    def iter_classes(self, statistics: Optional[Dict[str, str]] = None):
+        """
+        Yield the class assignments of the solution as they are read.
+        
+        Args:
+            statistics: Optional dictionary that receives the <statistic> elements found
+            
+        Yields:
+            Class dictionaries (see XMLtoJSONConverter._class_to_json) of assigned classes
+        """
+        self._root_attrs = {}
+        depth = 0
+        section = None
+        try:
+            for event, elem in ET.iterparse(self.solution_path, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        self._root_attrs = dict(elem.attrib)
+                    elif depth == 2:
+                        # A top level section such as <rooms>, <classes> or <students>
+                        section = elem
+                    continue
+                
+                depth -= 1
+                if elem.tag == "statistic" and statistics is not None:
+                    statistics[elem.get("name", "")] = elem.text or ""
+                if depth == 2:
+                    # A complete child of a section: convert it if it is a class, then drop it
+                    if elem.tag == "class" and section.tag == "classes":
+                        class_data = self._class_to_json(elem)
+                        if class_data["assignment"]:
+                            yield class_data
+                    section.clear()
+                elif depth == 1:
+                    elem.clear()
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML format: {e}")
+    
+    def _read_header(self) -> str:
+        """Read the beginning of the solution file, which holds the solution info comment."""
+        with open(self.solution_path, 'rb') as f:
+            return f.read(self.HEADER_BYTES).decode('utf-8', errors='replace')
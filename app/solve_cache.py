@@ -0,0 +1,239 @@
+"""
+Content-addressed cache of solver results.
+
+The same problem is often resubmitted unchanged, and each submission used to
+cost a full solve. Finished solutions are stored under a key that hashes
+everything the solver reads: the problem XML, config.cfg, the cpsolver JAR and
+any solver property overrides. An identical submission gets a new problem_id
+whose solution.xml is linked (or copied) from the cache, without queueing a
+solve. The cache directory is bounded by entry count and total size; the least
+recently used entries are evicted first.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+# Cache location and bounds, configurable through the environment
+SOLVE_CACHE_ENABLED = os.environ.get("SOLVE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SOLVE_CACHE_DIR = os.environ.get("SOLVE_CACHE_DIR")  # defaults to <cpsolver>/solve_cache
+SOLVE_CACHE_MAX_ENTRIES = int(os.environ.get("SOLVE_CACHE_MAX_ENTRIES", "100"))
+SOLVE_CACHE_MAX_BYTES = int(os.environ.get("SOLVE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Bump when the key layout changes, so old entries are no longer matched
+_KEY_VERSION = b"solve-cache-v1"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+SOLUTION_FILE = "solution.xml"
+META_FILE = "meta.json"
+
+logger = logging.getLogger("solve_cache")
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """Hard-link a file (solutions are never modified in place), copying it where links are not possible."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _hash_file(digest, path: str) -> None:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+class SolveCache:
+    """Directory of cached solutions, one folder per solve key."""
+
+    def __init__(self, cache_dir: str, max_entries: int = SOLVE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = SOLVE_CACHE_MAX_BYTES, enabled: bool = SOLVE_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        # JAR path -> (mtime_ns, size, digest), so the JAR is only hashed once
+        self._jar_digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def _jar_digest(self, jar_path: Optional[str]) -> str:
+        if not jar_path:
+            return ""
+        try:
+            st = os.stat(jar_path)
+        except OSError:
+            return ""
+        with self._lock:
+            cached = self._jar_digests.get(jar_path)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
+        digest = hashlib.sha256()
+        _hash_file(digest, jar_path)
+        with self._lock:
+            self._jar_digests[jar_path] = (st.st_mtime_ns, st.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+    def key(self, input_path: str, config_path: str, solver_jar: Optional[str],
+            overrides: Optional[Dict[str, str]] = None) -> str:
+        """
+        Compute the solve key of a problem.
+
+        Args:
+            input_path: Problem XML the solver will load
+            config_path: Solver configuration (config.cfg)
+            solver_jar: cpsolver JAR, standing in for the solver version
+            overrides: Solver properties set on top of config.cfg
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256(_KEY_VERSION)
+        for label, path in (("input", input_path), ("config", config_path)):
+            digest.update(f"\0{label}\0".encode())
+            if path and os.path.exists(path):
+                _hash_file(digest, path)
+        digest.update(b"\0jar\0" + self._jar_digest(solver_jar).encode())
+        digest.update(b"\0overrides\0" + json.dumps(overrides or {}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Find a cached solution.
+
+        Returns:
+            Metadata of the entry (solution_path, problem_id of the solve that produced
+            it, stored_at), or None on a miss
+        """
+        entry_dir = self._entry_dir(key)
+        solution_path = os.path.join(entry_dir, SOLUTION_FILE)
+        if not os.path.isfile(solution_path):
+            return None
+        try:
+            # The entry folder's mtime records when it was last used, for eviction
+            os.utime(entry_dir)
+            with open(os.path.join(entry_dir, META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        meta["solution_path"] = solution_path
+        return meta
+
+    def restore(self, key: str, problem_dir: str) -> Optional[Dict]:
+        """
+        Put the cached solution of a key into a problem folder.
+
+        The file is hard-linked when possible (solutions are never modified in place),
+        and copied otherwise.
+
+        Returns:
+            Metadata of the entry (see lookup), or None on a miss
+        """
+        meta = self.lookup(key)
+        if meta is None:
+            return None
+        target = os.path.join(problem_dir, SOLUTION_FILE)
+        try:
+            link_or_copy(meta["solution_path"], target)
+        except OSError as e:
+            logger.warning(f"Could not restore cached solution {key}: {e}")
+            return None
+        return meta
+
+    def store(self, key: str, solution_path: str, problem_id: str) -> bool:
+        """
+        Add (or replace) the cached solution of a key, then evict entries over the bounds.
+
+        Args:
+            key: Solve key of the problem
+            solution_path: The solution.xml produced by the solver
+            problem_id: ID of the problem that produced it
+
+        Returns:
+            Whether the solution was stored
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(tmp_dir)
+            link_or_copy(solution_path, os.path.join(tmp_dir, SOLUTION_FILE))
+            with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({"problem_id": problem_id, "stored_at": datetime.now().isoformat()}, f)
+            with self._lock:
+                if os.path.exists(entry_dir):
+                    shutil.rmtree(entry_dir)
+                os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning(f"Could not cache solution of problem {problem_id}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+        logger.info(f"Cached solution of problem {problem_id} as {key}")
+        self.evict()
+        return True
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache is within its bounds.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            try:
+                scan = list(os.scandir(self.cache_dir))
+            except OSError:
+                return 0
+            for entry in scan:
+                if not entry.is_dir() or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    size = os.path.getsize(os.path.join(entry.path, SOLUTION_FILE))
+                    entries.append((entry.stat().st_mtime_ns, size, entry.path))
+                except OSError:
+                    continue
+                total += size
+            entries.sort()
+            removed = 0
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                _, size, path = entries.pop(0)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+            if removed:
+                logger.info(f"Evicted {removed} cached solution(s)")
+            return removed
+
+
+_caches: Dict[str, SolveCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_solve_cache(cpsolver_path: str) -> SolveCache:
+    """
+    Get the process-wide solve cache of a cpsolver directory.
+
+    Args:
+        cpsolver_path: Absolute path to the cpsolver directory
+
+    Returns:
+        The SolveCache, stored in SOLVE_CACHE_DIR or <cpsolver_path>/solve_cache
+    """
+    cache_dir = os.path.abspath(SOLVE_CACHE_DIR or os.path.join(cpsolver_path, "solve_cache"))
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            os.makedirs(cache_dir, exist_ok=True)
+            cache = SolveCache(cache_dir)
+            _caches[cache_dir] = cache
+        return cache
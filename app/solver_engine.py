@@ -0,0 +1,609 @@
+"""
+Solver engines for running the cpsolver course timetabling solver.
+
+This module provides two interchangeable ways of executing a solve:
+- SubprocessSolverEngine launches one `java ... org.cpsolver.coursett.Test`
+  process per problem (the original behaviour)
+- JPypeSolverEngine keeps a pool of warm worker processes, each holding a JVM
+  with cpsolver already loaded, and runs TimetableXMLLoader/Solver/TimetableXMLSaver
+  in them so small problems do not pay JVM startup and JIT warm-up on every solve
+
+Both engines return a handle with the subset of the subprocess.Popen interface
+used by SolverService (pid, returncode, poll, wait, terminate, kill). The solver's
+stdout and stderr are written straight to files in the output folder rather than
+piped into this process. The engine is selected with the SOLVER_ENGINE environment variable.
+"""
+
+import os
+import sys
+import time
+import glob
+import logging
+import subprocess
+import threading
+import queue
+import importlib.util
+import shutil
+import traceback
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+# Engine selection and JVM sizing, configurable through the environment
+SOLVER_ENGINE = os.environ.get("SOLVER_ENGINE", "subprocess").lower()
+SOLVER_POOL_SIZE = int(os.environ.get("SOLVER_POOL_SIZE", "2"))
+SOLVER_MAX_HEAP = os.environ.get("SOLVER_MAX_HEAP", "512m")
+
+# Seconds between best-so-far snapshots of a running solve (JPype engine only; 0 disables them)
+SOLVER_SNAPSHOT_INTERVAL = float(os.environ.get("SOLVER_SNAPSHOT_INTERVAL", "30"))
+
+# Main class used by the subprocess engine
+SOLVER_MAIN_CLASS = "org.cpsolver.coursett.Test"
+
+# Files in the output folder that receive the solver's console output
+STDOUT_FILE = "stdout.log"
+STDERR_FILE = "stderr.log"
+
+# Best solution found so far by a running solve, next to where solution.xml will be
+SNAPSHOT_FILE = "snapshot.xml"
+
+logger = logging.getLogger("solver_engine")
+
+
+def find_solver_jar(cpsolver_path: str) -> Optional[str]:
+    """
+    Locate the cpsolver JAR file in the cpsolver directory.
+
+    Args:
+        cpsolver_path: Absolute path to the cpsolver directory
+
+    Returns:
+        Path of the JAR file, or None if no suitable JAR exists
+    """
+    jar_path = os.path.join(cpsolver_path, "cpsolver-1.4.74.jar")
+    if os.path.exists(jar_path):
+        return jar_path
+
+    jar_files = glob.glob(os.path.join(cpsolver_path, "cpsolver*.jar"))
+    jar_files = [f for f in jar_files if not ('javadoc' in f or 'sources' in f)]
+    if jar_files:
+        logger.info(f"Found alternative JAR file: {jar_files[0]}")
+        return jar_files[0]
+    return None
+
+
+def build_classpath(cpsolver_path: str) -> List[str]:
+    """
+    Build the solver classpath: the cpsolver JAR followed by the JARs in lib/.
+
+    Args:
+        cpsolver_path: Absolute path to the cpsolver directory
+
+    Returns:
+        List of classpath entries
+
+    Raises:
+        FileNotFoundError: If no cpsolver JAR can be found
+    """
+    jar_path = find_solver_jar(cpsolver_path)
+    if jar_path is None:
+        raise FileNotFoundError(f"No suitable cpsolver JAR file found in {cpsolver_path}")
+
+    for lib_name in ("lib", "libe"):
+        lib_dir = os.path.join(cpsolver_path, lib_name)
+        if os.path.isdir(lib_dir):
+            lib_files = sorted(os.path.join(lib_dir, f) for f in os.listdir(lib_dir) if f.endswith('.jar'))
+            logger.info(f"Found lib files: {lib_files}")
+            return [jar_path] + lib_files
+
+    logger.info("No lib directory found, using only main JAR")
+    return [jar_path]
+
+
+def termination_properties(time_limit: Optional[int] = None,
+                           stop_when_complete: Optional[bool] = None) -> Dict[str, str]:
+    """
+    Solver property overrides for the termination settings of a single solve.
+
+    Args:
+        time_limit: Seconds the solver may run (Termination.TimeOut); None keeps config.cfg's
+        stop_when_complete: Stop as soon as all classes are assigned; None keeps config.cfg's
+
+    Returns:
+        Dictionary of property overrides (empty if both are None)
+    """
+    properties = {}
+    if time_limit is not None:
+        properties["Termination.TimeOut"] = str(int(time_limit))
+    if stop_when_complete is not None:
+        properties["Termination.StopWhenComplete"] = "true" if stop_when_complete else "false"
+    return properties
+
+
+def read_config_properties(config_path: str) -> Dict[str, str]:
+    """
+    Read the key=value properties of a solver configuration file.
+
+    config.cfg ships as UTF-16 with a byte order mark; files without one are read as UTF-8.
+
+    Returns:
+        Dictionary of the properties, empty if the file cannot be read
+    """
+    try:
+        with open(config_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return {}
+    if data[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        text = data.decode("utf-16", errors="replace")
+    else:
+        text = data.decode("utf-8", errors="replace")
+    properties = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", "!")) or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        properties[key.strip()] = value.strip()
+    return properties
+
+
+def find_log_dir(output_dir: str) -> str:
+    """
+    Get the folder holding the solver logs (debug.log, stat.csv, ...) of a solve.
+
+    This is output_dir itself, or the single timestamped folder that
+    org.cpsolver.coursett.Test creates inside it while the solve is running.
+    Only the job's own output folder is listed, so this cannot pick up another job's files.
+    """
+    if os.path.exists(os.path.join(output_dir, "debug.log")):
+        return output_dir
+    try:
+        run_dirs = sorted(
+            entry.path for entry in os.scandir(output_dir)
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, "debug.log"))
+        )
+    except OSError:
+        return output_dir
+    return run_dirs[-1] if run_dirs else output_dir
+
+
+def collect_output(output_dir: str) -> None:
+    """
+    Move the solver output from the timestamped run folder up into output_dir.
+
+    Called once the solver has exited, so that finished problems keep all of
+    their files (debug.log, solution.xml, stat.csv, ...) directly in output_dir.
+    """
+    log_dir = find_log_dir(output_dir)
+    if log_dir == output_dir:
+        return
+    for name in os.listdir(log_dir):
+        os.replace(os.path.join(log_dir, name), os.path.join(output_dir, name))
+    shutil.rmtree(log_dir, ignore_errors=True)
+
+
+class SubprocessSolverEngine:
+    """Runs every solve in a fresh `java` process."""
+
+    name = "subprocess"
+    # Test only saves its solution when it exits, so a running solve has no best-so-far snapshot
+    supports_snapshots = False
+    # Every solve starts its own JVM, so each can get its own heap
+    sizes_heap = True
+
+    def __init__(self, cpsolver_path: str):
+        self.cpsolver_path = cpsolver_path
+
+    def build_command(self, config_path: str, input_path: str, output_dir: str,
+                      overrides: Optional[Dict[str, str]] = None, max_heap: Optional[str] = None) -> List[str]:
+        """
+        Build the java command line for a single solve.
+
+        org.cpsolver.coursett.Test always appends a timestamped folder to its output
+        argument, so logs end up in output_dir/<yyMMdd_HHmmss>/ (see collect_output);
+        General.SolutionFile makes it save solution.xml directly into output_dir.
+        Overrides are passed as -D system properties, which Test applies on top of
+        the configuration file. max_heap (e.g. "384m") replaces SOLVER_MAX_HEAP as -Xmx.
+        """
+        separator = ";" if sys.platform.startswith("win") else ":"
+        classpath = separator.join(build_classpath(self.cpsolver_path))
+        properties = [f"-D{key}={value}" for key, value in (overrides or {}).items()]
+        return [
+            "java", f"-Xmx{max_heap or SOLVER_MAX_HEAP}",
+            *properties,
+            f"-DGeneral.SolutionFile={os.path.join(output_dir, 'solution.xml')}",
+            "-cp", classpath,
+            SOLVER_MAIN_CLASS,
+            config_path,
+            input_path,
+            output_dir
+        ]
+
+    def start(self, config_path: str, input_path: str, output_dir: str,
+              overrides: Optional[Dict[str, str]] = None, max_heap: Optional[str] = None) -> subprocess.Popen:
+        """
+        Start a solve in a new java process.
+
+        Args:
+            config_path: Path to the solver configuration file
+            input_path: Path to the problem XML file
+            output_dir: Folder that receives the solution and solver logs
+            overrides: Solver properties to set on top of the configuration file
+            max_heap: Heap limit of the java process (default: SOLVER_MAX_HEAP)
+
+        Returns:
+            The running subprocess.Popen object
+        """
+        command = self.build_command(config_path, input_path, output_dir, overrides, max_heap)
+        logger.info(f"Running command: {' '.join(command)}")
+        os.makedirs(output_dir, exist_ok=True)
+        # The child writes its console output directly to files, so none of it is buffered here
+        with open(os.path.join(output_dir, STDOUT_FILE), "wb") as stdout, \
+                open(os.path.join(output_dir, STDERR_FILE), "wb") as stderr:
+            # The child gets its own working directory, so the server's cwd is never changed
+            return subprocess.Popen(
+                command,
+                cwd=self.cpsolver_path,
+                stdout=stdout,
+                stderr=stderr
+            )
+
+
+def _save_snapshot(solver, output_dir: str, saved_iteration: int) -> int:
+    """
+    Write the solution of a running solve to snapshot.xml if the best solution improved.
+
+    The solution is read-locked while it is written, so the solver only pauses for
+    the duration of the save. The best assignment is marked with best="true"
+    (Xml.SaveBest) next to the current one.
+
+    Args:
+        solver: The running cpsolver Solver
+        output_dir: Output folder of the solve
+        saved_iteration: Best iteration of the previous snapshot (-1 for none)
+
+    Returns:
+        Best iteration of the snapshot now on disk
+    """
+    import jpype
+
+    File = jpype.JClass("java.io.File")
+    TimetableXMLSaver = jpype.JClass("org.cpsolver.coursett.TimetableXMLSaver")
+
+    solution = solver.currentSolution()
+    best_iteration = int(solution.getBestIteration())
+    if solution.getBestInfo() is None or best_iteration == saved_iteration:
+        return saved_iteration
+    snapshot_path = os.path.join(output_dir, SNAPSHOT_FILE)
+    tmp_path = f"{snapshot_path}.tmp"
+    lock = solution.getLock().readLock()
+    lock.lock()
+    try:
+        TimetableXMLSaver(solver).save(File(tmp_path))
+    finally:
+        lock.unlock()
+    os.replace(tmp_path, snapshot_path)
+    return best_iteration
+
+
+def _write_stats(solution, output_dir: str) -> None:
+    """
+    Write the iterations and speed of a finished solve to stat.csv.
+
+    org.cpsolver.coursett.Test writes stat.csv as it solves; the JPype worker only
+    writes the columns the solve history reads (see estimator.read_solver_stats).
+    """
+    iterations = int(solution.getIteration())
+    seconds = float(solution.getTime())
+    speed = iterations / seconds if seconds > 0 else 0.0
+    with open(os.path.join(output_dir, "stat.csv"), "w", encoding="utf-8") as f:
+        f.write("Time[min];Iter;Speed[it/s]\n")
+        f.write(f"{seconds / 60:.2f};{iterations};{speed:.1f}\n")
+
+
+def _run_jvm_job(job: Dict, stop_event) -> None:
+    """
+    Run one solve inside the worker's JVM, mirroring org.cpsolver.coursett.Test.
+
+    The solver thread is stopped early when stop_event is set; the best solution
+    found so far is restored and saved either way. Every SOLVER_SNAPSHOT_INTERVAL
+    seconds an improved best solution is also written to snapshot.xml.
+    """
+    import jpype
+
+    File = jpype.JClass("java.io.File")
+    ToolBox = jpype.JClass("org.cpsolver.ifs.util.ToolBox")
+    Progress = jpype.JClass("org.cpsolver.ifs.util.Progress")
+    TimetableModel = jpype.JClass("org.cpsolver.coursett.model.TimetableModel")
+    TimetableXMLLoader = jpype.JClass("org.cpsolver.coursett.TimetableXMLLoader")
+    TimetableXMLSaver = jpype.JClass("org.cpsolver.coursett.TimetableXMLSaver")
+    DefaultSingleAssignment = jpype.JClass("org.cpsolver.ifs.assignment.DefaultSingleAssignment")
+    Solution = jpype.JClass("org.cpsolver.ifs.solution.Solution")
+    Solver = jpype.JClass("org.cpsolver.ifs.solver.Solver")
+
+    output_dir = job["output"]
+    os.makedirs(output_dir, exist_ok=True)
+
+    properties = ToolBox.loadProperties(File(job["config"]))
+    properties.setProperty("General.Input", job["input"])
+    properties.setProperty("General.Output", output_dir)
+    for key, value in job.get("overrides", {}).items():
+        properties.setProperty(key, str(value))
+    if SOLVER_SNAPSHOT_INTERVAL > 0:
+        properties.setProperty("Xml.SaveBest", "true")
+    ToolBox.setupLogging(File(output_dir, "debug.log"), False)
+
+    model = TimetableModel(properties)
+    assignment = DefaultSingleAssignment()
+    TimetableXMLLoader(model, assignment).load()
+
+    solver = Solver(properties)
+    solver.setInitalSolution(Solution(model, assignment))
+    solver.start()
+    solver_thread = solver.getSolverThread()
+    last_snapshot = time.monotonic()
+    snapshot_iteration = -1
+    while solver_thread.isAlive():
+        if stop_event.is_set():
+            solver.stopSolver(False)
+        elif SOLVER_SNAPSHOT_INTERVAL > 0 and time.monotonic() - last_snapshot >= SOLVER_SNAPSHOT_INTERVAL:
+            last_snapshot = time.monotonic()
+            try:
+                snapshot_iteration = _save_snapshot(solver, output_dir, snapshot_iteration)
+            except Exception as e:
+                # A failed snapshot must not end the solve
+                logger.warning(f"Could not save snapshot of {job['input']}: {e}")
+        solver_thread.join(500)
+
+    solution = solver.lastSolution()
+    _write_stats(solution, output_dir)
+    if solution.getBestInfo() is not None:
+        solution.restoreBest()
+        if properties.getPropertyBoolean("General.Save", True):
+            TimetableXMLSaver(solver).save()
+    Progress.removeInstance(model)
+
+
+def _jvm_worker_main(classpath: List[str], jvm_options: List[str], cwd: str, conn, stop_event) -> None:
+    """
+    Entry point of a JPype worker process.
+
+    Starts the JVM once, then runs solve jobs received over `conn` one at a time
+    and answers each with an (exit_code, error_message) tuple.
+    """
+    import jpype
+
+    # Only this worker process changes directory; the server's cwd is left alone
+    os.chdir(cwd)
+    jpype.startJVM(*jvm_options, classpath=classpath, convertStrings=False)
+    saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        # Point this process' stdout/stderr (shared with the JVM) at the job's output files
+        with open(os.path.join(job["output"], STDOUT_FILE), "wb") as stdout, \
+                open(os.path.join(job["output"], STDERR_FILE), "wb") as stderr:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(stdout.fileno(), 1)
+            os.dup2(stderr.fileno(), 2)
+            try:
+                _run_jvm_job(job, stop_event)
+                result = (0, None)
+            except Exception as e:
+                traceback.print_exc()
+                result = (1, str(e))
+            finally:
+                jpype.JClass("java.lang.System").out.flush()
+                jpype.JClass("java.lang.System").err.flush()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved_stdout, 1)
+                os.dup2(saved_stderr, 2)
+        conn.send(result)
+
+
+class JPypeSolverHandle:
+    """Popen-like handle for a solve running in a JPype worker."""
+
+    def __init__(self, engine: "JPypeSolverEngine", job: Dict):
+        self._engine = engine
+        self.job = job
+        self.pid = None
+        self.returncode = None
+        self.error = None
+        self._worker = None
+        self._done = threading.Event()
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(SOLVER_MAIN_CLASS, timeout)
+        return self.returncode
+
+    def terminate(self) -> None:
+        """Ask the solver to stop; the best solution found so far is still saved."""
+        self._engine._stop(self, force=False)
+
+    def kill(self) -> None:
+        """Kill the worker process running this solve. The pool starts a replacement."""
+        self._engine._stop(self, force=True)
+
+    def _finish(self, returncode: int, error: Optional[str] = None) -> None:
+        self.returncode = returncode
+        self.error = error
+        self._done.set()
+
+
+class _JVMWorker:
+    """One warm JVM worker process plus the thread that feeds it jobs."""
+
+    def __init__(self, engine: "JPypeSolverEngine", index: int):
+        self.engine = engine
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.stop_event = None
+        self.current = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"jvm-worker-{index}", daemon=True)
+
+    def ensure_started(self) -> None:
+        """Start the worker process (and its JVM) if it is not running."""
+        if self.process is not None and self.process.is_alive():
+            return
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        self.stop_event = ctx.Event()
+        self.process = ctx.Process(
+            target=_jvm_worker_main,
+            args=(self.engine.classpath, self.engine.jvm_options, self.engine.cpsolver_path,
+                  child_conn, self.stop_event),
+            name=f"cpsolver-jvm-{self.index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        logger.info(f"Started JVM worker {self.index} (pid {self.process.pid})")
+
+    def _run(self) -> None:
+        while True:
+            handle = self.engine._jobs.get()
+            if handle.returncode is not None:
+                # Cancelled while still waiting in the pool queue
+                continue
+            with self.lock:
+                try:
+                    self.ensure_started()
+                except Exception as e:
+                    handle._finish(1, f"Could not start JVM worker: {e}")
+                    continue
+                # A stop meant for the previous job may have come in after it finished
+                self.stop_event.clear()
+                self.current = handle
+                handle._worker = self
+                handle.pid = self.process.pid
+            try:
+                self.conn.send(handle.job)
+                exit_code, error = self.conn.recv()
+            except (EOFError, OSError) as e:
+                # The worker died (or was killed); a new one is started for the next job
+                exit_code, error = -9, f"JVM worker terminated: {e}"
+                self.process = None
+            with self.lock:
+                self.current = None
+            handle._finish(exit_code, error)
+
+
+class JPypeSolverEngine:
+    """Runs solves in a pool of warm JVM worker processes through JPype."""
+
+    name = "jpype"
+    supports_snapshots = SOLVER_SNAPSHOT_INTERVAL > 0
+    # The warm JVMs are started once with SOLVER_MAX_HEAP
+    sizes_heap = False
+
+    def __init__(self, cpsolver_path: str, pool_size: int = SOLVER_POOL_SIZE):
+        if importlib.util.find_spec("jpype") is None:
+            raise RuntimeError("JPype1 is not installed")
+        self.cpsolver_path = cpsolver_path
+        self.classpath = build_classpath(cpsolver_path)
+        self.jvm_options = [f"-Xmx{SOLVER_MAX_HEAP}"]
+        self._jobs = queue.Queue()
+        self._workers = [_JVMWorker(self, i) for i in range(max(1, pool_size))]
+        for worker in self._workers:
+            worker.ensure_started()
+            worker.thread.start()
+        logger.info(f"JPype solver pool started with {len(self._workers)} warm JVM(s)")
+
+    def start(self, config_path: str, input_path: str, output_dir: str,
+              overrides: Optional[Dict[str, str]] = None, max_heap: Optional[str] = None) -> JPypeSolverHandle:
+        """
+        Queue a solve on the first free warm JVM.
+
+        Args:
+            config_path: Path to the solver configuration file
+            input_path: Path to the problem XML file
+            output_dir: Folder that receives the solution and solver logs
+            overrides: Solver properties to set on top of the configuration file
+            max_heap: Not applied (sizes_heap is False); the warm JVMs are started once
+                with SOLVER_MAX_HEAP
+
+        Returns:
+            A JPypeSolverHandle for the solve
+        """
+        job = {
+            "config": os.path.abspath(config_path),
+            "input": os.path.abspath(input_path),
+            "output": os.path.abspath(output_dir),
+            "overrides": dict(overrides or {})
+        }
+        os.makedirs(job["output"], exist_ok=True)
+        # Created up front, so they exist even if the job never reaches a worker
+        for name in (STDOUT_FILE, STDERR_FILE):
+            open(os.path.join(job["output"], name), "wb").close()
+        handle = JPypeSolverHandle(self, job)
+        self._jobs.put(handle)
+        logger.info(f"Queued solve of {job['input']} on the JPype pool")
+        return handle
+
+    def _stop(self, handle: JPypeSolverHandle, force: bool) -> None:
+        worker = handle._worker
+        if worker is None:
+            if handle.returncode is None:
+                handle._finish(-15, "Cancelled before start")
+            return
+        with worker.lock:
+            if worker.current is not handle:
+                return
+            if force:
+                worker.process.kill()
+            else:
+                worker.stop_event.set()
+
+
+_engines: Dict[Tuple[str, str], object] = {}
+_engines_lock = threading.Lock()
+
+
+def get_solver_engine(cpsolver_path: str, engine_name: Optional[str] = None):
+    """
+    Get the process-wide solver engine for a cpsolver directory.
+
+    The JPype engine falls back to the subprocess engine when JPype or the
+    cpsolver JAR is not available.
+
+    Args:
+        cpsolver_path: Absolute path to the cpsolver directory
+        engine_name: "subprocess" or "jpype"; defaults to SOLVER_ENGINE
+
+    Returns:
+        A SubprocessSolverEngine or JPypeSolverEngine instance
+    """
+    engine_name = (engine_name or SOLVER_ENGINE).lower()
+    key = (engine_name, cpsolver_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            if engine_name == "jpype":
+                try:
+                    engine = JPypeSolverEngine(cpsolver_path)
+                except Exception as e:
+                    logger.error(f"Could not start JPype solver engine, using subprocess engine: {e}")
+                    engine = SubprocessSolverEngine(cpsolver_path)
+            else:
+                if engine_name != "subprocess":
+                    logger.warning(f"Unknown solver engine '{engine_name}', using subprocess engine")
+                engine = SubprocessSolverEngine(cpsolver_path)
+            if not engine.supports_snapshots and SOLVER_SNAPSHOT_INTERVAL > 0:
+                logger.info("The subprocess engine saves no best-so-far snapshots; "
+                            "a solution is available once a solve finishes or is stopped")
+            _engines[key] = engine
+        return engine
@@ -1,15 +1,32 @@
 import os
+import io
 import subprocess
 import threading
 import logging
-import sys
 import uuid
 import json
+import re
+import shutil
+import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 from pathlib import Path
 
 from .json_to_xml_converter import JSONtoXMLConverter
+from .solver_engine import (get_solver_engine, find_log_dir, collect_output, find_solver_jar, termination_properties,
+                            STDOUT_FILE, STDERR_FILE, SNAPSHOT_FILE)
+from .job_registry import JobRecord, get_job_registry, load_record
+from .log_reader import get_log_index
+from .job_scheduler import QueueFullError, get_solver_scheduler
+from .conditional import make_etag
+from .solve_cache import get_solve_cache, link_or_copy
+from .portfolio import SolverPortfolio, portfolio_run_dir, read_solution_summary, PORTFOLIO_MAX_SIZE
+from .decomposition import (find_components, pack_components, write_parts, merge_solutions, merge_logs,
+                            DECOMPOSE_PROBLEMS, DECOMPOSE_MAX_PARTS)
+from .feasibility import check_feasibility, converter_labels, invalid_xml_report, FEASIBILITY_CHECK
+from .estimator import problem_metrics, solve_termination, read_solver_stats, get_solve_history
+from .warm_start import (WARM_START_PROPERTIES, read_assignment, assignment_by_name, mark_initial_xml,
+                         load_original_json)
 
 # Get the current working directory
 CURRENT_DIR = os.getcwd()
@@ -35,6 +52,32 @@ if CPSOLVER_PATH is None:
     CPSOLVER_PATH = POTENTIAL_CPSOLVER_PATHS[0]
     logging.warning(f"No cpsolver directory found. Defaulting to {CPSOLVER_PATH}")
 
+# Registry key of the test run started through /solver/start
+TEST_SOLVER_JOB_ID = "test_solver"
+
+# How much of the end of the solver's console output is kept in memory per job
+OUTPUT_TAIL_BYTES = int(os.environ.get("SOLVER_OUTPUT_TAIL_BYTES", "4096"))
+
+# Seconds a stopped solver gets to save its best solution before it is killed
+SOLVER_STOP_TIMEOUT = float(os.environ.get("SOLVER_STOP_TIMEOUT", "30"))
+
+# Emit one multi-class group constraint per instructor/offering instead of one per pair of meetings
+COMPACT_GROUP_CONSTRAINTS = os.environ.get("SOLVER_COMPACT_CONSTRAINTS", "true").lower() in ("1", "true", "yes")
+
+# Serializes the check whether all parts of a decomposed problem have finished
+_decomposition_lock = threading.Lock()
+
+
+def serves_snapshots(engine, record: JobRecord) -> bool:
+    """
+    Whether best-so-far snapshots of a running job are served as its solution.
+
+    Only the JPype engine saves snapshots, and only a single solve saves them
+    into the problem folder (portfolio runs and decomposed parts use their own).
+    """
+    return engine.supports_snapshots and record.portfolio_size == 1 and not record.components
+
+
 class SolverService:
     """Service for running the Unitime solver operations."""
     
@@ -47,10 +90,11 @@ class SolverService:
             
         self.cpsolver_path = os.path.abspath(self.cpsolver_path)
         self.logger = logging.getLogger("solver_service")
-        self._process = None
-        self._solve_thread = None
-        self._is_solving = False
-        self._problem_processes = {}  # Dictionary to track multiple problems by ID
+        self.registry = get_job_registry()  # Shared by all instances to track problems by ID
+        self.engine = get_solver_engine(self.cpsolver_path)
+        self.scheduler = get_solver_scheduler()
+        self.solve_cache = get_solve_cache(self.cpsolver_path)
+        self.solve_history = get_solve_history(self.cpsolver_path)
         
         # Create required directories if they don't exist
         if os.path.exists(self.cpsolver_path):
@@ -68,12 +112,7 @@ class SolverService:
         else:
             self.logger.warning(f"Cpsolver directory not found at: {self.cpsolver_path}")
         
-        # Log information about paths for debugging
-        self.logger.info(f"Current working directory: {os.getcwd()}")
         self.logger.info(f"Using cpsolver path: {self.cpsolver_path}")
-        self.logger.info(f"Path exists: {os.path.exists(self.cpsolver_path)}")
-        if os.path.exists(self.cpsolver_path):
-            self.logger.info(f"Directory contents: {os.listdir(self.cpsolver_path)}")
     
     def run_test_solver(self) -> Dict:
         """
@@ -83,6 +122,8 @@ class SolverService:
         java -Xmx512m -cp "cpsolver-1.4.74.jar;lib/log4j-api-2.20.0.jar;lib/log4j-core-2.20.0.jar;lib/dom4j-2.1.4.jar" 
         org.cpsolver.coursett.Test config.cfg input/problem.xml solved_output/
         
+        or the equivalent solve on a warm JVM when the JPype engine is selected.
+        
         Returns:
             Dict containing status of the solver run and any output
         """
@@ -96,100 +137,71 @@ class SolverService:
                     "message": error_message
                 }
             
-            # Store the original directory to go back to
-            original_dir = os.getcwd()
-            
-            # Change to cpsolver directory for the command to work properly
-            os.chdir(self.cpsolver_path)
-            self.logger.info(f"Changed directory to: {os.getcwd()}")
-            
-            # Check for JAR files
-            jar_path = os.path.join(self.cpsolver_path, "cpsolver-1.4.74.jar")
-            if not os.path.exists(jar_path):
-                import glob
-                jar_files = glob.glob(os.path.join(self.cpsolver_path, "cpsolver*.jar"))
-                jar_files = [f for f in jar_files if not ('javadoc' in f or 'sources' in f)]
-                if jar_files:
-                    jar_path = jar_files[0]
-                    self.logger.info(f"Found alternative JAR file: {jar_path}")
-                else:
-                    error_message = f"No suitable cpsolver JAR file found in {self.cpsolver_path}"
-                    self.logger.error(error_message)
-                    return {
-                        "status": "error",
-                        "message": error_message
-                    }
-            
-            # Adjust the classpath separator based on the operating system
-            separator = ";" if sys.platform.startswith("win") else ":"
-            
-            # Build classpath using just the main JAR - try to find dependent JARs in lib
-            lib_dir = os.path.join(self.cpsolver_path, "lib")
-            if os.path.exists(lib_dir) and os.path.isdir(lib_dir):
-                self.logger.info(f"Found lib directory: {lib_dir}")
-                lib_files = [os.path.join(lib_dir, f) for f in os.listdir(lib_dir) if f.endswith('.jar')]
-                self.logger.info(f"Found lib files: {lib_files}")
-                classpath = separator.join([jar_path] + lib_files)
-            else:
-                lib_dir = os.path.join(self.cpsolver_path, "libe")
-                if os.path.exists(lib_dir) and os.path.isdir(lib_dir):
-                    self.logger.info(f"Found libe directory: {lib_dir}")
-                    lib_files = [os.path.join(lib_dir, f) for f in os.listdir(lib_dir) if f.endswith('.jar')]
-                    self.logger.info(f"Found lib files: {lib_files}")
-                    classpath = separator.join([jar_path] + lib_files)
-                else:
-                    self.logger.info("No lib directory found, using only main JAR")
-                    classpath = jar_path
-            
-            self.logger.info(f"Using classpath: {classpath}")
-            
-            # Construct the command
-            command = [
-                "java", "-Xmx512m", 
-                "-cp", classpath,
-                "org.cpsolver.coursett.Test", 
-                "config.cfg", "input/problem.xml", "solved_output/"
-            ]
-            
-            # Log the command for debugging
-            self.logger.info(f"Running command: {' '.join(command)}")
-            
-            # Run the command and capture output
-            self._is_solving = True
-            self._process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            # Run the solver through the configured engine
+            output_dir = os.path.join(
+                self.cpsolver_path, "solved_output",
+                f"{TEST_SOLVER_JOB_ID}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            )
+            process = self.engine.start(
+                os.path.join(self.cpsolver_path, "config.cfg"),
+                os.path.join(self.cpsolver_path, "input", "problem.xml"),
+                output_dir
             )
+            self.registry.register(JobRecord(
+                problem_id=TEST_SOLVER_JOB_ID,
+                state="running",
+                message="Solver is currently running",
+                started_at=datetime.now(),
+                pid=process.pid,
+                problem_dir=output_dir,
+                solution_path=os.path.join(output_dir, "solution.xml"),
+                debug_log_path=os.path.join(output_dir, "debug.log"),
+                stdout_path=os.path.join(output_dir, STDOUT_FILE),
+                stderr_path=os.path.join(output_dir, STDERR_FILE),
+                process=process
+            ))
             
             # Create a function to monitor the process
             def monitor_process():
                 try:
-                    stdout, stderr = self._process.communicate()
-                    exit_code = self._process.returncode
-                    self._is_solving = False
+                    exit_code = process.wait()
+                    collect_output(output_dir)
+                    stdout = self._read_tail(os.path.join(output_dir, STDOUT_FILE))
+                    stderr = self._read_tail(os.path.join(output_dir, STDERR_FILE))
+                    record = self.registry.get(TEST_SOLVER_JOB_ID)
+                    state = record.state if record and record.state in ("stopped", "killed") else "completed"
+                    self.registry.update(
+                        TEST_SOLVER_JOB_ID,
+                        state=state,
+                        message=f"Solver completed with exit code: {exit_code}",
+                        exit_code=exit_code,
+                        finished_at=datetime.now(),
+                        output_tail=stdout,
+                        process=None
+                    )
                     
                     # Log the outcome
                     self.logger.info(f"Solver process completed with exit code: {exit_code}")
                     if stderr:
-                        self.logger.error(f"Solver error output: {stderr}")
+                        self.logger.error(f"Solver error output (tail): {stderr}")
                     if stdout:
-                        self.logger.info(f"Solver output: {stdout[:500]}...") # Log first 500 chars
+                        self.logger.info(f"Solver output (tail): {stdout[-500:]}") # Log last 500 chars
                     
-                    # Return to the original directory
-                    os.chdir(original_dir)
-                    
-                    return stdout, stderr, exit_code
+                    return exit_code
                 except Exception as e:
                     self.logger.error(f"Error in monitor thread: {e}")
-                    self._is_solving = False
-                    # Return to the original directory
-                    os.chdir(original_dir)
+                    self.registry.update(
+                        TEST_SOLVER_JOB_ID,
+                        state="error",
+                        message=f"Error in monitor thread: {e}",
+                        error=str(e),
+                        finished_at=datetime.now(),
+                        process=None
+                    )
             
             # Start the monitoring in a separate thread
-            self._solve_thread = threading.Thread(target=monitor_process)
-            self._solve_thread.start()
+            thread = threading.Thread(target=monitor_process)
+            thread.start()
             
             return {
                 "status": "started",
@@ -198,16 +210,8 @@ class SolverService:
             }
         
         except Exception as e:
-            self._is_solving = False
             error_message = str(e)
             self.logger.error(f"Error running solver: {error_message}")
-            
-            # Try to change back to the original directory if we changed it
-            try:
-                if 'original_dir' in locals():
-                    os.chdir(original_dir)
-            except:
-                pass
                 
             return {
                 "status": "error",
@@ -221,20 +225,21 @@ class SolverService:
         Returns:
             Dict containing the status information
         """
-        if self._is_solving:
-            return {
-                "status": "running",
-                "message": "Solver is currently running"
-            }
-        elif self._process is None:
+        record = self.registry.get(TEST_SOLVER_JOB_ID)
+        if record is None:
             return {
                 "status": "not_started",
                 "message": "Solver has not been started"
             }
+        elif record.is_active:
+            return {
+                "status": "running",
+                "message": "Solver is currently running"
+            }
         else:
             return {
-                "status": "completed",
-                "message": f"Solver completed with exit code: {self._process.returncode}"
+                "status": record.state,
+                "message": record.message
             }
     
     def stop_solver(self) -> Dict:
@@ -244,40 +249,848 @@ class SolverService:
         Returns:
             Dict containing the result of the stop operation
         """
-        if not self._is_solving or self._process is None:
+        return self._stop_job(
+            TEST_SOLVER_JOB_ID,
+            not_running_message="No solver process is currently running",
+            stopped_message="Solver process has been stopped",
+            killed_message="Solver process had to be forcefully terminated",
+            error_prefix="Error stopping solver"
+        )
+
+    def _stop_job(self, problem_id: str, not_running_message: str, stopped_message: str,
+                  killed_message: str, error_prefix: str) -> Dict:
+        """
+        Terminate the solver process of a registered job.
+        
+        The job is marked as stopped before the process is signalled, so the
+        monitor thread keeps that state instead of reporting the exit code as an error.
+        The solver gets SOLVER_STOP_TIMEOUT seconds to save the best solution it has
+        found so far before it is killed.
+        """
+        record = self.registry.get(problem_id)
+        if record is not None and record.state == "queued":
+            # Not started yet: the scheduler skips jobs that are no longer queued
+            if self.registry.update_if(problem_id, ("queued",), state="stopped", message=stopped_message,
+                                       finished_at=datetime.now()) is not None:
+                self._settle_job(problem_id)
+                return {
+                    "status": "stopped",
+                    "message": stopped_message
+                }
+            record = self.registry.get(problem_id)
+        if record is None or not record.is_active or record.process is None:
             return {
                 "status": "not_running",
-                "message": "No solver process is currently running"
+                "message": not_running_message
             }
         
+        process = record.process
         try:
-            self._process.terminate()
-            self._process.wait(timeout=5)
-            self._is_solving = False
+            self.registry.update(problem_id, state="stopped", message=stopped_message)
+            process.terminate()
+            process.wait(timeout=SOLVER_STOP_TIMEOUT)
             return {
                 "status": "stopped",
-                "message": "Solver process has been stopped"
+                "message": stopped_message
             }
         except subprocess.TimeoutExpired:
-            self._process.kill()
-            self._is_solving = False
+            self.registry.update(problem_id, state="killed", message=killed_message)
+            process.kill()
             return {
                 "status": "killed",
-                "message": "Solver process had to be forcefully terminated"
+                "message": killed_message
             }
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Error stopping solver: {str(e)}"
+                "message": f"{error_prefix}: {str(e)}"
             }
 
-    def solve_problem(self, problem_data: Dict[str, Any], problem_name: Optional[str] = None) -> Dict:
+    def _new_problem_id(self, problem_name: Optional[str]) -> str:
+        """
+        Create a unique problem ID, which is also the name of the problem's output folder.
+        
+        Args:
+            problem_name: Optional name for the problem
+            
+        Returns:
+            The problem ID, e.g. "timetable_20250316220411_1a2b3c4d"
+        """
+        safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', problem_name or 'problem')
+        return f"{safe_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    def _create_problem_dir(self, problem_id: str) -> str:
+        """
+        Create the output folder of a new problem in solved_output.
+        
+        Raises:
+            FileExistsError: If the folder already exists
+        """
+        problem_dir = os.path.join(self.cpsolver_path, "solved_output", problem_id)
+        os.makedirs(problem_dir)
+        return problem_dir
+
+    def _solve_key(self, xml_file_path: str, overrides: Optional[Dict[str, str]] = None,
+                   portfolio: int = 1) -> Optional[str]:
+        """Solve cache key of a problem XML, or None when the cache is disabled or the key cannot be computed."""
+        if not self.solve_cache.enabled:
+            return None
+        if portfolio > 1:
+            # A portfolio's best-of-K solution is not the solution of a single run
+            overrides = dict(overrides or {}, portfolio=str(portfolio))
+        try:
+            return self.solve_cache.key(
+                xml_file_path,
+                os.path.join(self.cpsolver_path, "config.cfg"),
+                find_solver_jar(self.cpsolver_path),
+                overrides
+            )
+        except OSError as e:
+            self.logger.warning(f"Could not compute the solve cache key of {xml_file_path}: {e}")
+            return None
+
+    def _reuse_cached_solution(self, problem_id: str, problem_name: Optional[str], problem_dir: str,
+                               xml_file_path: str, solve_key: str) -> Optional[Dict]:
+        """
+        Complete a problem right away with the cached solution of an identical submission.
+        
+        Returns:
+            Dict containing the status and problem ID, or None on a cache miss
+        """
+        meta = self.solve_cache.restore(solve_key, problem_dir)
+        if meta is None:
+            return None
+        
+        source = meta.get("problem_id")
+        message = f"Solution reused from an identical earlier submission ({source})" if source else \
+            "Solution reused from an identical earlier submission"
+        now = datetime.now()
+        self.registry.register(JobRecord(
+            problem_id=problem_id,
+            state="completed",
+            name=problem_name,
+            message=message,
+            started_at=now,
+            finished_at=now,
+            problem_dir=problem_dir,
+            solution_path=os.path.join(problem_dir, "solution.xml"),
+            debug_log_path=os.path.join(problem_dir, "debug.log"),
+            solution_available=True,
+            solve_key=solve_key
+        ))
+        try:
+            os.remove(xml_file_path)
+        except OSError:
+            pass
+        self.logger.info(f"Problem {problem_id} answered from the solve cache ({solve_key})")
+        return {
+            "status": "completed",
+            "message": message,
+            "problem_id": problem_id
+        }
+
+    def _previous_assignment(self, problem_id: str) -> Optional[Tuple[Dict[str, Dict], str]]:
+        """
+        Read the assignment of a solved problem, for warm-starting another solve from it.
+        
+        Returns:
+            Tuple of (assignment by class ID, problem folder), or None if the problem has no solution
+        """
+        record = self.registry.get(problem_id)
+        if record is not None and record.problem_dir:
+            problem_dir = record.problem_dir
+        else:
+            problem_dir = os.path.join(self.cpsolver_path, "solved_output", problem_id)
+        solution_path = os.path.join(problem_dir, "solution.xml")
+        if not os.path.isfile(solution_path):
+            return None
+        return read_assignment(solution_path), problem_dir
+
+    def _follow_inflight_solve(self, problem_id: str, problem_name: Optional[str], problem_dir: str,
+                               xml_file_path: str, solve_key: str,
+                               overrides: Optional[Dict[str, str]] = None, portfolio: int = 1) -> Optional[Dict]:
+        """
+        Attach a problem to the queued or running solve of an identical problem.
+        
+        The follower gets no solver of its own: its status is that of the leader's
+        solve, and the leader's solution is linked into its folder once the solve ends.
+        
+        Returns:
+            Dict containing the status and problem ID, or None if no identical problem is being solved
+        """
+        leader = self.registry.follow(solve_key, JobRecord(
+            problem_id=problem_id,
+            state="queued",
+            name=problem_name,
+            message="Waiting for the solve of an identical problem",
+            problem_dir=problem_dir,
+            input_path=xml_file_path,
+            solution_path=os.path.join(problem_dir, "solution.xml"),
+            debug_log_path=os.path.join(problem_dir, "debug.log"),
+            stdout_path=os.path.join(problem_dir, STDOUT_FILE),
+            stderr_path=os.path.join(problem_dir, STDERR_FILE),
+            solve_key=solve_key,
+            overrides=dict(overrides or {}),
+            portfolio_size=portfolio
+        ))
+        if leader is None:
+            return None
+        
+        message = f"Sharing the solve of identical problem {leader.problem_id}"
+        self.registry.update(problem_id, message=message)
+        self.logger.info(f"Problem {problem_id} follows the solve of identical problem {leader.problem_id}")
+        return {
+            "status": "queued" if leader.state == "queued" else "running",
+            "message": message,
+            "problem_id": problem_id
+        }
+
+    def _submit_job(self, problem_id: str, solve_key: Optional[str]) -> int:
+        """
+        Hand a queued job to the solver scheduler, as the solve identical submissions will follow.
+        
+        Returns:
+            Number of jobs ahead of it
+            
+        Raises:
+            QueueFullError: If the queue is full; jobs that started following it are requeued
+        """
+        if solve_key is not None:
+            self.registry.claim_leader(solve_key, problem_id)
+        record = self.registry.get(problem_id)
+        predicted_seconds = record.estimate["predicted_seconds"] if record is not None and record.estimate else None
+        try:
+            return self.scheduler.submit(problem_id, lambda: self._run_problem_job(problem_id), predicted_seconds,
+                                         record.portfolio_size if record is not None else 1)
+        except QueueFullError:
+            if solve_key is not None:
+                for follower_id in self.registry.release_leader(solve_key, problem_id):
+                    self._requeue_follower(follower_id)
+            raise
+
+    def _requeue_follower(self, problem_id: str) -> None:
+        """Give a follower whose leader was cancelled a solve of its own (or let it follow another one)."""
+        record = self.registry.update_if(problem_id, ("queued",), leader_id=None,
+                                         message="Waiting for a free solver slot")
+        if record is None:
+            return
+        if record.solve_key is not None:
+            leader = self.registry.follow(record.solve_key, record)
+            if leader is not None:
+                self.registry.update(problem_id, message=f"Sharing the solve of identical problem {leader.problem_id}")
+                return
+        try:
+            self._submit_job(problem_id, record.solve_key)
+        except QueueFullError as e:
+            self.registry.update_if(problem_id, ("queued",), state="error", message=str(e), error=str(e),
+                                    finished_at=datetime.now())
+
+    def _settle_job(self, problem_id: str) -> None:
+        """
+        Hand the outcome of a job that has ended on: to the problems sharing its solve and,
+        if it solved one part of a decomposed problem, to that problem.
+        """
+        self._release_followers(problem_id)
+        record = self.registry.get(problem_id)
+        if record is not None and record.parent_id:
+            self._finish_decomposed(record.parent_id)
+
+    def _release_followers(self, problem_id: str) -> None:
+        """
+        Hand the outcome of a finished solve to the problems that shared it.
+        
+        Followers get the leader's final state and a link to its solution.xml. If the
+        leader was stopped, its followers are requeued instead: the cancellation was
+        meant for the leader only.
+        """
+        record = self.registry.get(problem_id)
+        if record is None or record.solve_key is None:
+            return
+        for follower_id in self.registry.release_leader(record.solve_key, problem_id):
+            follower = self.registry.get(follower_id)
+            if follower is None or not follower.is_active:
+                continue
+            if record.state in ("stopped", "killed"):
+                self._requeue_follower(follower_id)
+                continue
+            
+            state, message, error = record.state, f"{record.message} (shared with identical problem {problem_id})", record.error
+            solution_available = False
+            if record.solution_available:
+                try:
+                    link_or_copy(record.solution_path, follower.solution_path)
+                    solution_available = True
+                except OSError as e:
+                    self.logger.warning(f"Could not share the solution of {problem_id} with {follower_id}: {e}")
+                    state, message, error = "error", f"Could not share the solution of identical problem {problem_id}: {e}", str(e)
+            self.registry.update_if(
+                follower_id,
+                ("queued",),
+                state=state,
+                message=message,
+                error=error,
+                exit_code=record.exit_code,
+                started_at=record.started_at,
+                finished_at=datetime.now(),
+                solution_available=solution_available
+            )
+            if follower.input_path and os.path.exists(follower.input_path):
+                os.remove(follower.input_path)
+
+    def _enqueue_problem(self, problem_id: str, problem_name: Optional[str],
+                         problem_dir: str, xml_file_path: str, use_cache: bool = True,
+                         overrides: Optional[Dict[str, str]] = None, portfolio: int = 1,
+                         decompose: bool = False, estimate: Optional[Dict] = None) -> Dict:
+        """
+        Register a converted problem as queued and hand it to the solver scheduler.
+        
+        A problem identical to one solved before (same XML, config.cfg and solver JAR)
+        is completed right away from the solve cache, and one identical to a problem
+        that is queued or being solved shares that solve instead of starting another,
+        unless use_cache is False. The solution of a fresh solve is added to the cache
+        either way. With decompose, a problem made of independent parts is solved
+        one part per solver slot (see decomposition).
+        
+        Args:
+            problem_id: ID of the problem
+            problem_name: Optional name for the problem
+            problem_dir: Output folder of the problem
+            xml_file_path: Path of the problem XML in the input folder
+            use_cache: Look the problem up in the solve cache first
+            overrides: Solver properties to set on top of config.cfg
+            portfolio: Number of solver runs with different seeds, capped at PORTFOLIO_MAX_SIZE
+                and the number of solver slots; the runs take that many slots
+            decompose: Split the problem into independent parts and solve them concurrently
+            estimate: Predicted solve time and memory (see estimator), used for the queue
+                order and the heap of the solver
+            
+        Returns:
+            Dict containing the status and problem ID, plus retry_after when the queue is full
+        """
+        overrides = dict(overrides or {})
+        portfolio = max(1, min(portfolio, PORTFOLIO_MAX_SIZE, self.scheduler.max_concurrent))
+        solve_key = self._solve_key(xml_file_path, overrides, portfolio)
+        if use_cache and solve_key is not None:
+            result = self._reuse_cached_solution(problem_id, problem_name, problem_dir, xml_file_path, solve_key)
+            if result is None:
+                result = self._follow_inflight_solve(problem_id, problem_name, problem_dir, xml_file_path,
+                                                     solve_key, overrides, portfolio)
+            if result is not None:
+                return result
+        
+        if decompose:
+            result = self._enqueue_decomposed(problem_id, problem_name, problem_dir, xml_file_path,
+                                              solve_key, overrides, portfolio, estimate)
+            if result is not None:
+                return result
+        
+        self.registry.register(JobRecord(
+            problem_id=problem_id,
+            state="queued",
+            name=problem_name,
+            message="Waiting for a free solver slot",
+            problem_dir=problem_dir,
+            input_path=xml_file_path,
+            solution_path=os.path.join(problem_dir, "solution.xml"),
+            debug_log_path=os.path.join(problem_dir, "debug.log"),
+            stdout_path=os.path.join(problem_dir, STDOUT_FILE),
+            stderr_path=os.path.join(problem_dir, STDERR_FILE),
+            solve_key=solve_key,
+            overrides=overrides,
+            portfolio_size=portfolio,
+            estimate=estimate
+        ))
+        
+        try:
+            ahead = self._submit_job(problem_id, solve_key)
+        except QueueFullError as e:
+            self.registry.remove(problem_id)
+            for path in (xml_file_path, problem_dir):
+                try:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                except Exception:
+                    pass
+            self.logger.warning(f"Rejected problem submission: {e}")
+            return {
+                "status": "error",
+                "message": str(e),
+                "problem_id": None,
+                "retry_after": e.retry_after
+            }
+        
+        message = f"Problem queued for solving ({ahead} job(s) ahead)"
+        if portfolio > 1:
+            message += f" as a portfolio of {portfolio} runs"
+        return {
+            "status": "queued",
+            "message": message,
+            "problem_id": problem_id
+        }
+
+    def _enqueue_decomposed(self, problem_id: str, problem_name: Optional[str], problem_dir: str,
+                            xml_file_path: str, solve_key: Optional[str], overrides: Dict[str, str],
+                            portfolio: int, estimate: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Split a problem into independent parts and queue one solve per part.
+        
+        The parts are registered as problems of their own (<problem_id>.part<N>, with
+        their folders in <problem_dir>/components), each with its own estimate; the
+        problem itself runs until all of them have ended, then gets their merged
+        solution (see _finish_decomposed). The parts are queued all at once or not at all.
+        
+        Returns:
+            Dict containing the status and problem ID, or None if the problem does not
+            split or the queue has no room for all parts
+        """
+        try:
+            root = ET.parse(xml_file_path).getroot()
+            parts = pack_components(find_components(root), DECOMPOSE_MAX_PARTS)
+        except (OSError, ET.ParseError) as e:
+            self.logger.warning(f"Could not decompose problem {problem_id}: {e}")
+            return None
+        if len(parts) < 2:
+            return None
+        if self.scheduler.queue_size - self.scheduler.queued < len(parts):
+            # Not enough room in the queue for all parts: solve the problem as a whole
+            return None
+        
+        base_path = os.path.splitext(xml_file_path)[0]
+        part_ids = [f"{problem_id}.part{i}" for i in range(1, len(parts) + 1)]
+        part_paths = [f"{base_path}.part{i}.xml" for i in range(1, len(parts) + 1)]
+        part_estimates = [self._estimate(part_root, overrides, part_id)
+                          for part_root, part_id in zip(write_parts(root, parts, part_paths), part_ids)]
+        del root
+        
+        self.registry.register(JobRecord(
+            problem_id=problem_id,
+            state="running",
+            name=problem_name,
+            message=f"Solving {len(parts)} independent parts (0 finished)",
+            started_at=datetime.now(),
+            problem_dir=problem_dir,
+            input_path=xml_file_path,
+            solution_path=os.path.join(problem_dir, "solution.xml"),
+            debug_log_path=os.path.join(problem_dir, "debug.log"),
+            solve_key=solve_key,
+            overrides=overrides,
+            portfolio_size=portfolio,
+            estimate=estimate,
+            components=part_ids
+        ))
+        
+        jobs = []
+        for part_id, part_path, part, part_estimate in zip(part_ids, part_paths, parts, part_estimates):
+            part_dir = os.path.join(problem_dir, "components", part_id.rsplit(".", 1)[1])
+            os.makedirs(part_dir, exist_ok=True)
+            self.registry.register(JobRecord(
+                problem_id=part_id,
+                state="queued",
+                name=problem_name,
+                message=f"Waiting for a free solver slot ({len(part)} classes)",
+                problem_dir=part_dir,
+                input_path=part_path,
+                solution_path=os.path.join(part_dir, "solution.xml"),
+                debug_log_path=os.path.join(part_dir, "debug.log"),
+                stdout_path=os.path.join(part_dir, STDOUT_FILE),
+                stderr_path=os.path.join(part_dir, STDERR_FILE),
+                overrides=overrides,
+                portfolio_size=portfolio,
+                estimate=part_estimate,
+                parent_id=problem_id
+            ))
+            jobs.append((part_id, lambda part_id=part_id: self._run_problem_job(part_id),
+                         part_estimate["predicted_seconds"] if part_estimate else None))
+        if solve_key is not None:
+            self.registry.claim_leader(solve_key, problem_id)
+        try:
+            self.scheduler.submit_all(jobs, slots=portfolio)
+        except QueueFullError:
+            # The queue filled up since the check above: undo the split and solve the problem as a whole
+            if solve_key is not None:
+                for follower_id in self.registry.release_leader(solve_key, problem_id):
+                    self._requeue_follower(follower_id)
+            for part_id, part_path in zip(part_ids, part_paths):
+                self.registry.remove(part_id)
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+            shutil.rmtree(os.path.join(problem_dir, "components"), ignore_errors=True)
+            self.registry.remove(problem_id)
+            return None
+        
+        self.logger.info(f"Problem {problem_id} split into {len(parts)} independent parts: "
+                         f"{', '.join(str(len(part)) for part in parts)} classes")
+        return {
+            "status": "running",
+            "message": f"Problem split into {len(parts)} independent parts, queued for solving in parallel",
+            "problem_id": problem_id
+        }
+
+    def _finish_decomposed(self, problem_id: str) -> None:
+        """
+        Finish a decomposed problem once all of its parts have ended.
+        
+        The parts' solutions are merged into the problem's solution.xml (only if every
+        part has one) and their debug logs are concatenated into its debug.log. The
+        problem is completed if every part was, stopped if it or a part was stopped,
+        and an error otherwise.
+        """
+        with _decomposition_lock:
+            record = self.registry.get(problem_id)
+            if record is None or record.finished_at is not None:
+                return
+            parts = [self.registry.get(part_id) for part_id in record.components]
+            # A stopped part is only done once its monitor has collected its solution and set finished_at
+            finished = sum(1 for part in parts if part is None or part.finished_at is not None)
+            if finished < len(parts):
+                if record.is_active:
+                    self.registry.update(problem_id, message=f"Solving {len(parts)} independent parts ({finished} finished)")
+                return
+            
+            solution_available = False
+            try:
+                merge_logs([part.debug_log_path for part in parts if part is not None], record.debug_log_path)
+                if all(part is not None and part.solution_available for part in parts):
+                    merge_solutions([part.solution_path for part in parts], record.solution_path)
+                    solution_available = True
+            except (OSError, ET.ParseError) as e:
+                self.logger.error(f"Could not merge the parts of problem {problem_id}: {e}")
+            
+            failed = next((part for part in parts if part is None or part.state == "error"), None)
+            if record.state in ("stopped", "killed"):
+                state, message, error = record.state, record.message, None
+            elif any(part.state in ("stopped", "killed") for part in parts if part is not None):
+                state, message, error = "stopped", "A part of the problem was stopped", None
+            elif failed is not None or not solution_available:
+                error = failed.error if failed is not None and failed.error else "Could not merge the solutions of the parts"
+                state, message = "error", f"Solver encountered an error: {error}"
+            else:
+                state, message, error = "completed", f"Solver completed successfully ({len(parts)} independent parts solved in parallel)", None
+            record = self.registry.update(
+                problem_id,
+                state=state,
+                message=message,
+                error=error,
+                exit_code=0 if state == "completed" else 1,
+                finished_at=datetime.now(),
+                solution_available=solution_available
+            )
+            if record is None:
+                return
+        
+        if record.state == "completed" and record.solve_key:
+            self.solve_cache.store(record.solve_key, record.solution_path, problem_id)
+        self._release_followers(problem_id)
+        try:
+            os.remove(record.input_path)
+        except OSError:
+            pass
+
+    def _run_problem_job(self, problem_id: str) -> None:
+        """
+        Solve a queued problem. Runs on a scheduler slot and returns when the solver has exited.
+        """
+        record = self.registry.get(problem_id)
+        if record is None or record.state != "queued":
+            # Cancelled while waiting in the queue
+            if record is not None and record.input_path and os.path.exists(record.input_path):
+                os.remove(record.input_path)
+            return
+        
+        cpsolver_abs_path = os.path.abspath(self.cpsolver_path)
+        
+        try:
+            # Run the solver through the configured engine, writing into the problem's own folder
+            config_path = os.path.join(cpsolver_abs_path, "config.cfg")
+            max_heap = record.estimate.get("heap") if record.estimate else None
+            if record.portfolio_size > 1:
+                process = SolverPortfolio(self.engine, config_path, record.input_path, record.problem_dir,
+                                          record.portfolio_size, record.overrides, max_heap=max_heap).start()
+            else:
+                process = self.engine.start(config_path, record.input_path, record.problem_dir, record.overrides,
+                                            max_heap)
+            if self.registry.update_if(problem_id, ("queued",), state="running",
+                                       message="Solver process started successfully",
+                                       started_at=datetime.now(), pid=process.pid, process=process) is None:
+                # Cancelled while the solver was starting
+                self.registry.update(problem_id, started_at=datetime.now(), pid=process.pid, process=process)
+                process.terminate()
+        except Exception as e:
+            self.logger.error(f"Error running solver for problem {problem_id}: {e}")
+            self.registry.update(
+                problem_id,
+                state="error",
+                message=f"Failed to start solver: {e}",
+                error=str(e),
+                finished_at=datetime.now()
+            )
+            self._settle_job(problem_id)
+            return
+        
+        # Wait for the solver in this slot, so the slot stays busy until it exits
+        self._monitor_problem_process(problem_id)
+
+    def _monitor_problem_process(self, pid: str) -> None:
+        """Wait for a problem's solver process and record its outcome in the registry."""
+        try:
+            record = self.registry.get(pid)
+            if not record or record.process is None:
+                return
+                
+            proc = record.process
+            exit_code = proc.wait()
+            collect_output(record.problem_dir)
+            stdout = self._read_tail(record.stdout_path)
+            stderr = self._read_tail(record.stderr_path) or getattr(proc, "error", None)
+            
+            # Update status
+            self._finish_problem_job(pid, exit_code, stdout)
+            
+            # Log the outcome
+            self.logger.info(f"Problem {pid} solver process completed with exit code: {exit_code}")
+            if stderr:
+                self.logger.error(f"Problem {pid} solver error output (tail): {stderr}")
+            if stdout:
+                self.logger.info(f"Problem {pid} solver output (tail): {stdout[-500:]}") # Log last 500 chars
+            
+            # Clean up the temporary XML file
+            try:
+                os.remove(record.input_path)
+                self.logger.info(f"Removed temporary XML file: {record.input_path}")
+            except Exception as e:
+                self.logger.warning(f"Could not remove temporary XML file: {e}")
+            
+        except Exception as e:
+            self.logger.error(f"Error in monitor thread for problem {pid}: {e}")
+            self.registry.update(
+                pid,
+                state="error",
+                message=f"Solver encountered an error: {e}",
+                error=str(e),
+                finished_at=datetime.now(),
+                process=None
+            )
+            self._settle_job(pid)
+
+    def _finish_problem_job(self, problem_id: str, exit_code: int, output_tail: Optional[str] = None) -> None:
+        """
+        Set the final state of a problem job once its solver process has exited.
+        
+        The debug log is scanned for errors once here, so that status requests
+        can be answered from the registry without reading it again.
+        """
+        record = self.registry.get(problem_id)
+        if record is None:
+            return
+        
+        # The last best-so-far snapshot stands in for a solution the solver did not get to save
+        snapshot_path = os.path.join(record.problem_dir, SNAPSHOT_FILE)
+        try:
+            if os.path.exists(snapshot_path):
+                if os.path.exists(record.solution_path):
+                    os.remove(snapshot_path)
+                else:
+                    os.replace(snapshot_path, record.solution_path)
+        except OSError as e:
+            self.logger.warning(f"Could not clean up the snapshot of problem {problem_id}: {e}")
+        
+        solution_available = os.path.exists(record.solution_path)
+        error_line = self._find_error_line(record.debug_log_path)
+        
+        if record.state in ("stopped", "killed"):
+            state, message, error = record.state, record.message, None
+            if solution_available:
+                message += "; the best solution found so far was saved"
+        elif exit_code == 0 and error_line is None:
+            state, message, error = "completed", "Solver completed successfully", None
+            if isinstance(record.process, SolverPortfolio):
+                message += f" ({record.process.describe()})"
+        else:
+            error = error_line or f"Exit code: {exit_code}"
+            state, message = "error", f"Solver encountered an error: {error}"
+        
+        self.registry.update(
+            problem_id,
+            state=state,
+            message=message,
+            error=error,
+            exit_code=exit_code,
+            finished_at=datetime.now(),
+            solution_available=solution_available,
+            output_tail=output_tail,
+            process=None
+        )
+        
+        if state == "completed" and solution_available and record.solve_key:
+            self.solve_cache.store(record.solve_key, record.solution_path, problem_id)
+        # Portfolio runs share the CPU, so their speed would skew the estimates of single solves
+        if state == "completed" and record.estimate is not None and record.portfolio_size == 1 \
+                and record.started_at is not None:
+            self._record_solve(record)
+        self._settle_job(problem_id)
+
+    def _read_tail(self, path: Optional[str], max_bytes: int = OUTPUT_TAIL_BYTES) -> str:
+        """
+        Read the last max_bytes of a solver output file.
+        
+        Only the end of the file is read, so this stays cheap for long verbose solves.
+        """
+        if not path or not os.path.exists(path):
+            return ""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - max_bytes))
+                return f.read().decode('utf-8', errors='replace')
+        except Exception as e:
+            self.logger.warning(f"Error reading {path}: {e}")
+            return ""
+
+    def _find_error_line(self, debug_log_path: Optional[str]) -> Optional[str]:
+        """Return the first error line of a debug.log file, if any."""
+        if not debug_log_path or not os.path.exists(debug_log_path):
+            return None
+        try:
+            return get_log_index(debug_log_path).scan(include_partial=True)
+        except Exception as e:
+            self.logger.warning(f"Error reading {debug_log_path}: {e}")
+        return None
+
+    def _analyse_problem(self, xml_file_path: str, labels: Optional[Dict[str, Dict[str, str]]] = None,
+                         overrides: Optional[Dict[str, str]] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Check a problem XML about to be queued and predict its solve, parsing it once for both.
+        
+        Args:
+            xml_file_path: Problem XML in the input folder; removed if the problem is infeasible
+            labels: Names of classes, instructors and rooms for the messages (see feasibility.converter_labels)
+            overrides: Solver properties the problem will be solved with
+            
+        Returns:
+            Tuple of (error result with the feasibility report if the problem cannot be solved,
+            solve estimate); either is None when it does not apply or could not be made
+        """
+        root = report = None
+        try:
+            root = ET.parse(xml_file_path).getroot()
+        except ET.ParseError as e:
+            if FEASIBILITY_CHECK:
+                report = invalid_xml_report(e)
+        except Exception as e:
+            # The analysis only saves solver time; a problem it cannot read is solved as before
+            self.logger.warning(f"Could not analyse {xml_file_path}: {e}")
+            return None, None
+        
+        if root is not None and FEASIBILITY_CHECK:
+            try:
+                report = check_feasibility(root, labels)
+            except Exception as e:
+                self.logger.warning(f"Feasibility check of {xml_file_path} failed: {e}")
+        if report is not None and not report["feasible"]:
+            self.logger.info(f"Rejected {xml_file_path}: {report['message']}")
+            os.remove(xml_file_path)
+            return {
+                "status": "error",
+                "message": report["message"],
+                "problem_id": None,
+                "feasibility": report
+            }, None
+        
+        estimate = self._estimate(root, overrides, xml_file_path) if root is not None else None
+        return None, estimate
+    
+    def _estimate(self, root: ET.Element, overrides: Optional[Dict[str, str]], label: str) -> Optional[Dict]:
+        """Predict the solve of a parsed problem (see estimator); None if that fails."""
+        try:
+            config_path = os.path.join(os.path.abspath(self.cpsolver_path), "config.cfg")
+            time_limit, stop_when_complete = solve_termination(config_path, overrides)
+            estimate = self.solve_history.predict(problem_metrics(root), time_limit, stop_when_complete)
+            if not self.engine.sizes_heap:
+                # The engine's JVMs have a fixed heap; do not report one that is not applied
+                estimate["heap"] = None
+            return estimate
+        except Exception as e:
+            self.logger.warning(f"Could not estimate the solve of {label}: {e}")
+            return None
+    
+    def _record_solve(self, record: JobRecord) -> None:
+        """Add a completed solve to the history the estimates are made from."""
+        try:
+            estimate = record.estimate
+            runtime = (datetime.now() - record.started_at).total_seconds()
+            stats = read_solver_stats(os.path.join(record.problem_dir, "stat.csv"))
+            memory_mb = (read_solution_summary(record.solution_path) or {}).get("memory_mb")
+            self.solve_history.record(estimate["metrics"], runtime, stats, memory_mb,
+                                      estimate["time_limit"], estimate["stop_when_complete"])
+        except Exception as e:
+            self.logger.warning(f"Could not record the solve of problem {record.problem_id}: {e}")
+    
+    def validate_problem(self, problem_data: Dict[str, Any]) -> Dict:
+        """
+        Run only the feasibility check on a problem in JSON format; nothing is saved or queued.
+        
+        Args:
+            problem_data: Dictionary containing the JSON representation of the problem
+            
+        Returns:
+            Dict containing the status, message and feasibility report
+        """
+        try:
+            converter = JSONtoXMLConverter(problem_data, compact_constraints=COMPACT_GROUP_CONSTRAINTS)
+            xml_content = converter.convert()
+        except Exception as e:
+            error_message = f"Error converting JSON to XML: {str(e)}"
+            self.logger.error(error_message)
+            return {
+                "status": "error",
+                "message": error_message
+            }
+        report = check_feasibility(io.StringIO(xml_content), converter_labels(converter))
+        return {
+            "status": "success" if report["feasible"] else "error",
+            "message": report["message"],
+            "feasibility": report
+        }
+    
+    def validate_problem_xml(self, xml_content: str) -> Dict:
+        """
+        Run only the feasibility check on a problem in XML format; nothing is saved or queued.
+        
+        Args:
+            xml_content: String containing the XML representation of the problem
+            
+        Returns:
+            Dict containing the status, message and feasibility report
+        """
+        report = check_feasibility(io.StringIO(xml_content))
+        return {
+            "status": "success" if report["feasible"] else "error",
+            "message": report["message"],
+            "feasibility": report
+        }
+    
+    def solve_problem(self, problem_data: Dict[str, Any], problem_name: Optional[str] = None,
+                      use_cache: bool = True, warm_start_from: Optional[str] = None,
+                      portfolio: int = 1, time_limit: Optional[int] = None,
+                      stop_when_complete: Optional[bool] = None, decompose: Optional[bool] = None) -> Dict:
         """
         Process a user submitted problem in JSON format, convert to XML, and solve.
         
         Args:
             problem_data: Dictionary containing the JSON representation of the problem
             problem_name: Optional name for the problem
+            use_cache: Reuse the solution of an identical earlier submission if there is one
+            warm_start_from: ID of a solved problem whose assignment the solve starts from
+                (minimal perturbation mode); classes are matched by name and meeting index
+            portfolio: Number of solver runs with different seeds; the best solution is kept
+            time_limit: Seconds the solver may run, instead of Termination.TimeOut from config.cfg
+            stop_when_complete: Stop as soon as all classes are assigned (Termination.StopWhenComplete)
+            decompose: Solve independent parts of the problem concurrently (default: SOLVER_DECOMPOSE)
             
         Returns:
             Dict containing the status and problem ID
@@ -313,209 +1126,72 @@ class SolverService:
                 os.makedirs(input_dir, exist_ok=True)
                 self.logger.info(f"Created input directory: {input_dir}")
             
-            # Check for the JAR file directly
-            jar_path = os.path.join(cpsolver_abs_path, "cpsolver-1.4.74.jar")
-            self.logger.info(f"Checking for JAR file at: {jar_path}")
-            self.logger.info(f"JAR file exists: {os.path.exists(jar_path)}")
-            
-            # If jar file not found, try to find it with a glob pattern
-            if not os.path.exists(jar_path):
-                import glob
-                jar_files = glob.glob(os.path.join(cpsolver_abs_path, "cpsolver*.jar"))
-                jar_files = [f for f in jar_files if not ('javadoc' in f or 'sources' in f)]
-                if jar_files:
-                    jar_path = jar_files[0]
-                    self.logger.info(f"Found alternative JAR file: {jar_path}")
-                else:
-                    error_message = f"No suitable cpsolver JAR file found in {cpsolver_abs_path}"
-                    self.logger.error(error_message)
+            # Previous placements to start from, by class name and meeting index
+            initial_assignment = None
+            overrides = termination_properties(time_limit, stop_when_complete)
+            if warm_start_from:
+                previous = self._previous_assignment(warm_start_from)
+                if previous is None:
                     return {
                         "status": "error",
-                        "message": error_message
+                        "message": f"Solution of problem {warm_start_from} not found",
+                        "problem_id": None
                     }
+                assignment, previous_dir = previous
+                # Class and room IDs of the previous problem come from its original JSON; without
+                # one (an XML submission) they are assumed to match the IDs of the new problem
+                previous_data = load_original_json(os.path.join(previous_dir, "original.json"))
+                id_source = JSONtoXMLConverter(previous_data if previous_data is not None else problem_data)
+                initial_assignment = assignment_by_name(assignment, id_source.meeting_keys(), id_source.room_names())
+                overrides.update(WARM_START_PROPERTIES)
             
-            # Get the list of folders in solved_output before running the solver
-            existing_folders = set()
-            try:
-                existing_folders = set(os.listdir(solved_output_dir))
-                self.logger.info(f"Found {len(existing_folders)} existing folders in solved_output")
-            except Exception as e:
-                self.logger.warning(f"Error listing solved_output directory: {e}")
-            
-            # Use a temporary ID for the XML file
-            temp_id = f"temp_{datetime.now().strftime('%Y%m%d%H%M%S')}_{str(uuid.uuid4())[:8]}"
+            # The problem ID names both the input file and the output folder
+            problem_id = self._new_problem_id(problem_name)
             
-            # Convert JSON to XML
+            # Convert JSON to XML, streamed straight into the input folder
+            xml_file_path = os.path.join(input_dir, f"{problem_id}.xml")
             try:
-                converter = JSONtoXMLConverter(problem_data)
-                xml_content = converter.convert()
-                
-                # Save the XML to the input folder with a temporary name
-                xml_file_path = os.path.join(input_dir, f"{temp_id}.xml")
-                with open(xml_file_path, 'w', encoding='utf-8') as f:
-                    f.write(xml_content)
+                converter = JSONtoXMLConverter(problem_data, compact_constraints=COMPACT_GROUP_CONSTRAINTS,
+                                               initial_assignment=initial_assignment)
+                converter.convert_to_file(xml_file_path)
                     
                 self.logger.info(f"Problem converted to XML and saved at {xml_file_path}")
             except Exception as e:
                 error_message = f"Error converting JSON to XML: {str(e)}"
                 self.logger.error(error_message)
+                if os.path.exists(xml_file_path):
+                    os.remove(xml_file_path)
                 return {
                     "status": "error",
                     "message": error_message
                 }
             
-            # Store the original directory to go back to
-            original_dir = os.getcwd()
+            # Reject a problem that cannot be solved before it takes a solver slot, and estimate its solve
+            infeasible, estimate = self._analyse_problem(xml_file_path, converter_labels(converter), overrides)
+            if infeasible is not None:
+                return infeasible
             
+            # Save the original problem for reference
+            problem_dir = self._create_problem_dir(problem_id)
+            original_path = os.path.join(problem_dir, "original.json")
             try:
-                # Change to cpsolver directory for the command to work properly
-                os.chdir(cpsolver_abs_path)
-                self.logger.info(f"Changed directory to: {os.getcwd()}")
-                
-                # Adjust the classpath separator based on the operating system
-                separator = ";" if sys.platform.startswith("win") else ":"
-                
-                # Build classpath using just the main JAR - try to find dependent JARs in lib
-                lib_dir = os.path.join(cpsolver_abs_path, "lib")
-                if os.path.exists(lib_dir) and os.path.isdir(lib_dir):
-                    self.logger.info(f"Found lib directory: {lib_dir}")
-                    lib_files = [os.path.join(lib_dir, f) for f in os.listdir(lib_dir) if f.endswith('.jar')]
-                    self.logger.info(f"Found lib files: {lib_files}")
-                    classpath = separator.join([jar_path] + lib_files)
-                else:
-                    self.logger.info("No lib directory found, using only main JAR")
-                    classpath = jar_path
-                
-                self.logger.info(f"Using classpath: {classpath}")
-                
-                # Construct the command - use relative paths since we're in the cpsolver directory
-                command = [
-                    "java", "-Xmx512m", 
-                    "-cp", classpath,
-                    "org.cpsolver.coursett.Test", 
-                    "config.cfg", 
-                    os.path.join("input", f"{temp_id}.xml"), 
-                    "solved_output/"
-                ]
-                
-                # Log the command for debugging
-                self.logger.info(f"Running command: {' '.join(command)}")
-                
-                # Run the command and capture output
-                process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                # Wait a short time for the solver to create its output directory
-                import time
-                time.sleep(2)
-                
-                # Check for new folders in solved_output
-                new_folders = set()
-                try:
-                    new_folders = set(os.listdir(solved_output_dir)) - existing_folders
-                    self.logger.info(f"Found {len(new_folders)} new folders in solved_output: {new_folders}")
-                except Exception as e:
-                    self.logger.warning(f"Error listing solved_output directory after solver start: {e}")
-                
-                if not new_folders:
-                    self.logger.warning("No new folder detected in solved_output directory")
-                    # If no folder was created, we'll use a fallback ID
-                    problem_id = f"{problem_name or 'problem'}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    # Create a directory for this problem's output
-                    problem_dir = os.path.join(solved_output_dir, problem_id)
-                    try:
-                        os.makedirs(problem_dir, exist_ok=True)
-                        self.logger.info(f"Created fallback problem directory: {problem_dir}")
-                    except Exception as e:
-                        self.logger.error(f"Error creating fallback directory: {e}")
-                        # Change directory back before raising
-                        os.chdir(original_dir)
-                        return {
-                            "status": "error",
-                            "message": f"Error creating problem directory: {str(e)}"
-                        }
-                else:
-                    # Use the first new folder as the problem ID
-                    problem_id = list(new_folders)[0]
-                    problem_dir = os.path.join(solved_output_dir, problem_id)
-                
-                # Save the original JSON for reference
-                json_file_path = os.path.join(problem_dir, "original.json")
-                try:
-                    with open(json_file_path, 'w', encoding='utf-8') as f:
-                        json.dump(problem_data, f, indent=2)
-                    self.logger.info(f"Saved original JSON to {json_file_path}")
-                except Exception as e:
-                    self.logger.warning(f"Could not save original JSON: {e}")
-                
-                # Store the process info
-                self._problem_processes[problem_id] = {
-                    "process": process,
-                    "is_solving": True,
-                    "start_time": datetime.now()
-                }
-                
-                # Create a function to monitor the process
-                def monitor_problem_process(pid):
-                    try:
-                        process_info = self._problem_processes.get(pid)
-                        if not process_info:
-                            return
-                            
-                        proc = process_info["process"]
-                        stdout, stderr = proc.communicate()
-                        exit_code = proc.returncode
-                        
-                        # Update status
-                        self._problem_processes[pid]["is_solving"] = False
-                        self._problem_processes[pid]["exit_code"] = exit_code
-                        self._problem_processes[pid]["stdout"] = stdout
-                        self._problem_processes[pid]["stderr"] = stderr
-                        self._problem_processes[pid]["end_time"] = datetime.now()
-                        
-                        # Log the outcome
-                        self.logger.info(f"Problem {pid} solver process completed with exit code: {exit_code}")
-                        if stderr:
-                            self.logger.error(f"Problem {pid} solver error output: {stderr}")
-                        if stdout:
-                            self.logger.info(f"Problem {pid} solver output: {stdout[:500]}...") # Log first 500 chars
-                        
-                        # Clean up the temporary XML file
-                        try:
-                            os.remove(xml_file_path)
-                            self.logger.info(f"Removed temporary XML file: {xml_file_path}")
-                        except Exception as e:
-                            self.logger.warning(f"Could not remove temporary XML file: {e}")
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error in monitor thread for problem {pid}: {e}")
-                        if pid in self._problem_processes:
-                            self._problem_processes[pid]["is_solving"] = False
-                            self._problem_processes[pid]["error"] = str(e)
-                    finally:
-                        # Return to the original directory
-                        os.chdir(original_dir)
-                
-                # Start the monitoring in a separate thread
-                thread = threading.Thread(target=monitor_problem_process, args=(problem_id,))
-                thread.start()
-                
-                return {
-                    "status": "started",
-                    "message": "Solver process started successfully",
-                    "problem_id": problem_id
-                }
-            finally:
-                # Make sure we always go back to the original directory if we change it
-                try:
-                    os.chdir(original_dir)
-                    self.logger.info(f"Changed directory back to: {os.getcwd()}")
-                except Exception as e:
-                    self.logger.error(f"Error changing back to original directory: {e}")
+                with open(original_path, 'w', encoding='utf-8') as f:
+                    json.dump(problem_data, f, indent=2)
+                self.logger.info(f"Saved original problem to {original_path}")
+            except Exception as e:
+                self.logger.warning(f"Could not save original problem: {e}")
+            
+            # Queue the problem for the next free solver slot
+            result = self._enqueue_problem(problem_id, problem_name, problem_dir, xml_file_path, use_cache,
+                                           overrides, portfolio,
+                                           DECOMPOSE_PROBLEMS if decompose is None else decompose, estimate)
+            if warm_start_from and result["status"] != "error":
+                meetings = converter.meeting_keys().values()
+                seeded = sum(1 for key in meetings if key in initial_assignment)
+                result["message"] += f" (warm start from {warm_start_from}: {seeded} of {len(meetings)} classes seeded)"
+            if estimate is not None and result["status"] != "error":
+                result["estimate"] = estimate
+            return result
         
         except Exception as e:
             error_message = str(e)
@@ -527,51 +1203,71 @@ class SolverService:
                 "problem_id": None
             }
     
-    def get_problem_status(self, problem_id: str) -> Dict:
+    def get_problem_status(self, problem_id: str, since_offset: Optional[int] = None,
+                           tail: Optional[int] = None) -> Dict:
         """
         Get the status of a specific problem.
         
+        Without since_offset or tail the whole debug.log is returned. Polling clients
+        should pass the log_offset of the previous response as since_offset, so that
+        each poll only reads the lines written since then.
+        
         Args:
             problem_id: ID of the problem to check
+            since_offset: Only return debug.log lines from this byte offset on
+            tail: Only return the last `tail` lines of debug.log (ignored with since_offset)
             
         Returns:
-            Dict containing the status information
+            Dict containing the status information, with log_offset set to the
+            offset to pass as since_offset on the next poll
         """
         debug_log_content = None
+        log_offset = None
         has_error = False
         error_message = ""
         
-        # Try to read the debug.log file if it exists
+        # Jobs started by this process are answered from the in-memory registry
         problem_dir = os.path.join(self.cpsolver_path, "solved_output", problem_id)
-        debug_log_path = os.path.join(problem_dir, "debug.log")
-        if os.path.exists(debug_log_path):
+        record = self._lookup_record(problem_id, problem_dir)
+        if record is not None and record.leader_id and record.is_active:
+            return self._follower_status(record, since_offset, tail)
+        
+        # Try to read the debug.log file if it exists
+        debug_log_path = self._debug_log_path(problem_dir, record)
+        if debug_log_path and os.path.exists(debug_log_path):
             try:
-                with open(debug_log_path, 'r', encoding='utf-8', newline='') as f:
-                    # Split the log into lines and preserve each line
-                    debug_log_content = f.read().splitlines()
+                log_index = get_log_index(debug_log_path)
+                # A running solver may be half-way through a line; only return complete ones
+                include_partial = record is None or not record.is_active
+                
+                # Check for error messages in the part of the log not scanned yet
+                error_line = log_index.scan(include_partial)
+                if error_line is not None:
+                    has_error = True
+                    error_message = error_line
+                
+                if since_offset is not None:
+                    debug_log_content, log_offset = log_index.read_since(since_offset, include_partial)
+                elif tail is not None:
+                    debug_log_content, log_offset = log_index.read_tail(tail, include_partial)
+                else:
+                    debug_log_content, log_offset = log_index.read_since(0, include_partial)
                     
-                # Check for error messages in the debug log
-                for line in debug_log_content:
-                    if "ERROR" in line or "Exception" in line or "error" in line.lower():
-                        has_error = True
-                        error_message = line
-                        break
-                        
-                self.logger.info(f"Read debug.log for problem {problem_id}")
+                self.logger.debug(f"Read debug.log for problem {problem_id} up to offset {log_offset}")
             except Exception as e:
                 self.logger.warning(f"Error reading debug.log for problem {problem_id}: {str(e)}")
                 debug_log_content = [f"Error reading debug.log: {str(e)}"]
         
-        # Check if the problem exists in our tracking dictionary
-        if problem_id not in self._problem_processes:
-            # Check if the problem folder exists in the solved_output directory
+        if record is None:
+            # Unknown to the registry (e.g. solved before a restart): check the solved_output directory
             if not os.path.exists(problem_dir):
                 return {
                     "status": "error",
                     "message": f"Problem with ID {problem_id} not found",
                     "problem_id": problem_id,
                     "solution_available": False,
-                    "debug_log": debug_log_content
+                    "debug_log": debug_log_content,
+                    "log_offset": log_offset
                 }
             
             # Check if a solution.xml file exists
@@ -584,7 +1280,8 @@ class SolverService:
                     "message": "Problem has been solved",
                     "problem_id": problem_id,
                     "solution_available": True,
-                    "debug_log": debug_log_content
+                    "debug_log": debug_log_content,
+                    "log_offset": log_offset
                 }
             elif has_error:
                 return {
@@ -592,7 +1289,8 @@ class SolverService:
                     "message": f"Solver encountered an error: {error_message}",
                     "problem_id": problem_id,
                     "solution_available": False,
-                    "debug_log": debug_log_content
+                    "debug_log": debug_log_content,
+                    "log_offset": log_offset
                 }
             else:
                 return {
@@ -600,51 +1298,101 @@ class SolverService:
                     "message": "Problem found but not yet processed",
                     "problem_id": problem_id,
                     "solution_available": False,
-                    "debug_log": debug_log_content
+                    "debug_log": debug_log_content,
+                    "log_offset": log_offset
                 }
         
-        # Get the process info
-        process_info = self._problem_processes[problem_id]
-        
-        # Check if the solution file exists
-        solution_file = os.path.join(self.cpsolver_path, "solved_output", problem_id, "solution.xml")
-        solution_available = os.path.exists(solution_file)
+        if record.state == "queued":
+            return {
+                "status": "queued",
+                "message": record.message,
+                "problem_id": problem_id,
+                "solution_available": False,
+                "debug_log": None
+            }
         
-        if process_info["is_solving"]:
-            elapsed_time = datetime.now() - process_info["start_time"]
+        if record.is_active:
+            running_message = "Solver is running" if not record.components else record.message
             return {
                 "status": "running",
-                "message": f"Solver is running (elapsed time: {elapsed_time.total_seconds():.2f} seconds)",
+                "message": f"{running_message} (elapsed time: {record.elapsed_seconds or 0:.2f} seconds)",
                 "problem_id": problem_id,
-                "solution_available": solution_available,
-                "debug_log": debug_log_content
+                "solution_available": record.solution_available,
+                "debug_log": debug_log_content,
+                "log_offset": log_offset,
+                "output_offset": record.output_offset,
+                "snapshots": serves_snapshots(self.engine, record)
             }
-        else:
-            if "exit_code" in process_info and process_info["exit_code"] == 0 and not has_error:
-                return {
-                    "status": "completed",
-                    "message": "Solver completed successfully",
-                    "problem_id": problem_id,
-                    "solution_available": solution_available,
-                    "debug_log": debug_log_content
-                }
-            elif has_error or ("error" in process_info) or ("exit_code" in process_info and process_info["exit_code"] != 0):
-                error_msg = process_info.get("error", error_message if has_error else f"Exit code: {process_info.get('exit_code', 'unknown')}")
-                return {
-                    "status": "error",
-                    "message": f"Solver encountered an error: {error_msg}",
-                    "problem_id": problem_id,
-                    "solution_available": solution_available,
-                    "debug_log": debug_log_content
-                }
-            else:
-                return {
-                    "status": "completed",
-                    "message": f"Solver completed with exit code: {process_info.get('exit_code', 'unknown')}",
-                    "problem_id": problem_id,
-                    "solution_available": solution_available,
-                    "debug_log": debug_log_content
-                }
+        
+        return {
+            "status": record.state,
+            "message": record.message,
+            "problem_id": problem_id,
+            "solution_available": record.solution_available,
+            "debug_log": debug_log_content,
+            "log_offset": log_offset,
+            "output_offset": record.output_offset
+        }
+    
+    def _lookup_record(self, problem_id: str, problem_dir: str) -> Optional[JobRecord]:
+        """The job record of a problem, rebuilt from its folder if it was evicted from the registry."""
+        record = self.registry.get(problem_id)
+        if record is None:
+            record = load_record(problem_dir)
+        return record
+    
+    def _follower_status(self, record: JobRecord, since_offset: Optional[int], tail: Optional[int]) -> Dict:
+        """Status of a problem sharing another problem's solve: the leader's status and log."""
+        result = self.get_problem_status(record.leader_id, since_offset, tail)
+        result["problem_id"] = record.problem_id
+        result["message"] = f"{result['message']} (shared with identical problem {record.leader_id})"
+        if result["status"] not in ("queued", "running"):
+            # The leader has finished, but its outcome has not been handed over yet
+            result["status"] = "running"
+            result["solution_available"] = False
+        return result
+
+    def _debug_log_path(self, problem_dir: str, record: Optional[JobRecord]) -> str:
+        if record is not None and record.problem_dir:
+            if record.portfolio_size > 1 and record.is_active:
+                # The runs of a portfolio log into their own folders; show the first run until one wins
+                return os.path.join(find_log_dir(portfolio_run_dir(record.problem_dir, 0)), "debug.log")
+            # While the solver runs, its log is still in the run folder inside the problem folder
+            return os.path.join(find_log_dir(record.problem_dir), "debug.log")
+        return os.path.join(problem_dir, "debug.log")
+    
+    def get_problem_status_etag(self, problem_id: str) -> Optional[str]:
+        """
+        Get a validator for the status of a problem without reading its log.
+        
+        The tag changes whenever the job record changes (its registry version) or
+        the solver writes to debug.log or its console output, which covers everything
+        get_problem_status returns for the same since_offset and tail. It is weak
+        because the elapsed time in the message of a running job is not part of it.
+        
+        Args:
+            problem_id: ID of the problem
+            
+        Returns:
+            The entity tag, or None if the problem is not found
+        """
+        problem_dir = os.path.join(self.cpsolver_path, "solved_output", problem_id)
+        record = self._lookup_record(problem_id, problem_dir)
+        if record is not None and record.leader_id and record.is_active:
+            leader_etag = self.get_problem_status_etag(record.leader_id) or ""
+            return make_etag(record.version, leader_etag.strip('W/"'), weak=True)
+        if record is None and not os.path.exists(problem_dir):
+            return None
+        
+        try:
+            log_size = os.path.getsize(self._debug_log_path(problem_dir, record))
+        except OSError:
+            log_size = None
+        
+        if record is None:
+            solution_available = os.path.exists(os.path.join(problem_dir, "solution.xml"))
+            return make_etag("disk", int(solution_available), log_size, weak=True)
+        return make_etag(record.version, log_size, record.output_offset, weak=True)
     
     def stop_problem_solver(self, problem_id: str) -> Dict:
         """
@@ -656,53 +1404,55 @@ class SolverService:
         Returns:
             Dict containing the result of the stop operation
         """
-        if problem_id not in self._problem_processes:
+        if problem_id not in self.registry:
             return {
                 "status": "not_running",
                 "message": f"No solver process found for problem ID {problem_id}",
                 "problem_id": problem_id
             }
         
-        process_info = self._problem_processes[problem_id]
-        
-        if not process_info["is_solving"]:
-            return {
-                "status": "not_running",
-                "message": f"Solver for problem ID {problem_id} is not currently running",
-                "problem_id": problem_id
-            }
-        
-        try:
-            process_info["process"].terminate()
-            process_info["process"].wait(timeout=5)
-            process_info["is_solving"] = False
+        record = self.registry.get(problem_id)
+        if record.components and record.is_active:
+            # A decomposed problem has no solver of its own: stop the solves of its parts
+            message = f"Solver processes for problem ID {problem_id} have been stopped"
+            self.registry.update(problem_id, state="stopped", message=message)
+            # Each part finishes the problem through _settle_job once its solver has saved its best solution
+            for part_id in record.components:
+                self.stop_problem_solver(part_id)
             return {
                 "status": "stopped",
-                "message": f"Solver process for problem ID {problem_id} has been stopped",
-                "problem_id": problem_id
-            }
-        except subprocess.TimeoutExpired:
-            process_info["process"].kill()
-            process_info["is_solving"] = False
-            return {
-                "status": "killed",
-                "message": f"Solver process for problem ID {problem_id} had to be forcefully terminated",
-                "problem_id": problem_id
-            }
-        except Exception as e:
-            return {
-                "status": "error",
-                "message": f"Error stopping solver for problem ID {problem_id}: {str(e)}",
+                "message": message,
                 "problem_id": problem_id
             }
+        
+        result = self._stop_job(
+            problem_id,
+            not_running_message=f"Solver for problem ID {problem_id} is not currently running",
+            stopped_message=f"Solver process for problem ID {problem_id} has been stopped",
+            killed_message=f"Solver process for problem ID {problem_id} had to be forcefully terminated",
+            error_prefix=f"Error stopping solver for problem ID {problem_id}"
+        )
+        result["problem_id"] = problem_id
+        return result
 
-    def solve_problem_from_xml(self, xml_content: str, problem_name: Optional[str] = None) -> Dict:
+    def solve_problem_from_xml(self, xml_content: str, problem_name: Optional[str] = None,
+                               use_cache: bool = True, warm_start_from: Optional[str] = None,
+                               portfolio: int = 1, time_limit: Optional[int] = None,
+                               stop_when_complete: Optional[bool] = None,
+                               decompose: Optional[bool] = None) -> Dict:
         """
         Process a user submitted problem in XML format directly.
         
         Args:
             xml_content: String containing the XML representation of the problem
             problem_name: Optional name for the problem
+            use_cache: Reuse the solution of an identical earlier submission if there is one
+            warm_start_from: ID of a solved problem whose assignment the solve starts from
+                (minimal perturbation mode); classes are matched by ID
+            portfolio: Number of solver runs with different seeds; the best solution is kept
+            time_limit: Seconds the solver may run, instead of Termination.TimeOut from config.cfg
+            stop_when_complete: Stop as soon as all classes are assigned (Termination.StopWhenComplete)
+            decompose: Solve independent parts of the problem concurrently (default: SOLVER_DECOMPOSE)
             
         Returns:
             Dict containing the status and problem ID
@@ -733,23 +1483,27 @@ class SolverService:
                 os.makedirs(input_dir, exist_ok=True)
                 self.logger.info(f"Created input directory: {input_dir}")
             
-            # Get the list of folders in solved_output before running the solver
-            existing_folders = set()
-            try:
-                existing_folders = set(os.listdir(solved_output_dir))
-                self.logger.info(f"Found {len(existing_folders)} existing folders in solved_output")
-            except Exception as e:
-                self.logger.warning(f"Error listing solved_output directory: {e}")
+            previous = None
+            if warm_start_from:
+                previous = self._previous_assignment(warm_start_from)
+                if previous is None:
+                    return {
+                        "status": "error",
+                        "message": f"Solution of problem {warm_start_from} not found",
+                        "problem_id": None
+                    }
             
-            # Use a temporary ID for the XML file
-            temp_id = f"temp_{datetime.now().strftime('%Y%m%d%H%M%S')}_{str(uuid.uuid4())[:8]}"
+            # The problem ID names both the input file and the output folder
+            problem_id = self._new_problem_id(problem_name)
             
-            # Save the XML to the input folder with the temporary name
-            xml_file_path = os.path.join(input_dir, f"{temp_id}.xml")
+            # Save the XML to the input folder
+            xml_file_path = os.path.join(input_dir, f"{problem_id}.xml")
             try:
                 with open(xml_file_path, 'w', encoding='utf-8') as f:
                     f.write(xml_content)
                 self.logger.info(f"XML saved at {xml_file_path}")
+                if previous is not None:
+                    seeded, total = mark_initial_xml(xml_file_path, previous[0])
             except Exception as e:
                 error_message = f"Error saving XML file: {str(e)}"
                 self.logger.error(error_message)
@@ -758,175 +1512,34 @@ class SolverService:
                     "message": error_message
                 }
             
-            # Store the original directory to go back to
-            original_dir = os.getcwd()
+            overrides = termination_properties(time_limit, stop_when_complete)
+            if previous is not None:
+                overrides.update(WARM_START_PROPERTIES)
+            
+            # Reject a problem that cannot be solved before it takes a solver slot, and estimate its solve
+            infeasible, estimate = self._analyse_problem(xml_file_path, overrides=overrides)
+            if infeasible is not None:
+                return infeasible
             
+            # Save the original problem for reference
+            problem_dir = self._create_problem_dir(problem_id)
+            original_path = os.path.join(problem_dir, "original.xml")
             try:
-                # Change to cpsolver directory for the command to work properly
-                os.chdir(cpsolver_abs_path)
-                self.logger.info(f"Changed directory to: {os.getcwd()}")
-                
-                # Check for JAR files
-                jar_path = os.path.join(cpsolver_abs_path, "cpsolver-1.4.74.jar")
-                if not os.path.exists(jar_path):
-                    import glob
-                    jar_files = glob.glob(os.path.join(cpsolver_abs_path, "cpsolver*.jar"))
-                    jar_files = [f for f in jar_files if not ('javadoc' in f or 'sources' in f)]
-                    if jar_files:
-                        jar_path = jar_files[0]
-                        self.logger.info(f"Found alternative JAR file: {jar_path}")
-                    else:
-                        error_message = f"No suitable cpsolver JAR file found in {cpsolver_abs_path}"
-                        self.logger.error(error_message)
-                        return {
-                            "status": "error",
-                            "message": error_message
-                        }
-                
-                # Adjust the classpath separator based on the operating system
-                separator = ";" if sys.platform.startswith("win") else ":"
-                
-                # Build classpath using just the main JAR - try to find dependent JARs in lib
-                lib_dir = os.path.join(cpsolver_abs_path, "lib")
-                if os.path.exists(lib_dir) and os.path.isdir(lib_dir):
-                    self.logger.info(f"Found lib directory: {lib_dir}")
-                    lib_files = [os.path.join(lib_dir, f) for f in os.listdir(lib_dir) if f.endswith('.jar')]
-                    self.logger.info(f"Found lib files: {lib_files}")
-                    classpath = separator.join([jar_path] + lib_files)
-                else:
-                    self.logger.info("No lib directory found, using only main JAR")
-                    classpath = jar_path
-                
-                self.logger.info(f"Using classpath: {classpath}")
-                
-                # Construct the command - use relative paths since we're in the cpsolver directory
-                command = [
-                    "java", "-Xmx512m", 
-                    "-cp", classpath,
-                    "org.cpsolver.coursett.Test", 
-                    "config.cfg", 
-                    os.path.join("input", f"{temp_id}.xml"), 
-                    "solved_output/"
-                ]
-                
-                # Log the command for debugging
-                self.logger.info(f"Running command: {' '.join(command)}")
-                
-                # Run the command and capture output
-                process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                # Wait a short time for the solver to create its output directory
-                import time
-                time.sleep(2)
-                
-                # Check for new folders in solved_output
-                new_folders = set()
-                try:
-                    new_folders = set(os.listdir(solved_output_dir)) - existing_folders
-                    self.logger.info(f"Found {len(new_folders)} new folders in solved_output: {new_folders}")
-                except Exception as e:
-                    self.logger.warning(f"Error listing solved_output directory after solver start: {e}")
-                
-                if not new_folders:
-                    self.logger.warning("No new folder detected in solved_output directory")
-                    # If no folder was created, we'll use a fallback ID
-                    problem_id = f"{problem_name or 'problem'}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    # Create a directory for this problem's output
-                    problem_dir = os.path.join(solved_output_dir, problem_id)
-                    try:
-                        os.makedirs(problem_dir, exist_ok=True)
-                        self.logger.info(f"Created fallback problem directory: {problem_dir}")
-                    except Exception as e:
-                        self.logger.error(f"Error creating fallback directory: {e}")
-                        # Change directory back before raising
-                        os.chdir(original_dir)
-                        return {
-                            "status": "error",
-                            "message": f"Error creating problem directory: {str(e)}"
-                        }
-                else:
-                    # Use the first new folder as the problem ID
-                    problem_id = list(new_folders)[0]
-                    problem_dir = os.path.join(solved_output_dir, problem_id)
-                
-                # Save the original XML for reference
-                xml_file_path_copy = os.path.join(problem_dir, "original.xml")
-                try:
-                    with open(xml_file_path_copy, 'w', encoding='utf-8') as f:
-                        f.write(xml_content)
-                    self.logger.info(f"Saved original XML to {xml_file_path_copy}")
-                except Exception as e:
-                    self.logger.warning(f"Could not save original XML: {e}")
-                
-                # Store the process info
-                self._problem_processes[problem_id] = {
-                    "process": process,
-                    "is_solving": True,
-                    "start_time": datetime.now()
-                }
-                
-                # Create a function to monitor the process
-                def monitor_problem_process(pid):
-                    try:
-                        process_info = self._problem_processes.get(pid)
-                        if not process_info:
-                            return
-                            
-                        proc = process_info["process"]
-                        stdout, stderr = proc.communicate()
-                        exit_code = proc.returncode
-                        
-                        # Update status
-                        self._problem_processes[pid]["is_solving"] = False
-                        self._problem_processes[pid]["exit_code"] = exit_code
-                        self._problem_processes[pid]["stdout"] = stdout
-                        self._problem_processes[pid]["stderr"] = stderr
-                        self._problem_processes[pid]["end_time"] = datetime.now()
-                        
-                        # Log the outcome
-                        self.logger.info(f"Problem {pid} solver process completed with exit code: {exit_code}")
-                        if stderr:
-                            self.logger.error(f"Problem {pid} solver error output: {stderr}")
-                        if stdout:
-                            self.logger.info(f"Problem {pid} solver output: {stdout[:500]}...") # Log first 500 chars
-                        
-                        # Clean up the temporary XML file
-                        try:
-                            os.remove(xml_file_path)
-                            self.logger.info(f"Removed temporary XML file: {xml_file_path}")
-                        except Exception as e:
-                            self.logger.warning(f"Could not remove temporary XML file: {e}")
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error in monitor thread for problem {pid}: {e}")
-                        if pid in self._problem_processes:
-                            self._problem_processes[pid]["is_solving"] = False
-                            self._problem_processes[pid]["error"] = str(e)
-                    finally:
-                        # Return to the original directory
-                        os.chdir(original_dir)
-                
-                # Start the monitoring in a separate thread
-                thread = threading.Thread(target=monitor_problem_process, args=(problem_id,))
-                thread.start()
-                
-                return {
-                    "status": "started",
-                    "message": "Solver process started successfully",
-                    "problem_id": problem_id
-                }
-            finally:
-                # Make sure we always go back to the original directory if we change it
-                try:
-                    os.chdir(original_dir)
-                    self.logger.info(f"Changed directory back to: {os.getcwd()}")
-                except Exception as e:
-                    self.logger.error(f"Error changing back to original directory: {e}")
+                with open(original_path, 'w', encoding='utf-8') as f:
+                    f.write(xml_content)
+                self.logger.info(f"Saved original problem to {original_path}")
+            except Exception as e:
+                self.logger.warning(f"Could not save original problem: {e}")
+            
+            # Queue the problem for the next free solver slot
+            result = self._enqueue_problem(problem_id, problem_name, problem_dir, xml_file_path, use_cache,
+                                           overrides, portfolio,
+                                           DECOMPOSE_PROBLEMS if decompose is None else decompose, estimate)
+            if previous is not None and result["status"] != "error":
+                result["message"] += f" (warm start from {warm_start_from}: {seeded} of {total} classes seeded)"
+            if estimate is not None and result["status"] != "error":
+                result["estimate"] = estimate
+            return result
         
         except Exception as e:
             error_message = str(e)
@@ -0,0 +1,194 @@
+"""
+Warm starts: seeding a new solve with the assignment of a previous solution.
+
+A solution.xml saved by cpsolver marks the assigned time and room of every
+class with solution="true". For a re-solve after a small edit, those
+assignments are carried over into the new problem XML as solution="true" and
+initial="true", and the solver runs in minimal perturbation mode (General.MPP),
+so it starts from the previous timetable and only repairs what the edit broke
+instead of searching from scratch.
+
+Classes are matched by ID. JSON problems are converted with sequential IDs, so
+for those the previous IDs are first translated to (class name, meeting index)
+and room names through the previous problem's original.json, which keeps the
+match stable when classes or rooms are added or removed.
+"""
+
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+from typing import Dict, Optional, Tuple
+
+# Solver properties of a warm-started solve
+WARM_START_PROPERTIES = {
+    "General.MPP": "true"
+}
+
+# (days, start, length) of a <time> element
+TimeKey = Tuple[str, str, str]
+
+logger = logging.getLogger("warm_start")
+
+
+def normalize_days(days: str) -> str:
+    """Day codes as ASCII digits (cpsolver may save them with locale digits, e.g. "۰۰۱۰۰۰۰")."""
+    try:
+        return "".join(str(int(c)) for c in days)
+    except ValueError:
+        return days
+
+
+def time_key(attributes) -> TimeKey:
+    """Key of a <time> element, for matching it against the previous assignment."""
+    return (normalize_days(attributes.get("days", "")), attributes.get("start", ""), attributes.get("length", ""))
+
+
+def read_assignment(solution_path: str) -> Dict[str, Dict]:
+    """
+    Read the assigned times and rooms of a solution.xml.
+
+    The file is parsed incrementally and each class is dropped once read.
+
+    Args:
+        solution_path: Path of the solution.xml saved by cpsolver
+
+    Returns:
+        Dictionary of class ID to {"time": TimeKey or None, "rooms": [room IDs]}, for
+        classes that have an assigned time or room
+    """
+    assignment = {}
+    for _, elem in ET.iterparse(solution_path, events=("end",)):
+        if elem.tag != "class":
+            continue
+        time = None
+        rooms = []
+        for child in elem:
+            if child.get("solution") != "true":
+                continue
+            if child.tag == "time":
+                time = time_key(child.attrib)
+            elif child.tag == "room":
+                rooms.append(child.get("id"))
+        if time is not None or rooms:
+            assignment[elem.get("id")] = {"time": time, "rooms": rooms}
+        elem.clear()
+    return assignment
+
+
+def assignment_by_name(assignment: Dict[str, Dict], meeting_keys: Dict[int, Tuple[str, int]],
+                       room_names: Dict[int, str]) -> Dict[Tuple[str, int], Dict]:
+    """
+    Translate an assignment keyed by class ID into one keyed by (class name, meeting index).
+
+    Args:
+        assignment: Result of read_assignment
+        meeting_keys: Class ID to (class name, meeting index), as assigned by the JSON converter
+        room_names: Room ID to room name, as assigned by the JSON converter
+
+    Returns:
+        Dictionary of (class name, meeting index) to {"time": TimeKey or None, "rooms": [room names]}
+    """
+    by_name = {}
+    for class_id, placement in assignment.items():
+        try:
+            key = meeting_keys.get(int(class_id))
+        except (TypeError, ValueError):
+            continue
+        if key is None:
+            continue
+        rooms = []
+        for room_id in placement["rooms"]:
+            try:
+                name = room_names.get(int(room_id))
+            except (TypeError, ValueError):
+                name = None
+            if name is not None:
+                rooms.append(name)
+        by_name[key] = {"time": placement["time"], "rooms": rooms}
+    return by_name
+
+
+def _start_tag(elem) -> str:
+    attrs = "".join(f" {name}={quoteattr(value)}" for name, value in elem.attrib.items())
+    return f"<{elem.tag}{attrs}>"
+
+
+def _mark_class(class_elem, placement: Dict) -> bool:
+    """Mark the previous placement among a class's <time> and <room> elements; True if any matched."""
+    marked = False
+    rooms = set(placement["rooms"])
+    for child in class_elem:
+        if (child.tag == "time" and placement["time"] is not None and time_key(child.attrib) == placement["time"]) \
+                or (child.tag == "room" and child.get("id") in rooms):
+            child.set("solution", "true")
+            child.set("initial", "true")
+            marked = True
+    return marked
+
+
+def mark_initial_xml(input_path: str, assignment: Dict[str, Dict]) -> Tuple[int, int]:
+    """
+    Mark the previous assignment in a problem XML file, in place.
+
+    The <time> and <room> elements of each class that match its previous
+    placement get solution="true" and initial="true". Placements that are no
+    longer in a class's domain are left out; the solver assigns those classes anew.
+
+    The file is parsed incrementally and rewritten one element of each section
+    (class, room, ...) at a time, so only one of them is in memory at once.
+
+    Args:
+        input_path: Problem XML to update
+        assignment: Result of read_assignment (keyed by class ID)
+
+    Returns:
+        Tuple of (classes seeded, classes in the problem)
+    """
+    seeded = total = 0
+    depth = 0
+    section = None
+    written = False
+    temp_path = f"{input_path}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as out:
+            out.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            for event, elem in ET.iterparse(input_path, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth <= 2:
+                        out.write(f"{'  ' * (depth - 1)}{_start_tag(elem)}\n")
+                        section, written = elem, False
+                    continue
+                depth -= 1
+                if depth == 2:
+                    # A complete element of a section
+                    if section.tag == "classes" and elem.tag == "class":
+                        total += 1
+                        placement = assignment.get(elem.get("id"))
+                        if placement is not None:
+                            seeded += _mark_class(elem, placement)
+                    elem.tail = None
+                    out.write(f"    {ET.tostring(elem, encoding='unicode')}\n")
+                    section.remove(elem)
+                    written = True
+                elif depth < 2:
+                    if not written and elem.text and elem.text.strip():
+                        out.write(f"{'  ' * (depth + 1)}{escape(elem.text.strip())}\n")
+                    out.write(f"{'  ' * depth}</{elem.tag}>\n")
+                    written = True
+        os.replace(temp_path, input_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return seeded, total
+
+
+def load_original_json(path: str) -> Optional[Dict]:
+    """Load the original.json saved with a JSON problem, or None if there is none."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
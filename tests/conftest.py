@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+DATA_DIR = os.path.join(TESTS_DIR, "data")
+STUB_SOLVER_DIR = os.path.join(TESTS_DIR, "stub_solver")
+
+sys.path.insert(0, REPO_DIR)
+
+
+def load_problem():
+    """The small JSON problem in tests/data."""
+    with open(os.path.join(DATA_DIR, "problem.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def cpsolver_dir(tmp_path):
+    """A cpsolver directory of its own: the shipped config.cfg and a link to the JAR."""
+    path = tmp_path / "cpsolver"
+    path.mkdir()
+    source = os.path.join(REPO_DIR, "cpsolver")
+    shutil.copy(os.path.join(source, "config.cfg"), path / "config.cfg")
+    os.symlink(os.path.join(source, "cpsolver-1.4.74.jar"), path / "cpsolver-1.4.74.jar")
+    return path
+
+
+@pytest.fixture
+def client(cpsolver_dir, monkeypatch):
+    """A TestClient whose solves run tests/stub_solver/java instead of a JVM."""
+    if sys.platform.startswith("win"):
+        pytest.skip("the stub solver is a POSIX script")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    monkeypatch.setenv("SOLVER_PATH", str(cpsolver_dir))
+    monkeypatch.setenv("PATH", STUB_SOLVER_DIR + os.pathsep + os.environ.get("PATH", ""))
+    monkeypatch.setenv("STUB_SOLVER_SECONDS", "0.3")
+    return TestClient(app)
+
+
+def wait_for(client, problem_id, timeout=30.0):
+    """Poll a problem until it is neither queued nor running, and return its status."""
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/problems/{problem_id}").json()
+        if status["status"] not in ("queued", "running") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.1)
@@ -0,0 +1,82 @@
+from conftest import load_problem, wait_for
+
+
+def test_solve_json_problem(client):
+    response = client.post("/problems", json=load_problem())
+    assert response.status_code == 200
+    problem_id = response.json()["problem_id"]
+    assert response.json()["estimate"]["metrics"]["classes"] == 7
+
+    status = wait_for(client, problem_id)
+    assert status["status"] == "completed"
+    assert status["solution_available"]
+    assert status["debug_log"]
+
+    solution = client.get(f"/problems/{problem_id}/solution")
+    assert solution.status_code == 200
+    assert solution.json()["solution"]["info"]
+    xml = client.get(f"/problems/{problem_id}/solution/xml")
+    assert xml.status_code == 200
+    assert xml.text.startswith("<?xml")
+
+
+def test_identical_submissions_share_one_solve(client):
+    first = client.post("/problems", json=load_problem()).json()["problem_id"]
+    second = client.post("/problems", json=load_problem()).json()
+    assert "identical problem" in second["message"]
+
+    assert wait_for(client, first)["status"] == "completed"
+    assert wait_for(client, second["problem_id"])["status"] == "completed"
+    assert client.get(f"/problems/{second['problem_id']}/solution/xml").status_code == 200
+
+
+def test_solved_problem_is_answered_from_the_cache(client):
+    first = client.post("/problems", json=load_problem()).json()["problem_id"]
+    assert wait_for(client, first)["status"] == "completed"
+
+    cached = client.post("/problems", json=load_problem()).json()
+    assert cached["status"] == "completed"
+    assert cached["problem_id"] != first
+    assert client.get(f"/problems/{cached['problem_id']}/solution/xml").status_code == 200
+
+    forced = client.post("/problems?cache=false", json=load_problem()).json()
+    assert forced["status"] == "queued"
+    wait_for(client, forced["problem_id"])
+
+
+def test_infeasible_problem_is_rejected(client):
+    problem = load_problem()
+    problem["classes"]["C0"]["capacity"] = 999
+    response = client.post("/problems", json=problem)
+    assert response.status_code == 422
+    report = response.json()["detail"]
+    assert not report["feasible"]
+    assert report["issues"][0]["type"] == "no_rooms"
+    assert "C0" in report["issues"][0]["message"]
+
+
+def test_validate_does_not_queue(client):
+    response = client.post("/problems/validate", json=load_problem())
+    assert response.status_code == 200
+    assert response.json()["feasible"]
+    assert response.json()["classes"] == 7
+
+
+def test_solution_range_requests(client):
+    problem_id = client.post("/problems?cache=false", json=load_problem()).json()["problem_id"]
+    wait_for(client, problem_id)
+    whole = client.get(f"/problems/{problem_id}/solution/xml").content
+
+    partial = client.get(f"/problems/{problem_id}/solution/xml", headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 0-99/{len(whole)}"
+    assert partial.content == whole[:100]
+
+    beyond = client.get(f"/problems/{problem_id}/solution/xml", headers={"Range": f"bytes={len(whole)}-"})
+    assert beyond.status_code == 416
+    assert beyond.headers["content-range"] == f"bytes */{len(whole)}"
+
+
+def test_unknown_problem(client):
+    assert client.get("/problems/no_such_problem").status_code == 404
+    assert client.get("/problems/no_such_problem/solution").status_code == 404
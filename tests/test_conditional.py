@@ -0,0 +1,47 @@
+from app.conditional import etag_matches, make_etag
+
+from conftest import load_problem, wait_for
+
+
+def test_make_etag():
+    assert make_etag(255, None, "json") == '"ff--json"'
+    assert make_etag(1, weak=True) == 'W/"1"'
+
+
+def test_etag_matching_is_weak():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_status_and_solution_answer_304_while_unchanged(client):
+    problem_id = client.post("/problems?cache=false", json=load_problem()).json()["problem_id"]
+    wait_for(client, problem_id)
+
+    for path in (f"/problems/{problem_id}", f"/problems/{problem_id}/solution",
+                 f"/problems/{problem_id}/solution/xml"):
+        response = client.get(path)
+        etag = response.headers["etag"]
+        not_modified = client.get(path, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304, path
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_solution_answers_304_on_if_modified_since(client):
+    problem_id = client.post("/problems?cache=false", json=load_problem()).json()["problem_id"]
+    wait_for(client, problem_id)
+    last_modified = client.get(f"/problems/{problem_id}/solution/xml").headers["last-modified"]
+    response = client.get(f"/problems/{problem_id}/solution/xml", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+
+def test_status_etag_changes_with_the_job(client):
+    problem_id = client.post("/problems?cache=false", json=load_problem()).json()["problem_id"]
+    queued = client.get(f"/problems/{problem_id}").headers["etag"]
+    wait_for(client, problem_id)
+    finished = client.get(f"/problems/{problem_id}", headers={"If-None-Match": queued})
+    assert finished.status_code == 200
+    assert finished.headers["etag"] != queued
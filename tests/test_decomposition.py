@@ -0,0 +1,125 @@
+import re
+import time
+import xml.etree.ElementTree as ET
+
+from app import job_scheduler, solver_service
+from app.decomposition import find_components, merge_solutions, pack_components, write_parts
+from app.job_registry import get_job_registry
+from app.job_scheduler import SolverScheduler
+from app.portfolio import read_solution_info
+
+from conftest import wait_for
+
+TIME = '<time days="1000000" start="96" length="18" pref="0"/>'
+
+# Classes 1 and 2 share room 1, classes 3 and 4 instructor 7; room 9 has no room constraint
+PROBLEM = f"""<?xml version="1.0" encoding="UTF-8"?>
+<timetable nrDays="7" slotsPerDay="288">
+  <rooms>
+    <room id="1" capacity="50"/>
+    <room id="2" capacity="50"/>
+    <room id="9" capacity="50" constraint="false"/>
+  </rooms>
+  <classes>
+    <class id="1" offering="1" classLimit="10"><room id="1" pref="0"/><room id="9" pref="0"/>{TIME}</class>
+    <class id="2" offering="2" classLimit="10"><room id="1" pref="0"/>{TIME}</class>
+    <class id="3" offering="3" classLimit="10"><instructor id="7"/><room id="2" pref="0"/>{TIME}</class>
+    <class id="4" offering="4" classLimit="10"><instructor id="7"/><room id="9" pref="0"/>{TIME}</class>
+  </classes>
+  <groupConstraints>
+    <constraint id="1" type="SAME_DAYS" pref="R"><class id="3"/><class id="4"/></constraint>
+  </groupConstraints>
+</timetable>
+"""
+
+
+def _solve(part_path, solution_path, value):
+    """Write what the solver would save for a part: all times assigned, plus the solution info."""
+    classes = len(ET.parse(part_path).getroot().find("classes"))
+    with open(part_path, encoding="utf-8") as f:
+        body = re.sub(r"<\?xml[^>]*\?>\s*", "", f.read())
+    body = re.sub(r"(<time [^>]*?)\s*/>", r'\1 solution="true" />', body)
+    with open(solution_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<!--Solution Info:\n'
+                f"    Assigned variables: 100.00% ({classes}/{classes})\n"
+                f"    Overall solution value: {value:.2f}\n"
+                "    Time: 0.10 min\n-->\n" + body)
+
+
+def test_classes_sharing_nothing_are_separate_components():
+    root = ET.fromstring(PROBLEM)
+    assert find_components(root) == [["1", "2"], ["3", "4"]]
+    assert pack_components(find_components(root), max_parts=1) == [["1", "2", "3", "4"]]
+
+
+def test_parts_get_their_own_classes_rooms_and_constraints(tmp_path):
+    root = ET.fromstring(PROBLEM)
+    paths = [str(tmp_path / "part1.xml"), str(tmp_path / "part2.xml")]
+    part_roots = write_parts(root, find_components(root), paths)
+
+    first, second = (ET.parse(path).getroot() for path in paths)
+    assert [c.get("id") for c in first.iterfind("classes/class")] == ["1", "2"]
+    assert [r.get("id") for r in first.iterfind("rooms/room")] == ["1", "9"]
+    assert len(first.find("groupConstraints")) == 0
+    assert [r.get("id") for r in second.iterfind("rooms/room")] == ["2", "9"]
+    assert len(second.find("groupConstraints")) == 1
+    assert [len(part.find("classes")) for part in part_roots] == [2, 2]
+
+
+def test_merged_solution_has_every_class_once(tmp_path):
+    root = ET.fromstring(PROBLEM)
+    parts = [str(tmp_path / "part1.xml"), str(tmp_path / "part2.xml")]
+    write_parts(root, find_components(root), parts)
+    solutions = [str(tmp_path / "solution1.xml"), str(tmp_path / "solution2.xml")]
+    for part, solution, value in zip(parts, solutions, (1.0, 2.5)):
+        _solve(part, solution, value)
+
+    merged_path = str(tmp_path / "solution.xml")
+    merge_solutions(solutions, merged_path)
+
+    merged = ET.parse(merged_path).getroot()
+    assert [c.get("id") for c in merged.iterfind("classes/class")] == ["1", "2", "3", "4"]
+    # The room without a room constraint was in both parts but is written once
+    assert sorted(r.get("id") for r in merged.iterfind("rooms/room")) == ["1", "2", "9"]
+    assert len(merged.find("groupConstraints")) == 1
+    assert all(t.get("solution") == "true" for t in merged.iterfind("classes/class/time"))
+    info = read_solution_info(merged_path)
+    assert info["Assigned variables"] == "100.00% (4/4)"
+    assert info["Overall solution value"] == "3.50"
+    assert info["Components"] == "2"
+
+
+def test_stopped_problem_keeps_the_parts_best_solutions(client, monkeypatch):
+    monkeypatch.setattr(solver_service, "DECOMPOSE_MAX_PARTS", 2)
+    monkeypatch.setattr(job_scheduler, "_scheduler", SolverScheduler(max_concurrent=2))
+    monkeypatch.setenv("STUB_SOLVER_SECONDS", "30")
+    # Give the DELETE a head start over the monitors collecting the parts' solutions
+    collect_output = solver_service.collect_output
+    monkeypatch.setattr(solver_service, "collect_output", lambda path: (time.sleep(0.5), collect_output(path)))
+    response = client.post("/problems/xml?decompose=true&cache=false", content=PROBLEM)
+    assert response.status_code == 200
+    problem_id = response.json()["problem_id"]
+
+    registry = get_job_registry()
+    parts = registry.get(problem_id).components
+    assert len(parts) == 2
+    deadline = time.monotonic() + 10
+    # Wait until both solvers have loaded the problem, so they have a solution to save
+    while not all(registry.get(part).state == "running" and registry.get(part).debug_log_path
+                  and registry.get(part).output_offset for part in parts):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+
+    assert client.delete(f"/problems/{problem_id}").status_code == 200
+    # The problem is marked stopped at once; it is finished when the last part has saved its solution
+    deadline = time.monotonic() + 10
+    while registry.get(problem_id).finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.1)
+    status = wait_for(client, problem_id)
+    assert status["status"] == "stopped"
+    assert status["solution_available"]
+    assert all(registry.get(part).solution_available for part in parts)
+
+    solution = client.get(f"/problems/{problem_id}/solution")
+    assert solution.status_code == 200
+    assert sorted(c["id"] for c in solution.json()["solution"]["classes"]) == ["1", "2", "3", "4"]
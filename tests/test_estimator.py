@@ -0,0 +1,87 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app import estimator
+from app.estimator import SolveHistory, heap_mb, heap_setting, problem_metrics
+
+from conftest import DATA_DIR
+
+
+def _metrics(model_size, classes=10):
+    return {"classes": classes, "model_size": model_size}
+
+
+def _record(history, model_size, runtime, iterations, speed, memory_mb=None, hit_limit=False):
+    stats = {"iterations": iterations, "speed": speed, "time_min": 5.0 if hit_limit else 0.0}
+    history.record(_metrics(model_size), runtime, stats, memory_mb, 300, True)
+
+
+def test_problem_metrics():
+    metrics = problem_metrics(ET.parse(os.path.join(DATA_DIR, "problem.xml")).getroot())
+    assert metrics["classes"] == 7
+    assert metrics["rooms"] > 0
+    assert metrics["model_size"] >= metrics["classes"]
+
+
+def test_class_without_rooms_counts_its_times():
+    root = ET.fromstring('<timetable><classes><class id="1">'
+                         '<time days="1000000" start="96" length="18" pref="0"/>'
+                         '<time days="0100000" start="96" length="18" pref="P"/></class></classes></timetable>')
+    assert problem_metrics(root)["avg_domain_size"] == 1.0
+
+
+@pytest.mark.parametrize("value, expected", [("512m", 512), ("4g", 4096), ("1024k", 1), ("1048576", 1)])
+def test_heap_mb(value, expected):
+    assert heap_mb(value) == expected
+
+
+def test_heap_setting_is_kept_within_its_bounds(monkeypatch):
+    monkeypatch.setattr(estimator, "SOLVER_MIN_HEAP", "256m")
+    monkeypatch.setattr(estimator, "SOLVER_HEAP_LIMIT", "1g")
+    monkeypatch.setattr(estimator, "SOLVER_HEAP_HEADROOM", 2.0)
+    assert heap_setting(10) == "256m"
+    # 2 x 200 MB, rounded up to a multiple of 64 MB
+    assert heap_setting(200) == "448m"
+    assert heap_setting(5000) == "1024m"
+
+
+def test_prediction_without_history_is_the_time_limit(tmp_path):
+    prediction = SolveHistory(str(tmp_path / "history.jsonl")).predict(_metrics(1000), 300, True)
+    assert prediction["predicted_seconds"] == 305.0
+    assert prediction["heap"] is None
+    assert "no similar past solves" in prediction["basis"]
+
+
+def test_prediction_from_similar_solves(tmp_path):
+    history = SolveHistory(str(tmp_path / "history.jsonl"))
+    # 1000 iterations at 100 it/s plus 2 s of loading and saving
+    _record(history, 1000, 12, 1000, 100, memory_mb=164)
+    _record(history, 1000, 12, 1000, 100, memory_mb=164)
+
+    prediction = history.predict(_metrics(1000), 300, True)
+    assert prediction["predicted_seconds"] == 12.0
+    assert prediction["predicted_memory_mb"] == 164.0
+    assert prediction["heap"] is not None
+    assert prediction["basis"] == "2 similar past solve(s)"
+    # Without stop_when_complete the solver runs until its time limit
+    assert history.predict(_metrics(1000), 300, False)["predicted_seconds"] == 302.0
+
+
+def test_solves_stopped_by_the_time_limit_do_not_predict_completion(tmp_path):
+    history = SolveHistory(str(tmp_path / "history.jsonl"))
+    _record(history, 1000, 302, 30000, 100, hit_limit=True)
+    assert history.predict(_metrics(1000), 300, True)["predicted_seconds"] == 302.0
+
+
+def test_history_is_reloaded_and_bounded(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    history = SolveHistory(path, max_entries=2)
+    for runtime in (10, 20, 30, 40, 50):
+        _record(history, 1000, runtime, 1000, 100)
+
+    reloaded = SolveHistory(path, max_entries=2)
+    assert [entry["runtime_seconds"] for entry in reloaded._entries] == [40, 50]
+    with open(path) as f:
+        assert len(f.readlines()) <= 4
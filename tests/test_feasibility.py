@@ -0,0 +1,117 @@
+import io
+import os
+
+from app.feasibility import check_feasibility
+
+from conftest import DATA_DIR
+
+MONDAY_8AM = '<time days="1000000" start="96" length="18" pref="0"/>'
+TUESDAY_8AM = '<time days="0100000" start="96" length="18" pref="0"/>'
+ROOM_1 = '<room id="1" pref="0"/>'
+ROOM_2 = '<room id="2" pref="0"/>'
+
+
+def _problem(classes, rooms='<room id="1" capacity="50"/><room id="2" capacity="50"/>', constraints=""):
+    xml = (f'<timetable nrDays="7" slotsPerDay="288"><rooms>{rooms}</rooms>'
+           f'<classes>{classes}</classes><groupConstraints>{constraints}</groupConstraints></timetable>')
+    return check_feasibility(io.StringIO(xml))
+
+
+def _class(class_id, *children, limit=10):
+    # Classes on the same date pattern clash whenever their times overlap
+    return f'<class id="{class_id}" classLimit="{limit}" nrRooms="1" dates="1111">{"".join(children)}</class>'
+
+
+def _issue_types(report):
+    return [issue["type"] for issue in report["issues"]]
+
+
+def test_converted_problem_is_feasible():
+    report = check_feasibility(os.path.join(DATA_DIR, "problem.xml"))
+    assert report["feasible"]
+    assert report["issues"] == []
+    assert report["classes"] == 7
+
+
+def test_class_without_rooms():
+    report = _problem(_class("1", MONDAY_8AM, limit=80))
+    assert not report["feasible"]
+    assert _issue_types(report) == ["no_rooms"]
+    assert "largest room holds 50" in report["message"]
+
+
+def test_class_without_times():
+    report = _problem(_class("1", '<room id="1" pref="0"/>', '<time days="1000000" start="96" length="18" pref="P"/>'))
+    assert _issue_types(report) == ["no_times"]
+
+
+def test_instructor_with_too_many_classes():
+    instructor = '<instructor id="7"/>'
+    report = _problem(_class("1", instructor, '<room id="1" pref="0"/>', MONDAY_8AM)
+                      + _class("2", instructor, '<room id="2" pref="0"/>', MONDAY_8AM))
+    assert _issue_types(report) == ["instructor_overloaded"]
+    assert report["issues"][0]["required_minutes"] == 180
+    assert report["issues"][0]["available_minutes"] == 90
+    assert report["issues"][0]["message"].startswith("Instructor 7 teaches 2 classes")
+
+
+def test_instructor_named_in_the_message():
+    instructor = '<instructor id="7"/>'
+    report = check_feasibility(io.StringIO(
+        '<timetable nrDays="7" slotsPerDay="288"><rooms><room id="1" capacity="50"/><room id="2" capacity="50"/></rooms>'
+        f'<classes>{_class("1", instructor, ROOM_1, MONDAY_8AM)}{_class("2", instructor, ROOM_2, MONDAY_8AM)}</classes>'
+        '</timetable>'), labels={"instructor": {"7": "Smith"}})
+    assert report["issues"][0]["message"].startswith("Instructor Smith teaches")
+
+
+def test_times_on_different_date_patterns_do_not_clash():
+    instructor = '<instructor id="7"/>'
+    first_half = '<date id="1" pattern="1100"/>'
+    second_half = '<date id="2" pattern="0011"/>'
+    monday = '<time days="1000000" start="96" length="18" pref="0" date="{}"/>'
+    report = _problem(
+        f'<class id="1" classLimit="10">{first_half}{instructor}{ROOM_1}{monday.format(1)}</class>'
+        f'<class id="2" classLimit="10">{second_half}{instructor}{ROOM_2}{monday.format(2)}</class>')
+    assert report["feasible"]
+
+
+def test_times_on_the_same_date_pattern_clash():
+    instructor = '<instructor id="7"/>'
+    report = _problem(
+        f'<class id="1" classLimit="10"><date id="1" pattern="1100"/>{instructor}{ROOM_1}'
+        '<time days="1000000" start="96" length="18" pref="0" date="1"/></class>'
+        f'<class id="2" classLimit="10"><date id="5" pattern="1100"/>{instructor}{ROOM_2}'
+        '<time days="1000000" start="96" length="18" pref="0" date="5"/></class>')
+    assert _issue_types(report) == ["instructor_overloaded"]
+
+
+def test_class_without_rooms_needs_none():
+    # Without nrRooms, a class that lists no room is placed without one
+    report = _problem(f'<class id="1" classLimit="10" dates="1111">{MONDAY_8AM}</class>')
+    assert report["feasible"]
+
+
+def test_room_with_too_many_classes():
+    report = _problem(_class("1", '<room id="1" pref="0"/>', MONDAY_8AM)
+                      + _class("2", '<room id="1" pref="0"/>', MONDAY_8AM))
+    assert _issue_types(report) == ["room_overloaded"]
+
+
+def test_classes_that_must_be_at_different_times():
+    constraint = '<constraint id="1" type="DIFF_TIME" pref="R"><class id="1"/><class id="2"/></constraint>'
+    report = _problem(_class("1", '<room id="1" pref="0"/>', MONDAY_8AM)
+                      + _class("2", '<room id="2" pref="0"/>', MONDAY_8AM), constraints=constraint)
+    assert _issue_types(report) == ["diff_time_overloaded"]
+
+
+def test_classes_that_fit_are_not_reported():
+    instructor = '<instructor id="7"/>'
+    report = _problem(_class("1", instructor, '<room id="1" pref="0"/>', MONDAY_8AM, TUESDAY_8AM)
+                      + _class("2", instructor, '<room id="1" pref="0"/>', MONDAY_8AM, TUESDAY_8AM))
+    assert report["feasible"]
+
+
+def test_broken_xml():
+    report = check_feasibility(io.StringIO("<timetable><classes>"))
+    assert not report["feasible"]
+    assert _issue_types(report) == ["invalid_xml"]
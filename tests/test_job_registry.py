@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from app import job_registry
+from app.job_registry import JobRecord, JobRegistry, load_record
+
+
+def test_get_returns_a_snapshot():
+    registry = JobRegistry()
+    registry.register(JobRecord("a", state="queued"))
+    snapshot = registry.get("a")
+    snapshot.state = "running"
+    assert registry.get("a").state == "queued"
+
+    updated = registry.update("a", state="running")
+    assert updated.state == "running"
+    assert updated.version > snapshot.version
+    assert registry.update("missing", state="running") is None
+
+
+def test_update_if_only_changes_jobs_in_the_given_states():
+    registry = JobRegistry()
+    registry.register(JobRecord("a", state="queued"))
+    assert registry.update_if("a", ("queued",), state="running").state == "running"
+    assert registry.update_if("a", ("queued",), state="error") is None
+    assert registry.get("a").state == "running"
+
+
+def test_identical_submissions_follow_the_leader():
+    registry = JobRegistry()
+    registry.register(JobRecord("a", state="queued", solve_key="key"))
+    assert registry.claim_leader("key", "a")
+
+    leader = registry.follow("key", JobRecord("b", state="queued", solve_key="key"))
+    assert leader.problem_id == "a"
+    assert registry.get("b").leader_id == "a"
+    assert registry.get("a").followers == ["b"]
+    # A third submission cannot take over the key while the leader is active
+    registry.register(JobRecord("c", state="queued", solve_key="key"))
+    assert not registry.claim_leader("key", "c")
+
+    assert registry.release_leader("key", "a") == ["b"]
+    assert registry.get("a").followers == []
+    assert registry.claim_leader("key", "c")
+
+
+def test_no_leader_to_follow_once_it_has_finished():
+    registry = JobRegistry()
+    registry.register(JobRecord("a", state="queued", solve_key="key"))
+    registry.claim_leader("key", "a")
+    registry.update("a", state="completed", finished_at=datetime.now())
+
+    assert registry.follow("key", JobRecord("b", solve_key="key")) is None
+    assert "b" not in registry
+
+
+def test_finished_jobs_are_evicted_and_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_registry, "JOB_HISTORY", 1)
+    registry = JobRegistry()
+    now = datetime.now()
+    registry.register(JobRecord("old", state="completed", message="done", problem_dir=str(tmp_path),
+                                finished_at=now - timedelta(seconds=10)))
+    registry.register(JobRecord("new", state="completed", finished_at=now))
+    registry.register(JobRecord("running", state="running"))
+
+    assert "old" not in registry
+    assert "new" in registry and "running" in registry
+    record = load_record(str(tmp_path))
+    assert (record.problem_id, record.state, record.message) == ("old", "completed", "done")
+    assert record.finished_at == now - timedelta(seconds=10)
+
+
+def test_parts_of_an_active_problem_are_kept(monkeypatch):
+    monkeypatch.setattr(job_registry, "JOB_HISTORY", 0)
+    registry = JobRegistry()
+    registry.register(JobRecord("parent", state="running", components=["parent.part1"]))
+    registry.register(JobRecord("parent.part1", state="completed", parent_id="parent", finished_at=datetime.now()))
+    registry.register(JobRecord("other", state="queued"))
+
+    assert "parent.part1" in registry
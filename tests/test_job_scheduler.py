@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from app.job_scheduler import QueueFullError, SolverScheduler
+
+
+def _blocker(scheduler):
+    """Occupy the single slot of a scheduler until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        release.wait(5)
+
+    scheduler.submit("blocker", job)
+    assert started.wait(5)
+    return release
+
+
+def _recorder(order, name, done=None):
+    def job():
+        order.append(name)
+        if done is not None:
+            done.set()
+    return job
+
+
+def test_full_queue_rejects_submissions():
+    scheduler = SolverScheduler(max_concurrent=1, queue_size=1)
+    release = _blocker(scheduler)
+    scheduler.submit("queued", lambda: None)
+    with pytest.raises(QueueFullError) as error:
+        scheduler.submit("rejected", lambda: None)
+    assert error.value.retry_after > 0
+    assert scheduler.queued == 1
+    release.set()
+
+
+def test_jobs_run_in_submission_order():
+    scheduler = SolverScheduler(max_concurrent=1, queue_size=10)
+    release = _blocker(scheduler)
+    order, done = [], threading.Event()
+    scheduler.submit("first", _recorder(order, "first"))
+    scheduler.submit("second", _recorder(order, "second", done))
+    release.set()
+    assert done.wait(5)
+    assert order == ["first", "second"]
+
+
+def test_short_predicted_jobs_go_first():
+    scheduler = SolverScheduler(max_concurrent=1, queue_size=10, priority_weight=1.0)
+    release = _blocker(scheduler)
+    order, done = [], threading.Event()
+    scheduler.submit("long", _recorder(order, "long", done), predicted_seconds=600)
+    ahead = scheduler.submit("short", _recorder(order, "short"), predicted_seconds=1)
+    assert ahead == 0
+    release.set()
+    assert done.wait(5)
+    assert order == ["short", "long"]
+
+
+def test_zero_weight_keeps_submission_order():
+    scheduler = SolverScheduler(max_concurrent=1, queue_size=10, priority_weight=0.0)
+    release = _blocker(scheduler)
+    order, done = [], threading.Event()
+    scheduler.submit("first", _recorder(order, "first"), predicted_seconds=600)
+    scheduler.submit("second", _recorder(order, "second", done), predicted_seconds=1)
+    release.set()
+    assert done.wait(5)
+    assert order == ["first", "second"]
+
+
+def test_multi_slot_job_waits_for_its_slots():
+    scheduler = SolverScheduler(max_concurrent=2, queue_size=10, priority_weight=0.0)
+    release = _blocker(scheduler)
+    busy, done = [], threading.Event()
+
+    def portfolio():
+        busy.append(scheduler.busy_slots)
+        done.set()
+
+    scheduler.submit("portfolio", portfolio, slots=2)
+    time.sleep(0.2)
+    # One slot is free, but the job needs two
+    assert not done.is_set()
+    release.set()
+    assert done.wait(5)
+    assert busy == [2]
+
+
+def test_submit_all_queues_all_jobs_or_none():
+    scheduler = SolverScheduler(max_concurrent=1, queue_size=2)
+    release = _blocker(scheduler)
+    jobs = [(f"part{i}", lambda: None, None) for i in range(3)]
+    with pytest.raises(QueueFullError):
+        scheduler.submit_all(jobs)
+    assert scheduler.queued == 0
+    scheduler.submit_all(jobs[:2])
+    assert scheduler.queued == 2
+    release.set()
@@ -0,0 +1,56 @@
+import os
+import xml.etree.ElementTree as ET
+
+from app.json_to_xml_converter import JSONtoXMLConverter
+
+from conftest import DATA_DIR, load_problem
+
+
+def _expected_xml():
+    # Written by the original minidom-based converter
+    with open(os.path.join(DATA_DIR, "problem.xml"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_output_matches_the_original_converter():
+    assert JSONtoXMLConverter(load_problem()).convert() == _expected_xml()
+
+
+def test_streamed_file_matches_convert(tmp_path):
+    path = tmp_path / "problem.xml"
+    JSONtoXMLConverter(load_problem()).convert_to_file(str(path))
+    assert path.read_text(encoding="utf-8") == _expected_xml()
+
+
+def test_compact_constraints_keep_classes_and_rooms():
+    expected = ET.fromstring(_expected_xml())
+    compact = ET.fromstring(JSONtoXMLConverter(load_problem(), compact_constraints=True).convert())
+
+    assert [ET.tostring(c) for c in compact.find("classes")] == [ET.tostring(c) for c in expected.find("classes")]
+    assert [ET.tostring(r) for r in compact.find("rooms")] == [ET.tostring(r) for r in expected.find("rooms")]
+    assert len(compact.find("groupConstraints")) < len(expected.find("groupConstraints"))
+
+
+def test_compact_constraints_cover_every_pair():
+    def pairs(root, kind):
+        result = set()
+        for constraint in root.iterfind(f"groupConstraints/constraint[@type='{kind}']"):
+            ids = [c.get("id") for c in constraint]
+            result.update((a, b) for a in ids for b in ids if a < b)
+        return result
+
+    expected = ET.fromstring(_expected_xml())
+    compact = ET.fromstring(JSONtoXMLConverter(load_problem(), compact_constraints=True).convert())
+    for kind in ("DIFF_TIME", "SAME_DAYS", "SAME_ROOM"):
+        # Groups only join classes that were pairwise constrained already
+        assert pairs(compact, kind) == pairs(expected, kind)
+
+
+def test_meeting_keys_follow_class_ids():
+    converter = JSONtoXMLConverter(load_problem())
+    root = ET.fromstring(converter.convert())
+    keys = converter.meeting_keys()
+    assert sorted(keys) == sorted(int(c.get("id")) for c in root.iterfind("classes/class"))
+    # C0 has two slots, so it is converted into two meetings
+    assert keys[1] == ("C0", 0)
+    assert keys[2] == ("C0", 1)
@@ -0,0 +1,58 @@
+from app.log_reader import DebugLogIndex
+
+
+def _log(tmp_path, text):
+    path = tmp_path / "debug.log"
+    path.write_bytes(text.encode("utf-8"))
+    return DebugLogIndex(str(path))
+
+
+def test_read_since_continues_from_the_returned_offset(tmp_path):
+    index = _log(tmp_path, "first\nsecond\n")
+    lines, offset = index.read_since(0)
+    assert lines == ["first", "second"]
+    assert offset == len("first\nsecond\n")
+
+    with open(index.path, "a") as f:
+        f.write("third\n")
+    assert index.read_since(offset) == (["third"], offset + len("third\n"))
+    assert index.read_since(offset + len("third\n")) == ([], offset + len("third\n"))
+
+
+def test_partial_line_is_held_back_until_complete(tmp_path):
+    index = _log(tmp_path, "done\nhalf a li")
+    lines, offset = index.read_since(0)
+    assert lines == ["done"]
+    assert offset == len("done\n")
+    assert index.read_since(offset, include_partial=True) == (["half a li"], len("done\nhalf a li"))
+
+    with open(index.path, "a") as f:
+        f.write("ne\n")
+    assert index.read_since(offset) == (["half a line"], len("done\nhalf a line\n"))
+
+
+def test_offset_past_a_replaced_log_starts_over(tmp_path):
+    index = _log(tmp_path, "new\n")
+    assert index.read_since(1000) == (["new"], len("new\n"))
+
+
+def test_missing_log_keeps_the_offset(tmp_path):
+    index = DebugLogIndex(str(tmp_path / "missing.log"))
+    assert index.read_since(42) == ([], 42)
+
+
+def test_read_tail_offset_continues_with_read_since(tmp_path):
+    index = _log(tmp_path, "".join(f"line {i}\n" for i in range(5000)))
+    lines, offset = index.read_tail(2)
+    assert lines == ["line 4998", "line 4999"]
+    with open(index.path, "a") as f:
+        f.write("line 5000\n")
+    assert index.read_since(offset)[0] == ["line 5000"]
+
+
+def test_scan_finds_the_first_error_incrementally(tmp_path):
+    index = _log(tmp_path, "INFO loaded\n")
+    assert index.scan() is None
+    with open(index.path, "a") as f:
+        f.write("ERROR no solution\nERROR later\n")
+    assert index.scan() == "ERROR no solution"
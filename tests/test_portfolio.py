@@ -0,0 +1,71 @@
+import json
+import os
+
+from app.portfolio import PORTFOLIO_SUMMARY_FILE, SolverPortfolio, reaches_target, solution_rank
+
+
+def _solution_xml(assigned, total, value):
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<!--Solution Info:\n'
+            f"    Assigned variables: {100.0 * assigned / total:.2f}% ({assigned}/{total})\n"
+            f"    Overall solution value: {value:.2f}\n-->\n<timetable/>\n")
+
+
+class _Finished:
+    pid = 1
+
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+
+    def poll(self):
+        return self.returncode
+
+
+class _Engine:
+    """Starts runs that have finished at once, saving the given (assigned, total, value) per seed."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def start(self, config_path, input_path, output_dir, overrides=None, max_heap=None):
+        os.makedirs(output_dir, exist_ok=True)
+        result = self.results.get(overrides["General.Seed"])
+        if result is None:
+            return _Finished(1)
+        with open(os.path.join(output_dir, "solution.xml"), "w") as f:
+            f.write(_solution_xml(*result))
+        return _Finished()
+
+
+def test_fewer_unassigned_classes_beat_a_lower_value():
+    complete = {"assigned_variables": 7, "total_variables": 7, "overall_solution_value": 90.0}
+    incomplete = {"assigned_variables": 6, "total_variables": 7, "overall_solution_value": 1.0}
+    better = dict(complete, overall_solution_value=10.0)
+    assert sorted([incomplete, complete, better, None], key=solution_rank) == [better, complete, incomplete, None]
+
+
+def test_reaches_target_only_when_complete():
+    assert reaches_target({"assigned_variables": 7, "total_variables": 7, "overall_solution_value": 0.0}, 0.0)
+    assert not reaches_target({"assigned_variables": 7, "total_variables": 7, "overall_solution_value": 2.0}, 0.0)
+    assert not reaches_target({"assigned_variables": 6, "total_variables": 7, "overall_solution_value": 0.0}, 0.0)
+    assert not reaches_target({}, 0.0)
+
+
+def test_best_run_is_moved_into_the_problem_folder(tmp_path):
+    engine = _Engine({"1": (7, 7, 5.0), "2": (6, 7, 1.0), "3": (7, 7, 2.0)})
+    portfolio = SolverPortfolio(engine, "config.cfg", "problem.xml", str(tmp_path), 4).start()
+    assert portfolio.wait() == 0
+
+    assert portfolio.best.seed == 3
+    with open(tmp_path / "solution.xml") as f:
+        assert "Overall solution value: 2.00" in f.read()
+    summary = json.loads((tmp_path / PORTFOLIO_SUMMARY_FILE).read_text())
+    assert summary["best_run"] == 3
+    assert [run["solution_available"] for run in summary["runs"]] == [True, True, True, False]
+    assert "seed 3" in portfolio.describe()
+
+
+def test_no_solution_reports_the_failed_exit_code(tmp_path):
+    portfolio = SolverPortfolio(_Engine({}), "config.cfg", "problem.xml", str(tmp_path), 2).start()
+    assert portfolio.wait() == 1
+    assert portfolio.best is None
+    assert not (tmp_path / "solution.xml").exists()
@@ -0,0 +1,74 @@
+from app.progress import ProgressParser, format_sse
+
+from conftest import load_problem, wait_for
+
+LOG = """16-Mar-25 22:04:11.900 [main] INFO  util.Progress> [Loading input data ...]
+16-Mar-25 22:04:12.016 [Solver] INFO  solver.Solver> Initial solution:[
+    Assigned variables: 50.00% (1/2)
+    Iteration: 10
+    Memory usage: 5.69M
+    Overall solution value: 3.00
+    Speed: 312.99 it/s
+  ]
+16-Mar-25 22:04:12.500 [Solver] INFO  solver.Solver> **BEST[42]** V:2/2 P:-1
+16-Mar-25 22:04:13.000 [Solver] INFO  solver.Solver> Model successfully loaded.
+"""
+
+
+def test_info_blocks_best_and_phase_lines():
+    events = ProgressParser().feed(LOG.splitlines())
+    assert [event["event"] for event in events] == ["phase", "progress", "best"]
+    assert events[0]["phase"] == "Loading input data"
+
+    progress = events[1]
+    assert progress["title"] == "Initial solution"
+    assert progress["iteration"] == 10
+    assert (progress["assigned_variables"], progress["total_variables"]) == (1, 2)
+    assert progress["assigned_percent"] == 50.0
+    assert progress["overall_solution_value"] == 3.0
+    assert progress["speed"] == 312.99
+    assert progress["memory_mb"] == 5.69
+
+    assert events[2]["iteration"] == 42
+    assert events[2]["summary"] == "V:2/2 P:-1"
+
+
+def test_block_split_across_reads():
+    parser = ProgressParser()
+    lines = LOG.splitlines()
+    assert [event["event"] for event in parser.feed(lines[:4])] == ["phase"]
+    assert parser.in_block
+    events = parser.feed(lines[4:])
+    assert events[0]["event"] == "progress"
+    assert events[0]["overall_solution_value"] == 3.0
+    assert not parser.in_block
+
+
+def test_format_sse():
+    assert format_sse("status", {"status": "running"}, 12) == 'id: 12\nevent: status\ndata: {"status": "running"}\n\n'
+
+
+def _events(body):
+    return [block.split("\n") for block in body.strip().split("\n\n")]
+
+
+def test_events_stream_of_a_finished_solve(client):
+    problem_id = client.post("/problems?cache=false", json=load_problem()).json()["problem_id"]
+    assert wait_for(client, problem_id)["status"] == "completed"
+
+    response = client.get(f"/problems/{problem_id}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    names = [next(line[7:] for line in event if line.startswith("event: ")) for event in events]
+    assert "progress" in names
+    assert names[-2:] == ["status", "complete"]
+
+    # Resuming from the last event id sends nothing but the final state
+    last_id = events[-1][0][4:]
+    resumed = client.get(f"/problems/{problem_id}/events", headers={"Last-Event-ID": last_id})
+    assert [event[-2] for event in _events(resumed.text)] == ["event: status", "event: complete"]
+
+
+def test_events_of_unknown_problem(client):
+    assert client.get("/problems/no_such_problem/events").status_code == 404
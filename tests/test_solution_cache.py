@@ -0,0 +1,90 @@
+import json
+import os
+
+from app.solution_cache import SOLUTION_JSON_FILE, SolutionCache
+
+
+class _Converter:
+    """Counts conversions; each one returns a new value."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"conversion": self.calls}
+
+
+def _solution(tmp_path, text="<solution/>", mtime_ns=1_000_000_000_000):
+    path = tmp_path / "solution.xml"
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_unchanged_solution_is_converted_once(tmp_path):
+    cache, convert = SolutionCache(persist=False), _Converter()
+    path = _solution(tmp_path)
+    assert cache.get(path, convert) == {"conversion": 1}
+    assert cache.get(path, convert) == {"conversion": 1}
+    assert convert.calls == 1
+
+
+def test_new_mtime_invalidates(tmp_path):
+    cache, convert = SolutionCache(persist=False), _Converter()
+    path = _solution(tmp_path)
+    cache.get(path, convert)
+    _solution(tmp_path, mtime_ns=2_000_000_000_000)
+    assert cache.get(path, convert) == {"conversion": 2}
+
+
+def test_new_size_invalidates(tmp_path):
+    cache, convert = SolutionCache(persist=False), _Converter()
+    path = _solution(tmp_path)
+    cache.get(path, convert)
+    # Same mtime, different content length
+    _solution(tmp_path, text="<solution>rewritten</solution>")
+    assert cache.get(path, convert) == {"conversion": 2}
+
+
+def test_missing_solution_is_dropped(tmp_path):
+    cache, convert = SolutionCache(persist=False), _Converter()
+    path = _solution(tmp_path)
+    cache.get(path, convert)
+    os.remove(path)
+    assert cache.get(path, convert) is None
+    assert len(cache) == 0
+
+
+def test_errors_are_not_cached(tmp_path):
+    cache = SolutionCache(persist=False)
+    path = _solution(tmp_path)
+    assert cache.get(path, lambda: {"error": "broken"}) == {"error": "broken"}
+    assert len(cache) == 0
+
+
+def test_persisted_json_survives_a_new_cache(tmp_path):
+    path = _solution(tmp_path)
+    SolutionCache(persist=True).get(path, _Converter())
+    assert json.loads((tmp_path / SOLUTION_JSON_FILE).read_text()) == {"conversion": 1}
+
+    convert = _Converter()
+    assert SolutionCache(persist=True).get(path, convert) == {"conversion": 1}
+    assert convert.calls == 0
+    # solution.json of an older solution.xml is not used
+    _solution(tmp_path, mtime_ns=2_000_000_000_000)
+    assert SolutionCache(persist=True).get(path, convert) == {"conversion": 1}
+    assert convert.calls == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SolutionCache(max_entries=1, persist=False)
+    first, second = tmp_path / "a", tmp_path / "b"
+    first.mkdir()
+    second.mkdir()
+    cache.get(_solution(first), _Converter())
+    cache.get(_solution(second), _Converter())
+    assert len(cache) == 1
+    convert = _Converter()
+    cache.get(str(first / "solution.xml"), convert)
+    assert convert.calls == 1
@@ -0,0 +1,62 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app.solution_service import StreamingXMLtoJSONConverter, XMLtoJSONConverter
+
+from conftest import DATA_DIR
+
+INFO = """<!--Solution Info:
+    Assigned variables: 85.71% (6/7)
+    Overall solution value: 12.50
+    Time: 0.25 min
+-->
+"""
+
+
+def _solution_xml():
+    """The test problem as the solver saves it: a current and a best assignment per class, one class unassigned."""
+    root = ET.parse(os.path.join(DATA_DIR, "problem.xml")).getroot()
+    classes = root.find("classes")
+    for class_elem in list(classes)[:-1]:
+        times = class_elem.findall("time")
+        times[0].set("solution", "true")
+        times[-1].set("best", "true")
+        class_elem.find("room").set("solution", "true")
+        for instructor in class_elem.findall("instructor"):
+            instructor.set("solution", "true")
+    statistics = ET.SubElement(root, "statistics")
+    ET.SubElement(statistics, "statistic", name="Room preferences").text = "3"
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + INFO + ET.tostring(root, encoding="unicode")
+
+
+@pytest.mark.parametrize("prefer_best", [False, True])
+def test_streaming_converter_matches_the_original(tmp_path, prefer_best):
+    xml = _solution_xml()
+    path = tmp_path / "solution.xml"
+    path.write_text(xml, encoding="utf-8")
+
+    expected = XMLtoJSONConverter(xml, prefer_best=prefer_best).convert()
+    assert StreamingXMLtoJSONConverter(str(path), prefer_best=prefer_best).convert() == expected
+
+    assert len(expected["solution"]["classes"]) == len(ET.fromstring(xml).find("classes")) - 1
+    assert expected["solution"]["info"]["runtime"] == "0.25 minutes"
+    assert expected["solution"]["info"]["statistics"]["Overall solution value"] == "12.50"
+    assert expected["solution"]["info"]["statistics"]["Room preferences"] == "3"
+
+
+def test_iter_classes_yields_assigned_classes(tmp_path):
+    path = tmp_path / "solution.xml"
+    path.write_text(_solution_xml(), encoding="utf-8")
+    first = next(StreamingXMLtoJSONConverter(str(path)).iter_classes())
+    assert first["id"] == "1"
+    assert first["assignment"]["time"]["start"] == "8:00 AM"
+    assert first["assignment"]["rooms"] == [{"id": "1", "name": ""}]
+
+
+def test_broken_solution(tmp_path):
+    path = tmp_path / "solution.xml"
+    path.write_text(_solution_xml()[:500], encoding="utf-8")
+    with pytest.raises(ValueError):
+        StreamingXMLtoJSONConverter(str(path)).convert()
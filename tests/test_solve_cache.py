@@ -0,0 +1,45 @@
+import os
+
+from app.solve_cache import SolveCache
+
+
+def _files(tmp_path, problem="<timetable/>", config="General.Seed=1\n"):
+    (tmp_path / "problem.xml").write_text(problem)
+    (tmp_path / "config.cfg").write_text(config)
+    return str(tmp_path / "problem.xml"), str(tmp_path / "config.cfg")
+
+
+def test_key_follows_input_config_and_overrides(tmp_path):
+    cache = SolveCache(str(tmp_path / "cache"))
+    key = cache.key(*_files(tmp_path), None)
+    assert cache.key(*_files(tmp_path), None) == key
+    assert cache.key(*_files(tmp_path, problem="<timetable></timetable>"), None) != key
+    assert cache.key(*_files(tmp_path, config="General.Seed=2\n"), None) != key
+    assert cache.key(*_files(tmp_path), None, {"General.Seed": "2"}) != key
+
+
+def test_stored_solution_is_restored(tmp_path):
+    cache = SolveCache(str(tmp_path / "cache"))
+    solution = tmp_path / "solution.xml"
+    solution.write_text("<timetable/>")
+    assert cache.lookup("key") is None
+
+    assert cache.store("key", str(solution), "problem1")
+    problem_dir = tmp_path / "problem2"
+    problem_dir.mkdir()
+    meta = cache.restore("key", str(problem_dir))
+    assert meta["problem_id"] == "problem1"
+    assert (problem_dir / "solution.xml").read_text() == "<timetable/>"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SolveCache(str(tmp_path / "cache"), max_entries=2)
+    solution = tmp_path / "solution.xml"
+    solution.write_text("<timetable/>")
+    for i, key in enumerate(("a", "b")):
+        cache.store(key, str(solution), key)
+        os.utime(os.path.join(cache.cache_dir, key), ns=(i, i))
+    cache.lookup("a")
+    cache.store("c", str(solution), "c")
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None and cache.lookup("c") is not None
@@ -0,0 +1,80 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from app.solver_engine import JPypeSolverEngine, JPypeSolverHandle, _JVMWorker
+
+
+class _FakeProcess:
+    pid = 1234
+
+    def is_alive(self):
+        return True
+
+
+def _worker_with_fake_jvm():
+    """A JPype worker whose process is a thread answering jobs over a real pipe."""
+    engine = object.__new__(JPypeSolverEngine)
+    engine._jobs = queue.Queue()
+    worker = _JVMWorker(engine, 0)
+    worker.process = _FakeProcess()
+    worker.conn, child_conn = multiprocessing.Pipe()
+    worker.stop_event = threading.Event()
+    return engine, worker, child_conn
+
+
+def test_stop_after_a_job_finished_does_not_stop_the_next_job():
+    engine, worker, conn = _worker_with_fake_jvm()
+    stopped_at_start = []
+    finishing, first_terminated = threading.Event(), threading.Event()
+
+    def jvm():
+        conn.recv()
+        finishing.set()
+        # The job is done, but a terminate() comes in before the result is sent
+        assert first_terminated.wait(5)
+        conn.send((0, None))
+        conn.recv()
+        stopped_at_start.append(worker.stop_event.is_set())
+        conn.send((0, None))
+
+    threading.Thread(target=jvm, daemon=True).start()
+    worker.thread.start()
+    first = JPypeSolverHandle(engine, {"input": "first.xml"})
+    second = JPypeSolverHandle(engine, {"input": "second.xml"})
+    engine._jobs.put(first)
+    assert finishing.wait(5)
+    first.terminate()
+    first_terminated.set()
+    assert first.wait(5) == 0
+
+    engine._jobs.put(second)
+    assert second.wait(5) == 0
+    assert stopped_at_start == [False]
+
+
+def test_terminate_stops_the_running_job():
+    engine, worker, conn = _worker_with_fake_jvm()
+
+    def jvm():
+        conn.recv()
+        conn.send((0, None) if worker.stop_event.wait(5) else (1, "not stopped"))
+
+    threading.Thread(target=jvm, daemon=True).start()
+    worker.thread.start()
+    handle = JPypeSolverHandle(engine, {"input": "problem.xml"})
+    engine._jobs.put(handle)
+    while handle._worker is None:
+        time.sleep(0.01)
+    handle.terminate()
+    assert handle.wait(5) == 0
+    assert handle.error is None
+
+
+def test_cancel_before_a_worker_takes_the_job():
+    engine = object.__new__(JPypeSolverEngine)
+    engine._jobs = queue.Queue()
+    handle = JPypeSolverHandle(engine, {"input": "problem.xml"})
+    handle.terminate()
+    assert handle.poll() == -15
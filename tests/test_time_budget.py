@@ -0,0 +1,61 @@
+import os
+
+from app.job_registry import JobRecord, get_job_registry
+from app.solver_engine import SNAPSHOT_FILE, termination_properties
+from app.solver_service import SolverService
+
+from conftest import load_problem, wait_for
+
+
+def test_termination_properties():
+    assert termination_properties() == {}
+    assert termination_properties(90, True) == {"Termination.TimeOut": "90", "Termination.StopWhenComplete": "true"}
+    assert termination_properties(stop_when_complete=False) == {"Termination.StopWhenComplete": "false"}
+
+
+def test_time_limit_is_passed_to_the_solver(client):
+    response = client.post("/problems?cache=false&time_limit=5&stop_when_complete=true", json=load_problem())
+    problem_id = response.json()["problem_id"]
+    overrides = get_job_registry().get(problem_id).overrides
+    assert overrides["Termination.TimeOut"] == "5"
+    assert overrides["Termination.StopWhenComplete"] == "true"
+    assert wait_for(client, problem_id)["status"] == "completed"
+
+
+def test_time_limit_must_be_positive(client):
+    assert client.post("/problems?time_limit=0", json=load_problem()).status_code == 422
+
+
+def _stopped_job(tmp_path, problem_id):
+    problem_dir = tmp_path / problem_id
+    problem_dir.mkdir()
+    record = JobRecord(problem_id, state="stopped", message="Solver stopped", problem_dir=str(problem_dir),
+                       solution_path=str(problem_dir / "solution.xml"))
+    get_job_registry().register(record)
+    return problem_dir
+
+
+def test_snapshot_stands_in_for_a_missing_solution(tmp_path, cpsolver_dir):
+    service = SolverService(cpsolver_path=str(cpsolver_dir))
+    problem_dir = _stopped_job(tmp_path, "snapshot_only")
+    (problem_dir / SNAPSHOT_FILE).write_text("<timetable/>")
+
+    service._finish_problem_job("snapshot_only", -15)
+
+    record = get_job_registry().get("snapshot_only")
+    assert record.solution_available
+    assert record.message.endswith("the best solution found so far was saved")
+    assert (problem_dir / "solution.xml").read_text() == "<timetable/>"
+    assert not os.path.exists(problem_dir / SNAPSHOT_FILE)
+
+
+def test_saved_solution_wins_over_the_snapshot(tmp_path, cpsolver_dir):
+    service = SolverService(cpsolver_path=str(cpsolver_dir))
+    problem_dir = _stopped_job(tmp_path, "saved_solution")
+    (problem_dir / SNAPSHOT_FILE).write_text("<snapshot/>")
+    (problem_dir / "solution.xml").write_text("<final/>")
+
+    service._finish_problem_job("saved_solution", 0)
+
+    assert (problem_dir / "solution.xml").read_text() == "<final/>"
+    assert not os.path.exists(problem_dir / SNAPSHOT_FILE)
@@ -0,0 +1,76 @@
+import xml.etree.ElementTree as ET
+
+from app.warm_start import mark_initial_xml, normalize_days, read_assignment
+
+from conftest import load_problem, wait_for
+
+PROBLEM = """<?xml version="1.0" encoding="UTF-8"?>
+<timetable nrDays="7" slotsPerDay="288">
+  <rooms><room id="1" capacity="50"/><room id="2" capacity="50"/></rooms>
+  <classes>
+    <class id="1" classLimit="10">
+      <time days="1000000" start="96" length="18" pref="0"/>
+      <time days="0100000" start="96" length="18" pref="0"/>
+      <room id="1" pref="0"/><room id="2" pref="0"/>
+    </class>
+    <class id="2" classLimit="10">
+      <time days="0010000" start="96" length="18" pref="0"/>
+      <room id="2" pref="0"/>
+    </class>
+  </classes>
+</timetable>
+"""
+
+
+def _marked(root, class_id):
+    class_elem = root.find(f"classes/class[@id='{class_id}']")
+    return [(child.tag, child.get("days") or child.get("id")) for child in class_elem
+            if child.get("initial") == "true" and child.get("solution") == "true"]
+
+
+def test_previous_placement_is_marked_as_initial(tmp_path):
+    path = tmp_path / "problem.xml"
+    path.write_text(PROBLEM)
+    assignment = {
+        "1": {"time": ("0100000", "96", "18"), "rooms": ["2"]},
+        # No longer in the domain of class 2
+        "2": {"time": ("1000000", "96", "18"), "rooms": ["1"]},
+        "3": {"time": ("1000000", "96", "18"), "rooms": []},
+    }
+    assert mark_initial_xml(str(path), assignment) == (1, 2)
+
+    root = ET.parse(path).getroot()
+    assert _marked(root, "1") == [("time", "0100000"), ("room", "2")]
+    assert _marked(root, "2") == []
+    assert [r.get("id") for r in root.iterfind("rooms/room")] == ["1", "2"]
+
+
+def test_read_assignment_of_a_marked_problem(tmp_path):
+    path = tmp_path / "solution.xml"
+    path.write_text(PROBLEM)
+    mark_initial_xml(str(path), {"1": {"time": ("1000000", "96", "18"), "rooms": ["1"]}})
+    assert read_assignment(str(path)) == {"1": {"time": ("1000000", "96", "18"), "rooms": ["1"]}}
+
+
+def test_locale_digits_in_days():
+    assert normalize_days("۰۰۱۰۰۰۰") == "0010000"
+
+
+def test_resolve_starts_from_the_previous_solution(client, cpsolver_dir):
+    previous = client.post("/problems?cache=false", json=load_problem()).json()["problem_id"]
+    assert wait_for(client, previous)["status"] == "completed"
+
+    problem = load_problem()
+    problem["classes"]["C0"]["capacity"] -= 1
+    response = client.post(f"/problems/{previous}/resolve", json=problem)
+    assert response.status_code == 200
+    problem_id = response.json()["problem_id"]
+
+    root = ET.parse(cpsolver_dir / "input" / f"{problem_id}.xml").getroot()
+    seeded = [c for c in root.iterfind("classes/class") if c.find("time[@initial='true']") is not None]
+    assert len(seeded) == len(root.find("classes"))
+    assert wait_for(client, problem_id)["status"] == "completed"
+
+
+def test_resolve_of_unknown_problem(client):
+    assert client.post("/problems/no_such_problem/resolve", json=load_problem()).status_code == 404